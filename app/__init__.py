@@ -5,22 +5,58 @@ This module sets up the Flask app, configures the database and JWT,
 and registers all necessary blueprints and error handlers.
 """
 
+import os
 from flask import Flask, jsonify
 from app.config import Config
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
-from .logging_config import logger
+from .logging_config import logger, configure_logging
+from .dal.routing_session import RoutingSession
 
 
 load_dotenv()
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 
 
+def _needs_create_all(app):
+    """
+    Decide whether `db.create_all()` has to run at startup.
+
+    With DB_CREATE_ALL=auto, the schema is only created when the database is
+    not stamped with the head revision of the Alembic migrations; a migrated
+    database skips the reflection of every table. `always` and `never`
+    force the decision.
+
+    Args:
+        app (Flask): The Flask application, inside its app context.
+
+    Returns:
+        bool: True if the tables should be created.
+    """
+    mode = app.config.get('DB_CREATE_ALL', 'auto')
+    if mode != 'auto':
+        return mode == 'always'
+
+    directory = app.extensions['migrate'].directory
+    if not os.path.isdir(directory):
+        return True
+    from alembic.config import Config as AlembicConfig
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    alembic_config = AlembicConfig()
+    alembic_config.set_main_option('script_location', directory)
+    heads = set(ScriptDirectory.from_config(alembic_config).get_heads())
+    with db.engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current != heads
+
+
 def create_app(config_class=Config):
     """
     Create and configure the Flask application.
@@ -32,16 +68,50 @@ def create_app(config_class=Config):
         app: The configured Flask application instance.
     """
     try:
+        from app.middleware.uploads import UploadRequest
         app = Flask(__name__, template_folder='./templates')
+        app.request_class = UploadRequest
         app.config.from_object(config_class)
+        configure_logging(app)
+
+        from app.middleware.proxy import init_proxy_fix
+        init_proxy_fix(app)
 
         db.init_app(app)
         migrate.init_app(app, db)
         jwt.init_app(app)
 
+        from app.services.token_service import init_token_revocation
+        init_token_revocation(jwt)
+
+        from app.middleware.request_logging import init_request_logging
+        init_request_logging(app)
+
+        from app.middleware.metrics import init_request_metrics
+        init_request_metrics(app)
+
+        from app.middleware.compression import init_compression
+        init_compression(app)
+
+        from app.middleware.profiling import init_profiling
+        init_profiling(app)
+
+        from app.middleware.query_instrumentation import init_query_instrumentation
+        init_query_instrumentation(app)
+
+        from app.services.password_service import init_password_pool
+        init_password_pool(app)
+
+        from app.middleware.rate_limit import init_rate_limiter
+        init_rate_limiter(app)
+
         @app.errorhandler(413)
         def request_entity_too_large(error):
-            return jsonify({"message": "The uploaded file is too large. Please upload a file smaller than 16MB."}), 413
+            return jsonify({"message": "The uploaded file is too large. Please upload a file smaller than 2MB."}), 413
+
+        @app.errorhandler(415)
+        def unsupported_media_type(error):
+            return jsonify({"message": error.description}), 415
 
         from app.models.user import User
         from app.models.role import Role
@@ -52,9 +122,21 @@ def create_app(config_class=Config):
         from app.models.achievement import Achievement
         from app.models.gameSession import GameSession
         from app.models.userProfile import UserProfile
+        from app.models.scoreDistribution import ScoreDistribution
+        from app.models.referenceDataVersion import ReferenceDataVersion
+        from app.models.revokedToken import RevokedToken
+
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
         with app.app_context():
-            db.create_all()
+            if _needs_create_all(app):
+                db.create_all()
+
+        from app.services.replica_service import init_read_replica
+        init_read_replica(app)
+
+        from app.services.reference_data_service import warm_reference_data
+        warm_reference_data(app)
 
         from app.routes.route import main
         from app.routes.user_routes import user_bp
@@ -64,6 +146,8 @@ def create_app(config_class=Config):
         from app.routes.question_routes import question_bp
         from app.routes.score_routes import score_bp
         from app.routes.openai_routes import openai_bp
+        from app.routes.metrics_routes import metrics_bp
+        from app.routes.admin_routes import admin_bp
         # from app.routes.claude_routes import claude_bp
 
         app.register_blueprint(main)
@@ -74,8 +158,18 @@ def create_app(config_class=Config):
         app.register_blueprint(question_bp)
         app.register_blueprint(score_bp)
         app.register_blueprint(openai_bp)
+        app.register_blueprint(metrics_bp)
+        app.register_blueprint(admin_bp)
         # app.register_blueprint(claude_bp)
 
+        from app.cli import scores_cli, users_cli, tokens_cli, metrics_cli, queries_cli, replica_cli
+        app.cli.add_command(scores_cli)
+        app.cli.add_command(users_cli)
+        app.cli.add_command(tokens_cli)
+        app.cli.add_command(metrics_cli)
+        app.cli.add_command(queries_cli)
+        app.cli.add_command(replica_cli)
+
         logger.info("Application setup complete.")
         return app
 
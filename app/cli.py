@@ -0,0 +1,203 @@
+"""
+Command line interface for application maintenance tasks.
+
+This module defines the `flask` sub-commands used by operators to run
+maintenance jobs outside of the request cycle.
+"""
+
+import click
+from flask.cli import AppGroup
+
+
+scores_cli = AppGroup('scores', help='Maintenance commands for scores.')
+users_cli = AppGroup('users', help='Maintenance commands for users.')
+tokens_cli = AppGroup('tokens', help='Maintenance commands for JWTs.')
+metrics_cli = AppGroup('metrics', help='Maintenance commands for metrics.')
+queries_cli = AppGroup('queries', help='Slow query statistics and index advice.')
+replica_cli = AppGroup('replica', help='Maintenance commands for the read replica.')
+
+
+@scores_cli.command('rebuild-distributions')
+def rebuild_distributions_command():
+    """
+    Rebuild the per-category score distribution sketches from the scores table.
+    """
+    from app.services.score_distribution_service import rebuild_score_distributions
+
+    scores_read = rebuild_score_distributions()
+    click.echo(f"Rebuilt score distributions from {scores_read} scores.")
+
+
+@scores_cli.command('flush-distributions')
+def flush_distributions_command():
+    """
+    Flush the pending score distribution sketches of this process.
+    """
+    from app.services.score_distribution_service import distribution_registry
+
+    distribution_registry.flush()
+    click.echo("Score distributions flushed.")
+
+
+@scores_cli.command('rotate')
+def rotate_partitions_command():
+    """
+    Move score periods older than SCORE_HOT_MONTHS out of the hot scores table.
+    """
+    from app.services.score_archive_service import rotate_score_partitions
+
+    rotated = rotate_score_partitions()
+    click.echo(f"Rotated {len(rotated)} score periods out of the hot table.")
+
+
+@scores_cli.command('archive')
+def archive_partitions_command():
+    """
+    Archive score periods older than SCORE_ARCHIVE_AFTER_DAYS into compressed files.
+    """
+    from app.services.score_archive_service import archive_score_partitions
+
+    written = archive_score_partitions()
+    for path in written:
+        click.echo(f"Archived {path}")
+    click.echo(f"Archived {len(written)} score periods.")
+
+
+@users_cli.command('provision')
+@click.argument('source', type=click.File('rb'))
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+              help='Where to write the CSV result file (default: stdout).')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Input format; detected from the file name by default.')
+def provision_users_command(source, output, fmt):
+    """
+    Create users in bulk from a CSV or NDJSON file.
+    """
+    from app.services.user_provisioning_service import detect_format, provision_users
+
+    fmt = fmt or detect_format(source.name)
+    summary = provision_users(source, fmt, output)
+    click.echo(f"Provisioned {summary['created']} users, {summary['failed']} failed.", err=True)
+
+
+@users_cli.command('run-provisioning-job')
+@click.argument('job_id')
+def run_provisioning_job_command(job_id):
+    """
+    Run a bulk provisioning job submitted through POST /users/bulk.
+    """
+    from app.services.user_provisioning_service import run_provisioning_job
+
+    job = run_provisioning_job(job_id)
+    click.echo(f"Provisioning job {job_id} {job['status']}: {job['created']} created, {job['failed']} failed.",
+               err=True)
+
+
+@tokens_cli.command('purge-revoked')
+def purge_revoked_tokens_command():
+    """
+    Delete the denylist entries of tokens that have expired.
+    """
+    from app.services.token_service import purge_expired_revocations
+
+    deleted = purge_expired_revocations()
+    click.echo(f"Purged {deleted} expired token revocations.")
+
+
+@metrics_cli.command('reset')
+def reset_metrics_command():
+    """
+    Delete the metrics files of all worker processes; run before starting the server.
+    """
+    from flask import current_app
+    from app.services.metrics_service import reset_metrics
+
+    deleted = reset_metrics(current_app.config['METRICS_DIR'])
+    click.echo(f"Deleted {deleted} metrics files.")
+
+
+@queries_cli.command('top')
+@click.option('--limit', '-n', default=20, show_default=True, help='Number of statement shapes to show.')
+def top_queries_command(limit):
+    """
+    Show the statement shapes with the most total time across all processes.
+    """
+    from flask import current_app
+    from app.services.query_advisor_service import load_query_stats, worst_shapes
+
+    stats = load_query_stats(current_app.config['SQL_STATS_DIR'])
+    for shape, shape_stats in worst_shapes(stats, limit):
+        click.echo(f"{shape_stats['total_seconds'] * 1000:10.1f} ms total {shape_stats['count']:8d} calls "
+                   f"{shape_stats['max_seconds'] * 1000:8.1f} ms max {shape_stats['slow_count']:6d} slow  {shape}")
+
+
+@queries_cli.command('advise')
+@click.option('--limit', '-n', default=10, show_default=True, help='Number of statement shapes to explain.')
+@click.option('--write', is_flag=True, help='Write the proposed indexes as an Alembic migration.')
+def advise_indexes_command(limit, write):
+    """
+    Explain the worst statement shapes and propose indexes for their full scans.
+    """
+    import os
+    from alembic.config import Config as AlembicConfig
+    from alembic.script import ScriptDirectory
+    from flask import current_app
+    from app.services.query_advisor_service import advise_indexes, index_name, load_query_stats, render_migration
+
+    stats = load_query_stats(current_app.config['SQL_STATS_DIR'])
+    if not stats:
+        click.echo("No query statistics recorded yet.")
+        return
+
+    explained, proposals = advise_indexes(stats, limit)
+    for shape, shape_stats, plan in explained:
+        click.echo(f"{shape_stats['total_seconds'] * 1000:.1f} ms in {shape_stats['count']} calls: {shape}")
+        for line in plan:
+            click.echo(f"    {line}")
+
+    if not proposals:
+        click.echo("No indexes to propose.")
+        return
+    for (table, columns), proposal in sorted(proposals.items(), key=lambda item: -item[1]['total_seconds']):
+        click.echo(f"Proposed {index_name(table, columns)} on {table} ({', '.join(columns)}) for "
+                   f"{len(proposal['shapes'])} statements, {proposal['total_seconds'] * 1000:.1f} ms total")
+
+    if write:
+        directory = current_app.extensions['migrate'].directory
+        alembic_config = AlembicConfig(os.path.join(directory, 'alembic.ini'))
+        alembic_config.set_main_option('script_location', directory)
+        head = ScriptDirectory.from_config(alembic_config).get_current_head()
+        revision, source = render_migration(proposals, head)
+        path = os.path.join(directory, 'versions', f"{revision}_advised_indexes.py")
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(source)
+        click.echo(f"Wrote {path}; review it, then run `flask db upgrade`.")
+
+
+@queries_cli.command('reset')
+def reset_query_stats_command():
+    """
+    Delete the query statistics of all processes.
+    """
+    from flask import current_app
+    from app.services.query_advisor_service import reset_query_stats
+
+    deleted = reset_query_stats(current_app.config['SQL_STATS_DIR'])
+    click.echo(f"Deleted {deleted} query statistics files.")
+
+
+@replica_cli.command('sync')
+def sync_replica_command():
+    """
+    Refresh a local SQLite replica file from the primary database file.
+    """
+    from flask import current_app
+    from app import db
+    from app.services.replica_service import sync_sqlite_replica
+
+    replica_url = current_app.config.get('SQLALCHEMY_BINDS', {}).get('replica')
+    if not replica_url or not sync_sqlite_replica(current_app.config['SQLALCHEMY_DATABASE_URI'], replica_url):
+        click.echo("No SQLite replica configured; nothing to sync.")
+        return
+    db.engines['replica'].dispose()
+    click.echo("Replica refreshed from the primary.")
@@ -6,6 +6,7 @@ such as secret keys, database URIs, and JWT settings.
 """
 
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -17,15 +18,96 @@ class Config:
     """Configuration class for setting application parameters."""
 
     SECRET_KEY = os.environ.get('SECRET_KEY')
+    APP_ENV = os.getenv('APP_ENV', 'development')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO' if APP_ENV == 'production' else 'DEBUG').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')
+    LOG_FILE = os.getenv('LOG_FILE', 'logs.log')
+    REQUEST_LOGGING_ENABLED = os.getenv('REQUEST_LOGGING_ENABLED', 'true').lower() == 'true'
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_ROTATE_SECONDS = int(os.getenv('LOG_ROTATE_SECONDS', 24 * 3600))
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 30))
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    DB_CREATE_ALL = os.getenv('DB_CREATE_ALL', 'auto')
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+    REPLICA_READS_ENABLED = os.getenv('REPLICA_READS_ENABLED', 'true').lower() == 'true'
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL and REPLICA_READS_ENABLED else {}
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 30)))
+    TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', 2))
+    TOKEN_REVOCATION_REBUILD_SECONDS = float(os.getenv('TOKEN_REVOCATION_REBUILD_SECONDS', 3600))
+    TOKEN_BLOOM_CAPACITY = int(os.getenv('TOKEN_BLOOM_CAPACITY', 100000))
+    TOKEN_BLOOM_ERROR_RATE = float(os.getenv('TOKEN_BLOOM_ERROR_RATE', 0.001))
+    TOKEN_BLOOM_REBUILD_FILL = float(os.getenv('TOKEN_BLOOM_REBUILD_FILL', 0.9))
     BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    RUNTIME_DIR = os.getenv('RUNTIME_DIR', os.path.join(BASE_DIR, 'var'))
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
     MAX_CONTENT_LENGTH = 2 * 1024 * 1024 # 2MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    PROFILE_PICTURE_MAX_BYTES = int(os.getenv('PROFILE_PICTURE_MAX_BYTES', 2 * 1024 * 1024))
+    PROFILE_PICTURE_MAX_PIXELS = int(os.getenv('PROFILE_PICTURE_MAX_PIXELS', 40 * 1000 * 1000))
+    UPLOADS_CACHE_SECONDS = int(os.getenv('UPLOADS_CACHE_SECONDS', 3600))
+    UPLOADS_ACCEL_REDIRECT_PREFIX = os.getenv('UPLOADS_ACCEL_REDIRECT_PREFIX')
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    PROFILE_THUMBNAIL_SIZES = tuple(int(size) for size in os.getenv('PROFILE_THUMBNAIL_SIZES', '64,256').split(','))
     CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
     CLAUDE_API_URL = os.getenv('CLAUDE_API_URL')
-
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_POOL_SIZE = int(os.getenv('BCRYPT_POOL_SIZE', 1))
+    BCRYPT_POOL_QUEUE_SIZE = int(os.getenv('BCRYPT_POOL_QUEUE_SIZE', 4))
+    BCRYPT_POOL_START_METHOD = os.getenv('BCRYPT_POOL_START_METHOD', 'forkserver')
+    BCRYPT_POOL_TIMEOUT = float(os.getenv('BCRYPT_POOL_TIMEOUT', 5))
+    LAST_SEEN_FLUSH_SECONDS = float(os.getenv('LAST_SEEN_FLUSH_SECONDS', 10))
+    LAST_SEEN_BATCH_SIZE = int(os.getenv('LAST_SEEN_BATCH_SIZE', 1000))
+    XP_LEVEL_BASE = float(os.getenv('XP_LEVEL_BASE', 100))
+    XP_LEVEL_EXPONENT = float(os.getenv('XP_LEVEL_EXPONENT', 1.5))
+    XP_MAX_LEVEL = int(os.getenv('XP_MAX_LEVEL', 100))
+    XP_AWARD_FLUSH_SECONDS = float(os.getenv('XP_AWARD_FLUSH_SECONDS', 0))
+    BULK_PROVISION_BATCH_SIZE = int(os.getenv('BULK_PROVISION_BATCH_SIZE', 1000))
+    BULK_PROVISION_LOG_ROUNDS = int(os.getenv('BULK_PROVISION_LOG_ROUNDS')) if os.getenv('BULK_PROVISION_LOG_ROUNDS') else None
+    BULK_PROVISION_POOL_SIZE = int(os.getenv('BULK_PROVISION_POOL_SIZE', max(1, (os.cpu_count() or 2) // 2)))
+    BULK_PROVISION_JOB_DIR = os.getenv('BULK_PROVISION_JOB_DIR')
+    BULK_PROVISION_JOB_RETENTION_DAYS = float(os.getenv('BULK_PROVISION_JOB_RETENTION_DAYS', 7))
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 200))
+    HISTORY_MAX_DAYS = int(os.getenv('HISTORY_MAX_DAYS', 366))
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+    PROXY_FIX_X_PROTO = int(os.getenv('PROXY_FIX_X_PROTO', 0))
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'shared')
+    RATE_LIMIT_STATE_FILE = os.getenv('RATE_LIMIT_STATE_FILE')
+    RATE_LIMIT_SLOTS = int(os.getenv('RATE_LIMIT_SLOTS', 4096))
+    LOGIN_RATE_LIMIT = os.getenv('LOGIN_RATE_LIMIT', '10/minute')
+    AI_QUESTION_RATE_LIMIT = os.getenv('AI_QUESTION_RATE_LIMIT', '5/minute')
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(RUNTIME_DIR, 'metrics'))
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_ALGORITHMS = tuple(os.getenv('COMPRESSION_ALGORITHMS', 'br,gzip').split(','))
+    COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample')
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'trivia-profiles'))
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
+    REFERENCE_CACHE_CHECK_SECONDS = float(os.getenv('REFERENCE_CACHE_CHECK_SECONDS', 5))
+    # The per-request query headers expose internals; they are off in production unless asked for.
+    SQL_INSTRUMENTATION_ENABLED = os.getenv('SQL_INSTRUMENTATION_ENABLED',
+                                            'false' if APP_ENV == 'production' else 'true').lower() == 'true'
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    SQL_QUERY_BUDGET = int(os.getenv('SQL_QUERY_BUDGET')) if os.getenv('SQL_QUERY_BUDGET') else None
+    SQL_FAIL_ON_N_PLUS_ONE = os.getenv('SQL_FAIL_ON_N_PLUS_ONE', 'false').lower() == 'true'
+    SQL_STATS_ENABLED = os.getenv('SQL_STATS_ENABLED', 'true').lower() == 'true'
+    SQL_STATS_DIR = os.getenv('SQL_STATS_DIR', os.path.join(RUNTIME_DIR, 'query-stats'))
+    SQL_STATS_FLUSH_SECONDS = int(os.getenv('SQL_STATS_FLUSH_SECONDS', 60))
+    SQL_STATS_MAX_SHAPES = int(os.getenv('SQL_STATS_MAX_SHAPES', 500))
+    SQL_STATS_CAPTURE_PARAMETERS = os.getenv('SQL_STATS_CAPTURE_PARAMETERS', 'false').lower() == 'true'
+    SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 200))
+    SCORE_DISTRIBUTION_FLUSH_SECONDS = int(os.getenv('SCORE_DISTRIBUTION_FLUSH_SECONDS', 30))
+    SCORE_HOT_MONTHS = int(os.getenv('SCORE_HOT_MONTHS', 3))
+    SCORE_PARTITION_PREMAKE_MONTHS = int(os.getenv('SCORE_PARTITION_PREMAKE_MONTHS', 2))
+    SCORE_ARCHIVE_AFTER_DAYS = int(os.getenv('SCORE_ARCHIVE_AFTER_DAYS', 365))
+    SCORE_ARCHIVE_FOLDER = os.getenv('SCORE_ARCHIVE_FOLDER', os.path.join(BASE_DIR, 'archive'))
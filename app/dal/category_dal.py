@@ -7,6 +7,8 @@ data in the database, handling CRUD operations related to question categories.
 
 from app.models.category import Category, db
 from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+from app.dal.routing_session import replica_reads
 
 
 class CategoryDAL:
@@ -14,6 +16,7 @@ class CategoryDAL:
     Class for accessing and manipulating Category data.
     """
     @staticmethod
+    @replica_reads
     def get_all_categories():
         """
         Retrieve all categories from the database.
@@ -24,6 +27,7 @@ class CategoryDAL:
         return Category.query.all()
 
     @staticmethod
+    @replica_reads
     def get_category_by_id(category_id):
         """
         Retrieve a category by its ID.
@@ -37,6 +41,7 @@ class CategoryDAL:
         return Category.query.get(category_id)
 
     @staticmethod
+    @replica_reads
     def get_category_by_name(category_name):
         """
         Retrieve a category by its name.
@@ -87,7 +92,7 @@ class CategoryDAL:
         Commit changes to the database.
         """
         try:
-            db.session.commit()
+            commit_or_flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
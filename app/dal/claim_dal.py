@@ -7,7 +7,9 @@ interactions related to user claims.
 """
 
 from app.models.claim import Claim, db
+from sqlalchemy import insert
 from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
 
 
 class ClaimDAL:
@@ -52,6 +54,26 @@ class ClaimDAL:
             db.session.rollback()
             raise e
 
+    @staticmethod
+    def add_claims(claims):
+        """
+        Stage several claims for insertion in a single flush.
+
+        Args:
+            claims (list): The Claim objects to add.
+        """
+        db.session.add_all(claims)
+
+    @staticmethod
+    def bulk_insert_claims(rows):
+        """
+        Insert many claims with multi-row INSERT statements.
+
+        Args:
+            rows (list): Dictionaries with the type, value and user_id of each claim.
+        """
+        db.session.execute(insert(Claim), rows)
+
     @staticmethod
     def delete_claims_by_user_id(user_id):
         """
@@ -65,7 +87,7 @@ class ClaimDAL:
         """
         try:
             Claim.query.filter_by(user_id=user_id).delete()
-            db.session.commit()
+            db.session.flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
@@ -79,7 +101,7 @@ class ClaimDAL:
             SQLAlchemyError: If there is an error during the database operation.
         """
         try:
-            db.session.commit()
+            commit_or_flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
@@ -8,6 +8,8 @@ from the business logic in the service layer.
 
 from app.models.question import Question, db
 from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+from app.dal.routing_session import replica_reads
 
 
 class QuestionDAL:
@@ -50,6 +52,7 @@ class QuestionDAL:
         return existing_question is not None
 
     @staticmethod
+    @replica_reads
     def get_question_by_id(question_id):
         """
         Retrieve a question by its ID.
@@ -63,6 +66,7 @@ class QuestionDAL:
         return Question.query.get(question_id)
 
     @staticmethod
+    @replica_reads
     def get_all_questions():
         """
         Retrieve all questions from the database.
@@ -99,7 +103,7 @@ class QuestionDAL:
         """
         try:
             db.session.delete(question)
-            db.session.commit()
+            db.session.flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
@@ -110,7 +114,7 @@ class QuestionDAL:
         Commit the current transaction.
         """
         try:
-            db.session.commit()
+            commit_or_flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
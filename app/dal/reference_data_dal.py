@@ -0,0 +1,42 @@
+"""
+Data Access Layer for reference data version counters.
+
+This module reads and bumps the version counters that tell every worker
+process when its in-memory copy of roles or categories is out of date.
+"""
+
+from app.models.referenceDataVersion import ReferenceDataVersion, db
+
+
+class ReferenceDataDAL:
+    """
+    Class for accessing and manipulating ReferenceDataVersion data.
+    """
+    @staticmethod
+    def get_versions():
+        """
+        Retrieve every reference data version counter in one query.
+
+        Returns:
+            dict: Mapping of reference data set name to version.
+        """
+        return dict(db.session.query(ReferenceDataVersion.name, ReferenceDataVersion.version).all())
+
+    @staticmethod
+    def bump_version(name):
+        """
+        Increment the version counter of a reference data set.
+
+        The increment is a single atomic UPDATE; the row is created on first use.
+        Changes are staged in the current transaction and committed with the
+        write that caused them.
+
+        Args:
+            name (str): The reference data set name.
+        """
+        updated = (ReferenceDataVersion.query
+                   .filter_by(name=name)
+                   .update({'version': ReferenceDataVersion.version + 1}, synchronize_session=False))
+        if not updated:
+            db.session.add(ReferenceDataVersion(name=name, version=1))
+            db.session.flush()
@@ -0,0 +1,123 @@
+"""
+Data Access Layer for revoked JWT IDs.
+
+This module stores the IDs (`jti`) of revoked access and refresh tokens,
+the exact denylist behind the in-memory Bloom filter of each worker.
+"""
+
+from app.models.revokedToken import RevokedToken, db
+from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+
+
+class RevokedTokenDAL:
+    """
+    Class for accessing and manipulating RevokedToken data.
+    """
+    @staticmethod
+    def add_revoked_token(jti, token_type, user_id, revoked_at, expires_at):
+        """
+        Stage the revocation of a token.
+
+        Args:
+            jti (str): The unique ID of the token.
+            token_type (str): 'access' or 'refresh'.
+            user_id (int): ID of the user the token was issued to.
+            revoked_at (datetime): Timestamp of the revocation.
+            expires_at (datetime): Expiry of the token.
+
+        Raises:
+            SQLAlchemyError: If there is an error during the database operation,
+            including when the token is already revoked.
+        """
+        try:
+            db.session.add(RevokedToken(jti=jti, token_type=token_type, user_id=user_id,
+                                        revoked_at=revoked_at, expires_at=expires_at))
+            db.session.flush()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def is_revoked(jti):
+        """
+        Check whether a token ID is in the denylist.
+
+        Args:
+            jti (str): The unique ID of the token.
+
+        Returns:
+            bool: True if the token is revoked.
+        """
+        return db.session.query(RevokedToken.jti).filter_by(jti=jti).first() is not None
+
+    @staticmethod
+    def get_jtis_revoked_since(since):
+        """
+        Retrieve the IDs of tokens revoked at or after a timestamp.
+
+        Args:
+            since (datetime): The lower bound of `revoked_at`.
+
+        Returns:
+            list: Tuples of (jti, revoked_at).
+        """
+        return (db.session.query(RevokedToken.jti, RevokedToken.revoked_at)
+                .filter(RevokedToken.revoked_at >= since)
+                .all())
+
+    @staticmethod
+    def count_unexpired(now):
+        """
+        Count the revoked tokens that have not expired yet.
+
+        Args:
+            now (datetime): The current time.
+
+        Returns:
+            int: The number of unexpired revocations.
+        """
+        return db.session.query(RevokedToken.jti).filter(RevokedToken.expires_at > now).count()
+
+    @staticmethod
+    def iter_unexpired_jtis(now, batch_size=1000):
+        """
+        Stream the IDs of revoked tokens that have not expired yet.
+
+        Args:
+            now (datetime): The current time.
+            batch_size (int): Number of rows fetched per round trip.
+
+        Returns:
+            Iterator: Tuples of (jti, revoked_at).
+        """
+        return (db.session.query(RevokedToken.jti, RevokedToken.revoked_at)
+                .filter(RevokedToken.expires_at > now)
+                .execution_options(yield_per=batch_size))
+
+    @staticmethod
+    def delete_expired(now):
+        """
+        Delete the revocations of tokens that have expired.
+
+        Args:
+            now (datetime): The current time.
+
+        Returns:
+            int: The number of deleted rows.
+        """
+        return RevokedToken.query.filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+
+    @staticmethod
+    def commit_changes():
+        """
+        Commit the current database transaction.
+
+        Raises:
+            SQLAlchemyError: If there is an error during the database operation.
+        """
+        try:
+            commit_or_flush()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
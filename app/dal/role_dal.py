@@ -7,6 +7,8 @@ data in the database, handling CRUD operations related to user roles.
 
 from app.models.role import Role, db
 from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+from app.dal.routing_session import replica_reads
 
 
 class RoleDAL:
@@ -14,6 +16,7 @@ class RoleDAL:
     Class for accessing and manipulating Role data.
     """
     @staticmethod
+    @replica_reads
     def get_all_roles():
         """
         Retrieve all roles from the database.
@@ -24,6 +27,7 @@ class RoleDAL:
         return Role.query.all()
 
     @staticmethod
+    @replica_reads
     def get_role_by_id(role_id):
         """
         Retrieve a role by its ID.
@@ -37,6 +41,7 @@ class RoleDAL:
         return Role.query.get(role_id)
 
     @staticmethod
+    @replica_reads
     def get_role_by_name(name):
         """
         Retrieve a role by its name.
@@ -84,7 +89,7 @@ class RoleDAL:
         """
         try:
             db.session.delete(role)
-            db.session.commit()
+            db.session.flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
@@ -98,7 +103,7 @@ class RoleDAL:
             SQLAlchemyError: If there is an error during the database operation.
         """
         try:
-            db.session.commit()
+            commit_or_flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
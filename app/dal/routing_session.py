@@ -0,0 +1,79 @@
+"""
+Read-replica routing for the database session.
+
+When a `replica` bind is configured (REPLICA_DATABASE_URL), DAL read
+methods decorated with `replica_reads` send their SELECT statements to the
+replica engine. Everything else uses the primary: writes, flushes, locking
+reads, raw SQL, reads inside a unit of work, and reads outside a decorated
+method such as lazy loads. Once a request has written anything, the session
+sticks to the primary for the rest of the request, so a request always
+reads its own writes.
+
+This module does not import the application package; the session class is
+needed to create `db` itself.
+"""
+
+from functools import wraps
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+
+REPLICA_BIND = 'replica'
+
+_REPLICA_DEPTH_KEY = 'replica_reads_depth'
+_STICKY_KEY = 'use_primary'
+
+
+class RoutingSession(Session):
+    """
+    Session that routes replica-safe reads to the `replica` bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            info = self.info
+            if isinstance(clause, Select) and clause._for_update_arg is None and not self._flushing:
+                if info.get(_REPLICA_DEPTH_KEY) and not info.get(_STICKY_KEY):
+                    engine = self._db.engines.get(REPLICA_BIND)
+                    if engine is not None:
+                        return engine
+            else:
+                info[_STICKY_KEY] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def stick_to_primary(session):
+    """
+    Send all further statements of a session to the primary.
+
+    Args:
+        session (Session): The database session.
+    """
+    session.info[_STICKY_KEY] = True
+
+
+def replica_reads(func):
+    """
+    Decorator for DAL read methods whose queries may run on the replica.
+
+    Apply it below `@staticmethod`. Only statements executed while the
+    method runs are routed; a returned query that is executed later uses
+    the primary.
+
+    Args:
+        func (function): The DAL read method.
+
+    Returns:
+        function: The decorated method.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        info = current_app.extensions['sqlalchemy'].session.info
+        depth = info.get(_REPLICA_DEPTH_KEY, 0)
+        info[_REPLICA_DEPTH_KEY] = depth + 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            info[_REPLICA_DEPTH_KEY] = depth
+    return wrapper
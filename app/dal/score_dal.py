@@ -7,7 +7,10 @@ from the business logic in the service layer.
 """
 
 from app.models.score import Score, db
+from sqlalchemy import and_, or_
 from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+from app.dal.routing_session import replica_reads
 
 
 class ScoreDAL:
@@ -29,13 +32,14 @@ class ScoreDAL:
         try:
             score = Score(**score_data)
             db.session.add(score)
-            db.session.commit()
+            db.session.flush()
             return score
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
 
     @staticmethod
+    @replica_reads
     def get_score_by_id(user_id, score_id):
         """
         Retrieve a score by its ID and user ID.
@@ -50,6 +54,7 @@ class ScoreDAL:
         return Score.query.filter_by(id=score_id, user_id=user_id).first()
 
     @staticmethod
+    @replica_reads
     def get_all_scores_of_user(user_id):
         """
         Retrieve all scores of user from the database.
@@ -60,6 +65,32 @@ class ScoreDAL:
         return Score.query.filter_by(user_id=user_id).all()
 
     @staticmethod
+    @replica_reads
+    def get_scores_of_user_between(user_id, date_from, date_to, before=None, limit=None):
+        """
+        Retrieve the scores of a user in a date range, newest first.
+
+        Args:
+            user_id (int): The ID of the user.
+            date_from (datetime): The earliest score date, inclusive.
+            date_to (datetime): The latest score date, exclusive.
+            before (tuple, optional): Only return scores ordered after this (date, id) position.
+            limit (int, optional): The maximum number of scores.
+
+        Returns:
+            list: A list of Score objects ordered by date and ID, descending.
+        """
+        query = Score.query.filter(Score.user_id == user_id, Score.date >= date_from, Score.date < date_to)
+        if before is not None:
+            before_date, before_id = before
+            query = query.filter(or_(Score.date < before_date, and_(Score.date == before_date, Score.id < before_id)))
+        query = query.order_by(Score.date.desc(), Score.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    @replica_reads
     def get_all_scores():
         """
         Retrieve all scores from the database.
@@ -69,6 +100,20 @@ class ScoreDAL:
         """
         return Score.query.all()
 
+    @staticmethod
+    def iter_score_values(batch_size=1000):
+        """
+        Stream the category, score and duration of every score.
+
+        Args:
+            batch_size (int): Number of rows fetched per round trip.
+
+        Returns:
+            Iterator: Rows of (category_id, score, duration).
+        """
+        return (db.session.query(Score.category_id, Score.score, Score.duration)
+                .execution_options(yield_per=batch_size))
+
     @staticmethod
     def update_score(score_id, user_id, data):
         """
@@ -90,7 +135,7 @@ class ScoreDAL:
             score.score = data.get('score', score.score)
             score.category_id = data.get('category_id', score.category_id)
             score.duration = data.get('duration', score.duration)
-            db.session.commit()
+            db.session.flush()
             return score
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -114,7 +159,7 @@ class ScoreDAL:
                 raise ValueError(f"Score with id {score_id} for user_id {user_id} not found.")
 
             db.session.delete(score)
-            db.session.commit()
+            db.session.flush()
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -126,7 +171,7 @@ class ScoreDAL:
         Commit the current transaction.
         """
         try:
-            db.session.commit()
+            commit_or_flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
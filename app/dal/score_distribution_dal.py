@@ -0,0 +1,80 @@
+"""
+Data Access Layer for managing persisted score distribution sketches.
+
+This module provides methods for loading and storing the per-category
+histogram sketches that back the score distribution endpoint.
+"""
+
+from app.models.scoreDistribution import ScoreDistribution, db
+from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+
+
+class ScoreDistributionDAL:
+    """
+    Class for accessing and manipulating ScoreDistribution data.
+    """
+    @staticmethod
+    def get_distribution(category_id, metric):
+        """
+        Retrieve the persisted sketch of a metric for a category.
+
+        Args:
+            category_id (int): The ID of the category.
+            metric (str): The sketched metric ('score' or 'duration').
+
+        Returns:
+            ScoreDistribution: The ScoreDistribution object, or None if nothing was recorded yet.
+        """
+        return ScoreDistribution.query.filter_by(category_id=category_id, metric=metric).first()
+
+    @staticmethod
+    def get_distribution_for_update(category_id, metric):
+        """
+        Retrieve the persisted sketch of a metric for a category, locking the row.
+
+        The row lock keeps concurrent flushes from different worker processes
+        from overwriting each other's merged counts.
+
+        Args:
+            category_id (int): The ID of the category.
+            metric (str): The sketched metric ('score' or 'duration').
+
+        Returns:
+            ScoreDistribution: The ScoreDistribution object, or None if nothing was recorded yet.
+        """
+        return (ScoreDistribution.query
+                .filter_by(category_id=category_id, metric=metric)
+                .with_for_update()
+                .first())
+
+    @staticmethod
+    def save_distribution(distribution):
+        """
+        Add or update a score distribution row.
+
+        Args:
+            distribution (ScoreDistribution): The ScoreDistribution object to save.
+        """
+        db.session.add(distribution)
+
+    @staticmethod
+    def delete_all_distributions():
+        """
+        Delete every persisted score distribution.
+        """
+        ScoreDistribution.query.delete()
+
+    @staticmethod
+    def commit_changes():
+        """
+        Commit the current database transaction.
+
+        Raises:
+            SQLAlchemyError: If there is an error during the database operation.
+        """
+        try:
+            commit_or_flush()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
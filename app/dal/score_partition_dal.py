@@ -0,0 +1,272 @@
+"""
+Data Access Layer for date-partitioned score storage.
+
+Scores are split into monthly periods. The `scores` table holds the hot
+periods: on PostgreSQL it is a native RANGE-partitioned table with one
+attached `scores_YYYY_MM` partition per month, on SQLite it is a plain table.
+Periods that leave the hot window become standalone `scores_YYYY_MM` tables
+(detached partitions on PostgreSQL, moved rows on SQLite) until they are
+archived and dropped.
+"""
+
+import re
+from datetime import datetime
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.score import Score, db
+from app.dal.unit_of_work import commit_or_flush
+
+
+PERIOD_TABLE_PATTERN = re.compile(r'^scores_(\d{4})_(\d{2})$')
+DEFAULT_PARTITION = 'scores_default'
+PERIOD_BOUNDS = (bindparam('start', type_=db.DateTime), bindparam('end', type_=db.DateTime))
+
+
+def period_start(moment):
+    """
+    Return the first instant of the month containing a moment.
+
+    Args:
+        moment (datetime): Any moment in the month.
+
+    Returns:
+        datetime: Midnight of the first day of that month.
+    """
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(start, months):
+    """
+    Shift the first day of a month by a number of months.
+
+    Args:
+        start (datetime): The first day of a month.
+        months (int): Number of months to add, may be negative.
+
+    Returns:
+        datetime: The first day of the resulting month.
+    """
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def period_table_name(start):
+    """
+    Return the name of the table holding the period starting at `start`.
+
+    Args:
+        start (datetime): The first day of the period.
+
+    Returns:
+        str: The period table name.
+    """
+    return f"scores_{start.year:04d}_{start.month:02d}"
+
+
+class ScorePartitionDAL:
+    """
+    Class for managing score partitions and period tables.
+    """
+    @staticmethod
+    def dialect_name():
+        """
+        Return the name of the database dialect in use.
+
+        Returns:
+            str: The dialect name, e.g. 'postgresql' or 'sqlite'.
+        """
+        return db.engine.dialect.name
+
+    @staticmethod
+    def is_natively_partitioned():
+        """
+        Check whether `scores` is a native partitioned table.
+
+        Returns:
+            bool: True on PostgreSQL once the partitioning migration has run.
+        """
+        if ScorePartitionDAL.dialect_name() != 'postgresql':
+            return False
+        row = db.session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = 'scores'"
+        )).first()
+        return row is not None
+
+    @staticmethod
+    def get_attached_periods():
+        """
+        Retrieve the monthly partitions currently attached to `scores`.
+
+        Returns:
+            list: The first day of every attached period, oldest first.
+        """
+        rows = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'scores'"
+        )).scalars()
+        return sorted(ScorePartitionDAL._parse_period(name) for name in rows if PERIOD_TABLE_PATTERN.match(name))
+
+    @staticmethod
+    def get_period_tables():
+        """
+        Retrieve the standalone period tables that left the hot window.
+
+        Returns:
+            list: The first day of every standalone period, oldest first.
+        """
+        attached = set()
+        if ScorePartitionDAL.is_natively_partitioned():
+            attached = {period_table_name(start) for start in ScorePartitionDAL.get_attached_periods()}
+        names = inspect(db.session.connection()).get_table_names()
+        return sorted(ScorePartitionDAL._parse_period(name) for name in names
+                      if PERIOD_TABLE_PATTERN.match(name) and name not in attached)
+
+    @staticmethod
+    def get_hot_periods_before(cutoff):
+        """
+        Retrieve the periods still held by `scores` that start before a cutoff.
+
+        Args:
+            cutoff (datetime): The first day of the oldest hot period.
+
+        Returns:
+            list: The first day of every such period, oldest first.
+        """
+        if ScorePartitionDAL.is_natively_partitioned():
+            return [start for start in ScorePartitionDAL.get_attached_periods() if start < cutoff]
+
+        periods = []
+        oldest = db.session.query(db.func.min(Score.date)).filter(Score.date < cutoff).scalar()
+        while oldest is not None:
+            start = period_start(oldest)
+            periods.append(start)
+            oldest = (db.session.query(db.func.min(Score.date))
+                      .filter(Score.date >= add_months(start, 1), Score.date < cutoff)
+                      .scalar())
+        return periods
+
+    @staticmethod
+    def ensure_partition(start):
+        """
+        Create and attach the PostgreSQL partition for a period if missing.
+
+        Rows of that period that landed in the default partition are moved
+        into the new partition before it is attached.
+
+        Args:
+            start (datetime): The first day of the period.
+
+        Returns:
+            bool: True if a partition was created.
+        """
+        name = period_table_name(start)
+        if db.session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is not None:
+            return False
+
+        end = add_months(start, 1)
+        bounds = {'start': start, 'end': end}
+        db.session.execute(text(f"CREATE TABLE {name} (LIKE scores INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.session.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ).bindparams(*PERIOD_BOUNDS), bounds)
+        db.session.execute(text(
+            f"ALTER TABLE scores ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        return True
+
+    @staticmethod
+    def detach_period(start):
+        """
+        Take a period out of the hot `scores` table into its own table.
+
+        On PostgreSQL the partition is detached. On SQLite the rows of the
+        period are copied into a new period table and deleted from `scores`.
+
+        Args:
+            start (datetime): The first day of the period.
+
+        Returns:
+            int: The number of rows moved, or -1 when a partition was detached.
+        """
+        name = period_table_name(start)
+        if ScorePartitionDAL.is_natively_partitioned():
+            db.session.execute(text(f"ALTER TABLE scores DETACH PARTITION {name}"))
+            return -1
+
+        bounds = {'start': start, 'end': add_months(start, 1)}
+        db.session.execute(text(f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM scores WHERE 0"))
+        db.session.execute(text(
+            f"INSERT INTO {name} SELECT * FROM scores WHERE date >= :start AND date < :end"
+        ).bindparams(*PERIOD_BOUNDS), bounds)
+        result = db.session.execute(text(
+            "DELETE FROM scores WHERE date >= :start AND date < :end"
+        ).bindparams(*PERIOD_BOUNDS), bounds)
+        return result.rowcount
+
+    @staticmethod
+    def iter_period_rows(start, user_id=None, date_from=None, date_to=None, batch_size=1000):
+        """
+        Stream the rows of a standalone period table.
+
+        Args:
+            start (datetime): The first day of the period.
+            user_id (int, optional): Only return scores of this user.
+            date_from (datetime, optional): Only return scores from this date, inclusive.
+            date_to (datetime, optional): Only return scores before this date.
+            batch_size (int): Number of rows fetched per round trip.
+
+        Returns:
+            Iterator: Row mappings with the score columns.
+        """
+        query = f"SELECT id, user_id, score, date, category_id, duration FROM {period_table_name(start)}"
+        conditions = []
+        params = {}
+        date_params = []
+        if user_id is not None:
+            conditions.append("user_id = :user_id")
+            params['user_id'] = user_id
+        for name, operator, value in (('date_from', '>=', date_from), ('date_to', '<', date_to)):
+            if value is not None:
+                conditions.append(f"date {operator} :{name}")
+                params[name] = value
+                date_params.append(bindparam(name, type_=db.DateTime))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        statement = text(query).bindparams(*date_params).columns(date=db.DateTime)
+        statement = statement.execution_options(yield_per=batch_size)
+        result = db.session.execute(statement, params)
+        return result.mappings()
+
+    @staticmethod
+    def drop_period_table(start):
+        """
+        Drop a standalone period table.
+
+        Args:
+            start (datetime): The first day of the period.
+        """
+        db.session.execute(text(f"DROP TABLE {period_table_name(start)}"))
+
+    @staticmethod
+    def commit_changes():
+        """
+        Commit the current database transaction.
+
+        Raises:
+            SQLAlchemyError: If there is an error during the database operation.
+        """
+        try:
+            commit_or_flush()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def _parse_period(name):
+        match = PERIOD_TABLE_PATTERN.match(name)
+        return datetime(int(match.group(1)), int(match.group(2)), 1)
@@ -0,0 +1,67 @@
+"""
+Unit of work for multi-step service operations.
+
+A service opens one unit of work around an operation that touches several
+DAL methods. Inside it, DAL methods only stage and flush their changes and
+`commit_changes` flushes instead of committing; the single commit, or the
+single rollback, happens when the unit of work exits. Units of work nest:
+an inner one joins the outermost transaction.
+"""
+
+from contextlib import contextmanager
+from app import db
+from app.dal.routing_session import stick_to_primary
+
+
+_DEPTH_KEY = 'unit_of_work_depth'
+
+
+def in_unit_of_work():
+    """
+    Check whether the current session is inside a unit of work.
+
+    Returns:
+        bool: True if a unit of work is open.
+    """
+    return db.session.info.get(_DEPTH_KEY, 0) > 0
+
+
+def commit_or_flush():
+    """
+    Commit the current transaction, or only flush it inside a unit of work.
+
+    DAL `commit_changes` methods call this so that services can batch
+    several DAL calls into one transaction.
+    """
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Run a block of DAL calls as one transaction.
+
+    The transaction is committed when the outermost block exits normally
+    and rolled back if it raises.
+
+    Yields:
+        Session: The database session.
+    """
+    info = db.session.info
+    depth = info.get(_DEPTH_KEY, 0)
+    info[_DEPTH_KEY] = depth + 1
+    # Reads inside a transaction that writes must see the primary's state.
+    stick_to_primary(db.session)
+    try:
+        yield db.session
+        if depth == 0:
+            db.session.commit()
+    except Exception:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        info[_DEPTH_KEY] = depth
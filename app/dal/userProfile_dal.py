@@ -7,7 +7,10 @@ and updates of user profiles.
 """
 
 from app.models.userProfile import UserProfile, db
+from sqlalchemy import bindparam, text
 from sqlalchemy.exc import SQLAlchemyError
+from app.dal.unit_of_work import commit_or_flush
+from app.dal.routing_session import replica_reads
 
 
 class UserProfileDAL:
@@ -15,6 +18,7 @@ class UserProfileDAL:
     Class for accessing and manipulating UserProfile data.
     """
     @staticmethod
+    @replica_reads
     def get_all_profiles():
         """
         Retrieve all user profiles from the database.
@@ -28,6 +32,45 @@ class UserProfileDAL:
             raise e
 
     @staticmethod
+    @replica_reads
+    def get_profiles_page(after_id=None, limit=50, role_id=None, created_from=None, created_to=None,
+                          level_min=None, level_max=None):
+        """
+        Retrieve one keyset page of user profiles, ordered by profile ID.
+
+        Args:
+            after_id (int, optional): Only return profiles with a greater ID.
+            limit (int): The maximum number of profiles to return.
+            role_id (int, optional): Only return profiles of users with this role.
+            created_from (datetime, optional): Only return users created at or after this time.
+            created_to (datetime, optional): Only return users created before this time.
+            level_min (int, optional): Only return profiles with at least this level.
+            level_max (int, optional): Only return profiles with at most this level.
+
+        Returns:
+            list: Up to `limit` UserProfile objects.
+        """
+        from app.models.user import User
+
+        query = UserProfile.query
+        if after_id is not None:
+            query = query.filter(UserProfile.id > after_id)
+        if level_min is not None:
+            query = query.filter(UserProfile.level >= level_min)
+        if level_max is not None:
+            query = query.filter(UserProfile.level <= level_max)
+        if role_id is not None or created_from is not None or created_to is not None:
+            query = query.join(User, User.id == UserProfile.user_id)
+            if role_id is not None:
+                query = query.filter(User.role_id == role_id)
+            if created_from is not None:
+                query = query.filter(User.created_at >= created_from)
+            if created_to is not None:
+                query = query.filter(User.created_at < created_to)
+        return query.order_by(UserProfile.id).limit(limit).all()
+
+    @staticmethod
+    @replica_reads
     def get_profile_by_user_id(user_id):
         """
         Retrieve a user profile by user ID.
@@ -44,15 +87,16 @@ class UserProfileDAL:
             raise e
 
     @staticmethod
-    def update_user_profile(user_profile, profile_picture=None, level=None, experience_points=None):
+    def update_user_profile(user_profile, profile_picture=None):
         """
         Update user profile attributes.
 
+        Level and experience points are not updated here; they only grow
+        through `add_experience_points` and `raise_levels`.
+
         Args:
             user_profile (UserProfile): The UserProfile object to update.
             profile_picture (str, optional): The new profile picture filename.
-            level (int, optional): The new user level.
-            experience_points (int, optional): The new experience points.
 
         Raises:
             SQLAlchemyError: If there is an error during the database operation.
@@ -60,15 +104,80 @@ class UserProfileDAL:
         try:
             if profile_picture is not None:
                 user_profile.profile_picture = profile_picture
-            if level is not None:
-                user_profile.level = level
-            if experience_points is not None:
-                user_profile.experience_points = experience_points
             db.session.flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
 
+    @staticmethod
+    def _values_table(name, columns, rows):
+        """
+        Build a `WITH name(columns) AS (VALUES ...)` clause of integer rows.
+
+        Returns:
+            tuple: The clause and its bind parameters.
+        """
+        cast = db.engine.dialect.name == 'postgresql'
+        values = []
+        params = []
+        for index, row in enumerate(rows):
+            placeholders = []
+            for column, value in zip(columns, row):
+                param = f'{column}_{index}'
+                placeholders.append(f"CAST(:{param} AS INTEGER)" if cast else f":{param}")
+                params.append(bindparam(param, value, type_=db.Integer))
+            values.append(f"({', '.join(placeholders)})")
+        return f"WITH {name}({', '.join(columns)}) AS (VALUES {', '.join(values)}) ", params
+
+    @staticmethod
+    def add_experience_points(awards):
+        """
+        Add experience points to many profiles in one atomic statement.
+
+        Runs `UPDATE user_profiles SET experience_points = experience_points + v.points`,
+        so concurrent awards never overwrite each other.
+
+        Args:
+            awards (dict): Points to add keyed by user ID.
+
+        Returns:
+            list: (user_id, experience_points, level) rows after the update.
+        """
+        if not awards:
+            return []
+
+        with_clause, params = UserProfileDAL._values_table('v', ('user_id', 'points'), awards.items())
+        statement = text(
+            with_clause +
+            "UPDATE user_profiles SET experience_points = COALESCE(user_profiles.experience_points, 0) + v.points "
+            "FROM v WHERE user_profiles.user_id = v.user_id "
+            "RETURNING user_profiles.user_id, user_profiles.experience_points, user_profiles.level"
+        ).bindparams(*params)
+        return [tuple(row) for row in db.session.execute(statement)]
+
+    @staticmethod
+    def raise_levels(levels):
+        """
+        Raise the levels of many profiles in one statement; levels never go down.
+
+        Args:
+            levels (dict): New levels keyed by user ID.
+
+        Returns:
+            int: The number of profiles updated.
+        """
+        if not levels:
+            return 0
+
+        with_clause, params = UserProfileDAL._values_table('v', ('user_id', 'level'), levels.items())
+        statement = text(
+            with_clause +
+            "UPDATE user_profiles SET level = v.level FROM v "
+            "WHERE user_profiles.user_id = v.user_id "
+            "AND (user_profiles.level IS NULL OR user_profiles.level < v.level)"
+        ).bindparams(*params)
+        return db.session.execute(statement).rowcount
+
     @staticmethod
     def commit_changes():
         """
@@ -78,7 +187,7 @@ class UserProfileDAL:
             SQLAlchemyError: If there is an error during the database operation.
         """
         try:
-            db.session.commit()
+            commit_or_flush()
         except SQLAlchemyError as e:
             db.session.rollback()
             raise e
@@ -6,8 +6,12 @@ actions, abstracting away the complexities of database operations
 from the business logic in the service layer.
 """
 
+from sqlalchemy import bindparam, insert, or_, text
+from sqlalchemy.orm import joinedload
 from app.models.user import User, db
 from app.models.role import Role
+from app.dal.unit_of_work import commit_or_flush
+from app.dal.routing_session import replica_reads
 
 
 class UserDAL:
@@ -43,6 +47,7 @@ class UserDAL:
         return User.query.filter((User.email == email) | (User.username == username)).first()
 
     @staticmethod
+    @replica_reads
     def get_role_by_name(role_name):
         """
         Retrieve a role by its name.
@@ -99,6 +104,7 @@ class UserDAL:
         db.session.delete(user)
 
     @staticmethod
+    @replica_reads
     def get_user_by_id(user_id):
         """
         Retrieve a user by their ID.
@@ -112,6 +118,7 @@ class UserDAL:
         return User.query.get(user_id)
 
     @staticmethod
+    @replica_reads
     def get_user_by_username(username):
         """
         Retrieve a user by their username.
@@ -125,6 +132,136 @@ class UserDAL:
         return User.query.filter_by(username=username).first()
 
     @staticmethod
+    def get_user_with_claims_by_username(username):
+        """
+        Retrieve a user and their claims by username in a single joined query.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            User: The User object with its claims loaded, or None if not found.
+        """
+        return User.query.options(joinedload(User.claims)).filter_by(username=username).first()
+
+    @staticmethod
+    def set_last_logins(last_logins):
+        """
+        Update the last login timestamps of many users in one statement.
+
+        Runs `WITH v(id, ts) AS (VALUES ...) UPDATE users ... FROM v`; a
+        timestamp never moves an existing last login backwards.
+
+        Args:
+            last_logins (dict): Login timestamps keyed by user ID.
+
+        Returns:
+            int: The number of users updated.
+        """
+        if not last_logins:
+            return 0
+
+        cast = db.engine.dialect.name == 'postgresql'
+        values = []
+        params = []
+        for index, (user_id, last_login) in enumerate(last_logins.items()):
+            id_param, ts_param = f'id_{index}', f'ts_{index}'
+            if cast:
+                values.append(f"(CAST(:{id_param} AS INTEGER), CAST(:{ts_param} AS TIMESTAMP))")
+            else:
+                values.append(f"(:{id_param}, :{ts_param})")
+            params.append(bindparam(id_param, user_id, type_=db.Integer))
+            params.append(bindparam(ts_param, last_login, type_=db.DateTime))
+
+        statement = text(
+            f"WITH v(id, ts) AS (VALUES {', '.join(values)}) "
+            "UPDATE users SET last_login = v.ts FROM v "
+            "WHERE users.id = v.id AND (users.last_login IS NULL OR users.last_login < v.ts)"
+        ).bindparams(*params)
+        return db.session.execute(statement).rowcount
+
+    @staticmethod
+    def get_taken_usernames_and_emails(usernames, emails):
+        """
+        Find which of the given usernames and emails are already in use.
+
+        Args:
+            usernames (list): Candidate usernames.
+            emails (list): Candidate email addresses.
+
+        Returns:
+            tuple: The set of taken usernames and the set of taken emails.
+        """
+        rows = (db.session.query(User.username, User.email)
+                .filter(or_(User.username.in_(usernames), User.email.in_(emails)))
+                .all())
+        return {row.username for row in rows}, {row.email for row in rows}
+
+    @staticmethod
+    def bulk_insert_users(rows):
+        """
+        Insert many users with multi-row INSERT statements.
+
+        Args:
+            rows (list): Dictionaries of User column values.
+
+        Returns:
+            dict: The new user IDs keyed by username.
+        """
+        result = db.session.execute(insert(User).returning(User.id, User.username), rows)
+        return {row.username: row.id for row in result}
+
+    @staticmethod
+    def bulk_insert_profiles(rows):
+        """
+        Insert many user profiles with multi-row INSERT statements.
+
+        Args:
+            rows (list): Dictionaries of UserProfile column values.
+        """
+        from app.models.userProfile import UserProfile
+        db.session.execute(insert(UserProfile), rows)
+
+    @staticmethod
+    @replica_reads
+    def get_users_page(after_id=None, limit=50, role_id=None, created_from=None, created_to=None,
+                       level_min=None, level_max=None):
+        """
+        Retrieve one keyset page of users, ordered by ID, with their roles joined.
+
+        Args:
+            after_id (int, optional): Only return users with a greater ID.
+            limit (int): The maximum number of users to return.
+            role_id (int, optional): Only return users with this role.
+            created_from (datetime, optional): Only return users created at or after this time.
+            created_to (datetime, optional): Only return users created before this time.
+            level_min (int, optional): Only return users with at least this level.
+            level_max (int, optional): Only return users with at most this level.
+
+        Returns:
+            list: Up to `limit` User objects.
+        """
+        from app.models.userProfile import UserProfile
+
+        query = User.query.options(joinedload(User.role))
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+        if role_id is not None:
+            query = query.filter(User.role_id == role_id)
+        if created_from is not None:
+            query = query.filter(User.created_at >= created_from)
+        if created_to is not None:
+            query = query.filter(User.created_at < created_to)
+        if level_min is not None or level_max is not None:
+            query = query.join(UserProfile, UserProfile.user_id == User.id)
+            if level_min is not None:
+                query = query.filter(UserProfile.level >= level_min)
+            if level_max is not None:
+                query = query.filter(UserProfile.level <= level_max)
+        return query.order_by(User.id).limit(limit).all()
+
+    @staticmethod
+    @replica_reads
     def get_all_users():
         """
         Retrieve all users.
@@ -142,4 +279,4 @@ class UserDAL:
         Raises:
             SQLAlchemyError: If there is an error during the database operation.
         """
-        db.session.commit()
+        commit_or_flush()
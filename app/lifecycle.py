@@ -0,0 +1,60 @@
+"""
+Worker process lifecycle hooks for multi-process servers.
+
+The production server (see `gunicorn.conf.py`) loads the application once
+in its master process and forks the workers from it. `after_fork` runs in
+every new worker and replaces the process state a fork does not carry
+over; `shutdown_app` runs when a worker stops or is recycled and writes
+everything still buffered in memory before the process exits.
+"""
+
+from app import db
+from app.logging_config import logger, restart_logging, stop_logging
+
+
+def after_fork(app):
+    """
+    Prepare a freshly forked worker process.
+
+    Starts the worker's own log listener and drops the database connections
+    inherited from the master without closing them, so the master's
+    connections are not disturbed.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    restart_logging()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def shutdown_app(app):
+    """
+    Flush buffered writes and stop the background workers of this process.
+
+    Safe to call more than once; the exit handlers registered by the
+    individual services run afterwards and find nothing left to do.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    from app.middleware.query_instrumentation import flush_query_stats
+    from app.services.last_seen_service import last_seen
+    from app.services.media_service import shutdown_thumbnail_worker
+    from app.services.password_service import shutdown_password_pool
+    from app.services.score_distribution_service import distribution_registry
+    from app.services.token_service import revocation_list
+    from app.services.xp_service import xp_awards
+
+    revocation_list.stop()
+    shutdown_thumbnail_worker()
+    for buffer in (last_seen, xp_awards, distribution_registry):
+        buffer.flush_on_exit()
+    flush_query_stats()
+    shutdown_password_pool()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    logger.info("Worker shut down.")
+    stop_logging()
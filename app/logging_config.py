@@ -4,40 +4,288 @@ Configuration for application logging.
 This module sets up the logging configuration to output logs
 to both console and file with specific formatting and rotation
 policies.
+
+Log calls never write to a file or the console themselves: the logger's
+only handler is a `QueueHandler`, and a `QueueListener` thread passes the
+records on to the console and file handlers. The log file is rotated when
+it reaches LOG_MAX_BYTES or is older than LOG_ROTATE_SECONDS, whichever
+comes first, and rotated files are gzip-compressed by the listener thread.
+The level follows LOG_LEVEL, or APP_ENV when it is not set.
+
+With LOG_FORMAT=json every record is one JSON object carrying the request
+ID, method, route template and user ID of the request it was logged in;
+the per-request summary record adds the status and duration. Records on hot
+paths are logged through `log_sampled`, which keeps only the share set for
+their sample name in LOG_SAMPLE_RATES. Forked worker processes call
+`restart_logging` to start their own listener.
 """
 
+import atexit
+import glob
+import gzip
+import json
 import logging
-from flask import has_request_context, request
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+import shutil
+import time
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+from app.config import Config
 
 
 logger = logging.getLogger('TriviaVsAILogger')
-logger.setLevel(logging.DEBUG)
+logger.setLevel(Config.LOG_LEVEL)
+
+
+_sample_rates = {}
+
+REQUEST_FIELDS = ('request_id', 'method', 'route', 'status', 'duration_ms', 'user_id', 'sampled')
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Add the URL, request ID, method, route and user ID of the current request to log records.
+
+    Runs in the thread that logs, where the request context is available.
+    The request attributes are collected once per request.
+    """
+    def filter(self, record):
+        if not has_request_context():
+            record.url = None
+            return True
+
+        context = g.get('_log_context')
+        if context is None:
+            context = {
+                'url': request.url,
+                'method': request.method,
+                'route': request.url_rule.rule if request.url_rule is not None else None,
+                'request_id': g.get('request_id'),
+            }
+            g._log_context = context
+        record.__dict__.update(context)
+        claims = g.get('_auth_claims')
+        record.user_id = claims.get('user_id') if claims else None
+        return True
 
 
 class NewFormatter(logging.Formatter):
     """
     Custom logging formatter for the Trivia Vs AI application.
 
-    This formatter adds the URL of the request to the log record if the request context is available.
+    This formatter shows the URL of the request the record was logged in, if any.
     """
     def format(self, record):
         record.name = 'Trivia Vs AI'
-        if has_request_context():
-            record.url = request.url
-        else:
+        if not hasattr(record, 'url'):
             record.url = None
-        record.levelname = record.levelname
         return super().format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """
+    Logging formatter writing each record as one line of JSON.
+    """
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': 'Trivia Vs AI',
+            'message': record.getMessage(),
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    Queue handler for a listener in the same process.
+
+    Records are not pickled, so only the message arguments are merged here;
+    formatting, including tracebacks, is left to the listener thread.
+    """
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class CompressingRotatingFileHandler(BaseRotatingHandler):
+    """
+    File handler that rotates on size or age and gzips rotated files.
+
+    Rotated files are named `<filename>.<YYYYmmdd-HHMMSS>.gz`; only the
+    newest `backup_count` are kept.
+    """
+
+    def __init__(self, filename, max_bytes, rotate_seconds, backup_count, encoding='utf-8'):
+        super().__init__(filename, 'a', encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.rollover_at = self._next_rollover(time.time())
+
+    def _next_rollover(self, now):
+        return now + self.rotate_seconds if self.rotate_seconds else None
+
+    def _rotated_elsewhere(self):
+        # Worker processes share the file; the first one past the limit rotates it.
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def shouldRollover(self, record):
+        if self.stream is not None and self._rotated_elsewhere():
+            self.stream.close()
+            self.stream = self._open()
+            self.rollover_at = self._next_rollover(time.time())
+            return False
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            target = f"{self.baseFilename}.{stamp}.gz"
+            counter = 1
+            while os.path.exists(target):
+                target = f"{self.baseFilename}.{stamp}-{counter}.gz"
+                counter += 1
+            with open(self.baseFilename, 'rb') as source, gzip.open(target, 'wb') as compressed:
+                shutil.copyfileobj(source, compressed)
+            os.remove(self.baseFilename)
+            self._delete_old_backups()
+
+        self.rollover_at = self._next_rollover(time.time())
+        self.stream = self._open()
+
+    def _delete_old_backups(self):
+        if self.backup_count <= 0:
+            return
+        backups = sorted(glob.glob(glob.escape(self.baseFilename) + '.*.gz'), key=os.path.getmtime)
+        for path in backups[:-self.backup_count]:
+            os.remove(path)
+
+
 logFormatter = NewFormatter("%(asctime)s - %(url)s - %(levelname)s - %(name)s >>> %(message)s",
                             datefmt="%Y-%m-%d %H:%M:%S")
+jsonFormatter = JsonFormatter()
 
 consoleHandler = logging.StreamHandler()
-consoleHandler.setFormatter(logFormatter)
-logger.addHandler(consoleHandler)
+consoleHandler.setFormatter(jsonFormatter if Config.LOG_FORMAT == 'json' else logFormatter)
+
+fileHandler = CompressingRotatingFileHandler(Config.LOG_FILE, max_bytes=Config.LOG_MAX_BYTES,
+                                             rotate_seconds=Config.LOG_ROTATE_SECONDS,
+                                             backup_count=Config.LOG_BACKUP_COUNT)
+fileHandler.setFormatter(jsonFormatter if Config.LOG_FORMAT == 'json' else logFormatter)
+
+logQueue = queue.SimpleQueue()
+queueHandler = LocalQueueHandler(logQueue)
+queueHandler.addFilter(RequestContextFilter())
+logger.addHandler(queueHandler)
+
+queueListener = QueueListener(logQueue, consoleHandler, fileHandler, respect_handler_level=True)
+queueListener.start()
+
+
+def stop_logging():
+    """
+    Write the queued records and stop the listener thread.
+    """
+    if queueListener._thread is not None:
+        queueListener.stop()
+
+
+atexit.register(stop_logging)
+
+
+def restart_logging():
+    """
+    Give a forked worker process its own log queue and listener thread.
+
+    The listener thread of the parent does not exist in the child, and
+    records the parent had queued are written by the parent, so the child
+    starts with an empty queue and reopens the log file.
+    """
+    global logQueue
+    logQueue = queue.SimpleQueue()
+    queueHandler.queue = logQueue
+    queueListener.queue = logQueue
+    queueListener._thread = None
+    if fileHandler.stream is not None:
+        fileHandler.stream.close()
+        fileHandler.stream = None
+    queueListener.start()
 
-fileHandler = RotatingFileHandler("logs.log", backupCount=100, maxBytes=100000)
-fileHandler.setFormatter(logFormatter)
-logger.addHandler(fileHandler)
+
+def parse_sample_rates(spec):
+    """
+    Parse a sample rate setting.
+
+    Args:
+        spec (str): Comma-separated "<name>=<rate>" pairs, e.g. "ai_parse=0.01,auth_denied=0.1".
+
+    Returns:
+        dict: The rates between 0 and 1, keyed by sample name.
+    """
+    rates = {}
+    for pair in (spec or '').split(','):
+        if '=' in pair:
+            name, rate = pair.split('=', 1)
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def log_sampled(name, level, msg, *args):
+    """
+    Log a hot-path record, keeping only the share set for its sample name.
+
+    The message is only formatted for kept records, so pass its values as
+    `%`-style arguments. Names without a rate are always logged.
+
+    Args:
+        name (str): The sample name, e.g. 'ai_parse'.
+        level (int): The logging level.
+        msg (str): The message format string.
+        *args: The message arguments.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = _sample_rates.get(name, 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, msg, *args, extra={'sampled': name})
+
+
+def configure_logging(app):
+    """
+    Apply the logging settings of an application.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    logger.setLevel(app.config.get('LOG_LEVEL', Config.LOG_LEVEL))
+    formatter = jsonFormatter if app.config.get('LOG_FORMAT', Config.LOG_FORMAT) == 'json' else logFormatter
+    consoleHandler.setFormatter(formatter)
+    fileHandler.setFormatter(formatter)
+    _sample_rates.clear()
+    _sample_rates.update(parse_sample_rates(app.config.get('LOG_SAMPLE_RATES', Config.LOG_SAMPLE_RATES)))
@@ -0,0 +1,59 @@
+"""
+Names of stored profile pictures and their thumbnails.
+
+Uploaded pictures are stored as `<sha256>.<ext>` and their thumbnails as
+`<sha256>_<size>.<format>`. These helpers only compute names, so models and
+middleware can use them without importing the service layer.
+"""
+
+import re
+
+
+THUMBNAIL_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+CONTENT_NAME_PATTERN = re.compile(r'^([0-9a-f]{64})(?:_(\d+))?\.([a-z0-9]+)$')
+
+
+def is_content_addressed(filename):
+    """
+    Check whether a stored file name is derived from the file's content.
+
+    Args:
+        filename (str): The stored file name.
+
+    Returns:
+        bool: True for `<sha256>.<ext>` originals and their thumbnails.
+    """
+    return CONTENT_NAME_PATTERN.match(filename or '') is not None
+
+
+def thumbnail_name(filename, size, fmt='webp'):
+    """
+    Return the name of a thumbnail of a stored original.
+
+    Args:
+        filename (str): The stored original, `<sha256>.<ext>`.
+        size (int): The thumbnail edge length in pixels.
+        fmt (str): 'webp' or 'jpg'.
+
+    Returns:
+        str: The thumbnail file name.
+    """
+    digest = filename.rsplit('.', 1)[0]
+    return f"{digest}_{size}.{fmt}"
+
+
+def thumbnail_names(filename, sizes):
+    """
+    Return the thumbnail names of a stored original for every size.
+
+    Args:
+        filename (str): The stored file name.
+        sizes (iterable): The thumbnail edge lengths.
+
+    Returns:
+        dict: Mapping of size to {'webp': name, 'jpg': name}; empty for
+        names that are not content-addressed (e.g. 'default.jpg').
+    """
+    if not is_content_addressed(filename):
+        return {}
+    return {size: {fmt: thumbnail_name(filename, size, fmt) for fmt in THUMBNAIL_FORMATS} for size in sizes}
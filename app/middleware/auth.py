@@ -0,0 +1,147 @@
+"""
+Single-pass request authentication and declarative route policies.
+
+The JWT of a request is verified and decoded once; the decoded claims are
+cached on `flask.g` and every policy check of the request reads them from
+there. Routes declare the access policy they need with `auth_required`
+instead of stacking several decorators that each verify the token again.
+"""
+
+import logging
+from functools import wraps
+from flask import g, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from app.logging_config import log_sampled
+
+
+AUTHENTICATED = 'authenticated'
+ADMIN = 'admin'
+SELF = 'self'
+ADMIN_OR_SELF = 'admin_or_self'
+
+ADMIN_ROLE = 'Admin'
+
+_DENIED_MESSAGES = {
+    ADMIN: 'Permission denied. Admins only!',
+    SELF: 'Permission denied. You are unauthorized to access!',
+    ADMIN_OR_SELF: 'Permission denied. You can only update your own information or you must be an admin.',
+}
+
+
+def get_request_claims(refresh=False):
+    """
+    Return the decoded JWT claims of the current request.
+
+    The token is verified on the first call of a request only; later calls
+    return the cached claims.
+
+    Args:
+        refresh (bool): Require a refresh token instead of an access token.
+
+    Returns:
+        dict: The decoded JWT claims.
+
+    Raises:
+        NoAuthorizationError: If the request carries no token. Token errors
+        propagate to the JWTManager error handlers.
+    """
+    if '_auth_claims' not in g:
+        verify_jwt_in_request(refresh=refresh)
+        g._auth_claims = get_jwt()
+    return g._auth_claims
+
+
+def get_request_user_id():
+    """
+    Return the user ID of the authenticated request, if it was authenticated.
+
+    This never verifies a token; it only reads claims cached by an earlier check.
+
+    Returns:
+        str: The `user_id` claim, or None.
+    """
+    claims = g.get('_auth_claims')
+    return claims.get('user_id') if claims else None
+
+
+def is_admin_claims(claims):
+    """
+    Check whether decoded claims belong to an admin.
+
+    Args:
+        claims (dict): The decoded JWT claims.
+
+    Returns:
+        bool: True if the role claim is the admin role.
+    """
+    return claims.get('role') == ADMIN_ROLE
+
+
+def is_self_claims(claims, user_id_arg='user_id'):
+    """
+    Check whether decoded claims belong to the user addressed by the route.
+
+    Args:
+        claims (dict): The decoded JWT claims.
+        user_id_arg (str): Name of the URL argument holding the user ID.
+
+    Returns:
+        bool: True if the `user_id` claim matches the URL argument.
+    """
+    requested = (request.view_args or {}).get(user_id_arg)
+    return requested is not None and claims.get('user_id') == str(requested)
+
+
+def evaluate_policy(policy, claims, user_id_arg='user_id'):
+    """
+    Evaluate an access policy against decoded claims.
+
+    Args:
+        policy (str): One of AUTHENTICATED, ADMIN, SELF or ADMIN_OR_SELF.
+        claims (dict): The decoded JWT claims.
+        user_id_arg (str): Name of the URL argument holding the user ID.
+
+    Returns:
+        bool: True if access is granted.
+    """
+    if policy == AUTHENTICATED:
+        return True
+    if policy == ADMIN:
+        return is_admin_claims(claims)
+    if policy == SELF:
+        return is_self_claims(claims, user_id_arg)
+    if policy == ADMIN_OR_SELF:
+        return is_admin_claims(claims) or is_self_claims(claims, user_id_arg)
+    raise ValueError(f"Unknown auth policy: {policy}")
+
+
+def auth_required(policy=AUTHENTICATED, user_id_arg='user_id', refresh=False):
+    """
+    Decorator to require an authenticated request satisfying an access policy.
+
+    Args:
+        policy (str): One of AUTHENTICATED, ADMIN, SELF or ADMIN_OR_SELF.
+        user_id_arg (str): Name of the URL argument compared by the SELF policies.
+        refresh (bool): Require a refresh token instead of an access token.
+
+    Returns:
+        Response: JSON response with an error message if access is denied.
+    """
+    if policy not in (AUTHENTICATED, ADMIN, SELF, ADMIN_OR_SELF):
+        raise ValueError(f"Unknown auth policy: {policy}")
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            claims = get_request_claims(refresh=refresh)
+            if evaluate_policy(policy, claims, user_id_arg):
+                return fn(*args, **kwargs)
+
+            msg = _DENIED_MESSAGES[policy]
+            log_sampled('auth_denied', logging.ERROR, msg)
+            return jsonify(msg=msg), 403
+
+        decorator.auth_policy = policy
+        return decorator
+
+    return wrapper
@@ -0,0 +1,171 @@
+"""
+Negotiated response compression.
+
+Responses of a compressible type (JSON, text, JavaScript, XML, SVG) are
+compressed with the first encoding of COMPRESSION_ALGORITHMS that the client
+accepts with the highest quality in `Accept-Encoding`. Brotli (`br`) is
+only offered when the `brotli` package is installed. Buffered responses
+smaller than COMPRESSION_MIN_BYTES are sent as they are. Streamed responses,
+such as files served with `send_file`, are compressed chunk by chunk and
+each chunk is flushed, so the client receives it without waiting for the
+end of the body. Images and other already compressed types, partial and
+empty responses, and responses that already have a Content-Encoding are
+left alone.
+
+The bytes before compression, the bytes saved and the CPU time spent
+compressing are counted per route and encoding in the metrics.
+"""
+
+import time
+import zlib
+from flask import request
+from app.services.metrics_service import COMPRESSION_INPUT, COMPRESSION_SAVED, COMPRESSION_SECONDS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = frozenset((
+    'application/json', 'application/javascript', 'application/xml', 'application/problem+json',
+    'image/svg+xml',
+))
+
+
+class _GzipCompressor:
+    def __init__(self, app):
+        # wbits 31 writes the gzip header and trailer.
+        self._compressor = zlib.compressobj(app.config.get('COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, app):
+        self._compressor = brotli.Compressor(quality=app.config.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+_COMPRESSORS = {'gzip': _GzipCompressor}
+if brotli is not None:
+    _COMPRESSORS['br'] = _BrotliCompressor
+
+
+def _is_compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+        return False
+    if response.cache_control.no_transform:
+        return False
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def _record(route, encoding, size, compressed_size, seconds):
+    COMPRESSION_INPUT.inc(route, encoding, amount=size)
+    COMPRESSION_SAVED.inc(route, encoding, amount=size - compressed_size)
+    COMPRESSION_SECONDS.inc(route, encoding, amount=seconds)
+
+
+def _compress_stream(chunks, compressor, route, encoding):
+    size = compressed_size = 0
+    seconds = 0.0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            started = time.thread_time()
+            data = compressor.compress(chunk) + compressor.flush()
+            seconds += time.thread_time() - started
+            size += len(chunk)
+            compressed_size += len(data)
+            yield data
+        started = time.thread_time()
+        data = compressor.finish()
+        seconds += time.thread_time() - started
+        compressed_size += len(data)
+        yield data
+    finally:
+        _record(route, encoding, size, compressed_size, seconds)
+
+
+def compress_response(app, response):
+    """
+    Compress a response for the encodings accepted by the current request.
+
+    Args:
+        app (Flask): The Flask application.
+        response (Response): The response.
+
+    Returns:
+        Response: The same response, compressed if that was negotiated.
+    """
+    if request.method == 'HEAD' or not _is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    offered = [encoding for encoding in app.config['COMPRESSION_ALGORITHMS'] if encoding in _COMPRESSORS]
+    encoding = request.accept_encodings.best_match(offered)
+    if encoding is None:
+        return response
+
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    compressor = _COMPRESSORS[encoding](app)
+    if response.is_streamed:
+        source = response.response
+        response.response = _compress_stream(response.iter_encoded(), compressor, route, encoding)
+        if hasattr(source, 'close'):
+            response.call_on_close(source.close)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config.get('COMPRESSION_MIN_BYTES', 1024):
+            return response
+        started = time.thread_time()
+        compressed = compressor.compress(data) + compressor.finish()
+        seconds = time.thread_time() - started
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        _record(route, encoding, len(data), len(compressed), seconds)
+
+    response.headers['Content-Encoding'] = encoding
+    # Byte ranges and strong validators describe the uncompressed body.
+    response.headers.pop('Accept-Ranges', None)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    Install the response compression hook on the application.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+
+    @app.after_request
+    def compress(response):
+        return compress_response(app, response)
@@ -7,10 +7,9 @@ authorization, and data validation on API endpoints.
 
 import jsonschema
 from jsonschema import validate
-from flask_jwt_extended import get_jwt
-from flask_jwt_extended import verify_jwt_in_request, jwt_required, get_jwt_identity
-from flask import jsonify, request, abort, current_app
+from flask import jsonify, request
 from functools import wraps
+from app.middleware.auth import auth_required, ADMIN, SELF, ADMIN_OR_SELF
 from app.logging_config import logger
 
 
@@ -18,66 +17,24 @@ def admin_required():
     """
     Decorator to ensure that the user has admin privileges.
 
+    The JWT is verified once per request; see `app.middleware.auth`.
+
     Returns:
         Response: JSON response with an error message if the user is not an admin.
     """
-    def wrapper(fn):
-        @wraps(fn)
-        def decorator(*args, **kwargs):
-            try:
-
-                verify_jwt_in_request()
-                claims = get_jwt()
-
-                if claims['role'] and claims['role'] == 'Admin':
-                    return fn(*args, **kwargs)
-
-                else:
-                    msg = 'Permission denied. Admins only!'
-                    logger.log(level=40, msg=msg)
-                    return jsonify(msg=msg), 403
-
-            except Exception as e:
-                logger.log(level=40, msg=f'Error in admin_required decorator: {str(e)}')
-                return jsonify(msg="Internal Server Error"), 500
-
-        return decorator
-
-    return wrapper
+    return auth_required(ADMIN)
 
 
 def user_required():
     """
     Decorator to ensure that the user is authorized.
 
+    The JWT is verified once per request; see `app.middleware.auth`.
+
     Returns:
         Response: JSON response with an error message if the user is unauthorized.
     """
-    def wrapper(fn):
-        @wraps(fn)
-        def decorator(*args, **kwargs):
-            try:
-                verify_jwt_in_request()
-                claims = get_jwt()
-
-                user_id_from_request = str(request.view_args.get('user_id'))
-
-                if claims['user_id'] and claims['user_id'] == user_id_from_request:
-                    # kwargs['user_id_from_request'] = user_id_from_request
-                    return fn(*args, **kwargs)
-
-                else:
-                    msg = 'Permission denied. You are unauthorized to access!'
-                    logger.log(level=40, msg=msg)
-                    return jsonify(msg=msg), 403
-
-            except Exception as e:
-                logger.log(level=40, msg=f'Error in user_required decorator: {str(e)}')
-                return jsonify(msg="Internal Server Error."), 500
-
-        return decorator
-
-    return wrapper
+    return auth_required(SELF)
 
 
 def permission_required():
@@ -85,34 +42,12 @@ def permission_required():
     Decorator to ensure that the user has the necessary permissions to access or modify resources.
 
     The user must either be an admin or the user associated with the request.
+    The JWT is verified once per request; see `app.middleware.auth`.
 
     Returns:
         Response: JSON response with an error message if the user lacks permissions.
     """
-    def wrapper(fn):
-        @wraps(fn)
-        def decorator(*args, **kwargs):
-            try:
-                verify_jwt_in_request()
-                claims = get_jwt()
-
-                user_id_from_request = int(request.view_args.get('user_id'))
-
-                if (claims['user_id'] and claims['user_id'] == str(user_id_from_request) or claims['role']
-                        and claims['role'] == 'Admin'):
-                    return fn(*args, **kwargs)
-                else:
-                    msg = "Permission denied. You can only update your own information or you must be an admin."
-                    logger.log(level=40, msg=msg)
-                    return jsonify(msg=msg), 403
-
-            except Exception as e:
-                logger.log(level=40, msg=f'Error in permission_required decorator: {str(e)}')
-                return jsonify(msg="Internal Server Error"), 500
-
-        return decorator
-
-    return wrapper
+    return auth_required(ADMIN_OR_SELF)
 
 
 def json_validator(schema):
@@ -5,11 +5,10 @@ This module provides helper functions used across different parts of
 the application, such as file handling and permission checks.
 """
 
-import os
 from app.models.user import User
 import logging
-from werkzeug.utils import secure_filename
-from app.config import Config
+from flask import current_app
+from app.services.media_service import store_profile_picture, stage_profile_picture, publish_profile_picture
 
 logger = logging.getLogger(__name__)
 
@@ -44,22 +43,62 @@ def allowed_file(filename):
         bool: True if the file is allowed, False otherwise.
     """
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 
 def save_profile_picture(file):
     """
     Save the profile picture to the upload directory.
 
+    The file is stored under the SHA-256 of its content, and its thumbnails
+    are rendered in the background.
+
+    Args:
+        file (FileStorage): The uploaded file.
+
+    Returns:
+        str: The stored filename if the file is saved, None otherwise.
+
+    Raises:
+        UploadTooLarge: If the file exceeds PROFILE_PICTURE_MAX_BYTES.
+        UnsupportedUpload: If the file is not a supported image.
+    """
+    if file and allowed_file(file.filename):
+        config = current_app.config
+        return store_profile_picture(file, config['UPLOAD_FOLDER'], config['PROFILE_THUMBNAIL_SIZES'],
+                                     config.get('PROFILE_PICTURE_MAX_BYTES'), config['PROFILE_PICTURE_MAX_PIXELS'])
+    return None
+
+
+def stage_uploaded_profile_picture(file):
+    """
+    Receive a profile picture in the upload directory without storing it yet.
+
     Args:
         file (FileStorage): The uploaded file.
 
     Returns:
-        str: The filename if the file is saved, None otherwise.
+        UploadStream: The staged upload, or None if the file is not allowed.
+
+    Raises:
+        UploadTooLarge: If the file exceeds PROFILE_PICTURE_MAX_BYTES.
+        UnsupportedUpload: If the file is not a supported image.
     """
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(Config.UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        return filename
+        return stage_profile_picture(file, current_app.config['UPLOAD_FOLDER'],
+                                     current_app.config.get('PROFILE_PICTURE_MAX_BYTES'))
     return None
+
+
+def publish_uploaded_profile_picture(staged):
+    """
+    Store a profile picture staged by `stage_uploaded_profile_picture`.
+
+    Args:
+        staged (UploadStream): The staged upload.
+
+    Returns:
+        str: The stored filename.
+    """
+    return publish_profile_picture(staged, current_app.config['PROFILE_THUMBNAIL_SIZES'],
+                                   current_app.config['PROFILE_PICTURE_MAX_PIXELS'])
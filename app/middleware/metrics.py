@@ -0,0 +1,54 @@
+"""
+Per-route request metrics.
+
+Every request is counted by method, route template and status, its latency
+is recorded in a histogram, and 5xx responses are counted as errors. The
+connection pool gauges of every engine of the worker (primary and replica)
+are refreshed after each request.
+Unmatched URLs are grouped under the route 'unmatched' so that scanners
+cannot create new series.
+"""
+
+import time
+from flask import g, request
+from app import db
+from app.services.metrics_service import DB_POOL, REQUEST_ERRORS, REQUEST_LATENCY, REQUESTS, init_metrics
+
+
+def _record_pool_state():
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        for state, reader in (('size', 'size'), ('checked_out', 'checkedout'), ('overflow', 'overflow')):
+            method = getattr(pool, reader, None)
+            if method is not None:
+                DB_POOL.set(method(), bind_key or 'primary', state)
+
+
+def init_request_metrics(app):
+    """
+    Set up the metrics store and install the request metrics hooks.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    init_metrics(app)
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return response
+
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUESTS.inc(request.method, route, response.status_code)
+        if response.status_code >= 500:
+            REQUEST_ERRORS.inc(request.method, route)
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route)
+        _record_pool_state()
+        return response
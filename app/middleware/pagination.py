@@ -0,0 +1,212 @@
+"""
+Keyset pagination and list filters for collection endpoints.
+
+Pages are addressed by an opaque cursor holding the last ID of the previous
+page, so every page is an index range scan (`WHERE id > :after ORDER BY id
+LIMIT :n`) no matter how deep the client pages. Date-ordered history pages
+use a cursor holding the date and ID of the last row instead, within a
+bounded date range. The page size is capped.
+The next cursor is returned in the `X-Next-Cursor` and `Link` headers, which
+leaves the list response bodies unchanged.
+"""
+
+import base64
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from flask import current_app, request
+
+
+def encode_cursor(last_id):
+    """
+    Encode the last ID of a page as an opaque cursor.
+
+    Args:
+        last_id (int): The ID of the last row of the page.
+
+    Returns:
+        str: The cursor.
+    """
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        int: The ID after which the page starts.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        prefix, last_id = raw.split(':', 1)
+        if prefix != 'id':
+            raise ValueError
+        return int(last_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def encode_position_cursor(moment, last_id):
+    """
+    Encode the date and ID of the last row of a date-ordered page as an opaque cursor.
+
+    Args:
+        moment (datetime): The date of the last row of the page.
+        last_id (int): The ID of the last row of the page.
+
+    Returns:
+        str: The cursor.
+    """
+    raw = f"at:{moment.isoformat()}|{last_id}"
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_position_cursor(cursor):
+    """
+    Decode a cursor produced by `encode_position_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        tuple: The date and ID after which the page starts.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        prefix, position = raw.split(':', 1)
+        if prefix != 'at':
+            raise ValueError
+        moment, last_id = position.rsplit('|', 1)
+        return datetime.fromisoformat(moment), int(last_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _int_arg(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer.")
+
+
+def _limit_arg(args, default_size, max_size):
+    limit = _int_arg(args, 'limit')
+    if limit is None:
+        return default_size
+    if limit < 1:
+        raise ValueError("'limit' must be positive.")
+    return min(limit, max_size)
+
+
+def _datetime_arg(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date or datetime.")
+
+
+def parse_page_request(args):
+    """
+    Read the pagination and filter arguments of a list request.
+
+    Supported arguments: `cursor`, `limit`, `role`, `created_from`,
+    `created_to`, `level_min` and `level_max`.
+
+    Args:
+        args (MultiDict): The request query arguments.
+
+    Returns:
+        dict: `after_id`, `limit` and the filter values (None when absent).
+
+    Raises:
+        ValueError: If an argument is malformed.
+    """
+    default_size = current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    max_size = current_app.config.get('PAGE_SIZE_MAX', 200)
+
+    limit = _limit_arg(args, default_size, max_size)
+
+    cursor = args.get('cursor')
+    return {
+        'after_id': decode_cursor(cursor) if cursor else None,
+        'limit': limit,
+        'role': args.get('role') or None,
+        'created_from': _datetime_arg(args, 'created_from'),
+        'created_to': _datetime_arg(args, 'created_to'),
+        'level_min': _int_arg(args, 'level_min'),
+        'level_max': _int_arg(args, 'level_max'),
+    }
+
+
+def parse_history_request(args):
+    """
+    Read the date range and pagination arguments of a history request.
+
+    Supported arguments: `from` (inclusive), `to` (exclusive), `cursor` and
+    `limit`. `to` defaults to now and `from` to HISTORY_MAX_DAYS before
+    `to`; longer ranges are rejected so that a request only reads the
+    periods it covers.
+
+    Args:
+        args (MultiDict): The request query arguments.
+
+    Returns:
+        dict: `date_from`, `date_to`, `before` (None on the first page) and `limit`.
+
+    Raises:
+        ValueError: If an argument is malformed or the range is too long.
+    """
+    default_size = current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    max_size = current_app.config.get('PAGE_SIZE_MAX', 200)
+    max_days = current_app.config.get('HISTORY_MAX_DAYS', 366)
+
+    limit = _limit_arg(args, default_size, max_size)
+
+    date_to = _datetime_arg(args, 'to') or datetime.utcnow()
+    date_from = _datetime_arg(args, 'from') or date_to - timedelta(days=max_days)
+    if date_from >= date_to:
+        raise ValueError("'from' must be before 'to'.")
+    if date_to - date_from > timedelta(days=max_days):
+        raise ValueError(f"The date range must not exceed {max_days} days.")
+
+    cursor = args.get('cursor')
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'before': decode_position_cursor(cursor) if cursor else None,
+        'limit': limit,
+    }
+
+
+def add_page_headers(response, next_cursor):
+    """
+    Advertise the next page of a list response.
+
+    Args:
+        response (Response): The list response.
+        next_cursor (str): The cursor of the next page, or None on the last page.
+
+    Returns:
+        Response: The response.
+    """
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
@@ -0,0 +1,89 @@
+"""
+On-demand profiling of live requests.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE or when it
+sends an `X-Profile: 1` header with an admin access token. The profile is
+written to PROFILE_DIR, its capture ID is returned in the `X-Profile-Id`
+response header, and the captures are listed at `/admin/profiles`. A
+request that is not profiled pays for one header lookup, plus one random
+number when a sample rate is set; with PROFILING_ENABLED=false no hooks are
+installed at all.
+"""
+
+import random
+import time
+from flask import current_app, g, request
+from app.middleware.auth import get_request_claims, is_admin_claims
+from app.services.profiling_service import save_capture, start_profiler
+
+
+PROFILE_HEADER = 'X-Profile'
+
+
+def _profile_trigger(sample_rate):
+    if request.headers.get(PROFILE_HEADER) == '1':
+        try:
+            if is_admin_claims(get_request_claims()):
+                return 'header'
+        except Exception:
+            # Missing or invalid tokens are rejected by the route itself.
+            pass
+    if sample_rate and random.random() < sample_rate:
+        return 'rate'
+    return None
+
+
+def init_profiling(app):
+    """
+    Install the request profiling hooks on the application.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    if not app.config.get('PROFILING_ENABLED', True):
+        return
+
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    mode = app.config.get('PROFILE_MODE', 'sample')
+    interval = app.config.get('PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000
+
+    @app.before_request
+    def start_request_profile():
+        trigger = _profile_trigger(sample_rate)
+        if trigger is None:
+            return
+        profiler = start_profiler(mode, interval)
+        if profiler is not None:
+            g._profile = (profiler, trigger, time.perf_counter())
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+
+        profiler, trigger, started = profile
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        profiler.stop()
+        claims = g.get('_auth_claims')
+        capture_id = save_capture(current_app.config['PROFILE_DIR'], current_app.config['PROFILE_MAX_FILES'],
+                                  profiler, mode, {
+                                      'route': request.url_rule.rule if request.url_rule is not None else None,
+                                      'method': request.method,
+                                      'path': request.path,
+                                      'status': response.status_code,
+                                      'duration_ms': duration_ms,
+                                      'trigger': trigger,
+                                      'request_id': g.get('request_id'),
+                                      'user_id': claims.get('user_id') if claims else None,
+                                  })
+        if capture_id is not None:
+            response.headers['X-Profile-Id'] = capture_id
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(error=None):
+        # Requests that fail before after_request still stop their profiler.
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            profile[0].stop()
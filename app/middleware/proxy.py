@@ -0,0 +1,30 @@
+"""
+Trusted reverse proxy headers.
+
+Behind a reverse proxy or load balancer, `request.remote_addr` is the
+proxy's address, so every anonymous client would share one rate limit
+bucket. With PROXY_FIX_X_FOR set to the number of proxies in front of the
+app, the client address is taken from that many trailing entries of
+`X-Forwarded-For`; PROXY_FIX_X_PROTO does the same for the scheme. Entries
+beyond the configured count are ignored, so a client cannot pick its own
+address by sending the header itself. Both default to 0, which trusts no
+header and is the right setting when clients connect to the app directly.
+"""
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.logging_config import logger
+
+
+def init_proxy_fix(app):
+    """
+    Wrap the WSGI application in `ProxyFix` when trusted proxies are configured.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    x_for = app.config.get('PROXY_FIX_X_FOR', 0)
+    x_proto = app.config.get('PROXY_FIX_X_PROTO', 0)
+    if not x_for and not x_proto:
+        return
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=x_for, x_proto=x_proto)
+    logger.info(f"Trusting {x_for} X-Forwarded-For and {x_proto} X-Forwarded-Proto proxy hops.")
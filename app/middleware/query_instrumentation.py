@@ -0,0 +1,342 @@
+"""
+Per-request SQL instrumentation.
+
+This module hooks SQLAlchemy cursor events to count and time every statement
+executed while handling a request. Statements are grouped by shape (the SQL
+text with literals and IN-lists collapsed); a SELECT shape repeated more than
+SQL_N_PLUS_ONE_THRESHOLD times in one request is reported as an N+1 pattern.
+The totals are returned in response headers and logged, and a query budget
+can fail requests outright in testing mode.
+
+Independently of requests, the slow-query recorder keeps the count, total
+and maximum time of every statement shape executed by the process. It
+writes them to `query-stats-<pid>.json` in SQL_STATS_DIR every
+SQL_STATS_FLUSH_SECONDS and at exit, for `flask queries advise`.
+Statements slower than SQL_SLOW_QUERY_MS are logged. Parameter values are
+never stored: with SQL_STATS_CAPTURE_PARAMETERS the type names of the
+parameters of the slowest execution are kept, so that the advisor can
+pick sample literals of the right type.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache, wraps
+from flask import g, has_request_context, request, current_app, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.logging_config import logger, log_sampled
+from app.runtime_files import UnsafeRuntimePath, ensure_private_dir, open_private_file
+
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_NAMED_PARAMETER = re.compile(r'%\(\w+\)s|:\w+|\$\d+|%s|\?')
+_PARAMETER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_PARAMETER_NAME = re.compile(r'%\((\w+)\)s|(?<![:\w]):(\w+)')
+_VALUES_LIST = re.compile(r'VALUES\s*(\(\?\))(?:\s*,\s*\(\?\))+', re.IGNORECASE)
+
+_listeners_installed = False
+_recorder = None
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement):
+    """
+    Reduce a SQL statement to its shape.
+
+    Literals and bound parameters become `?`, parameter lists of any length
+    become `(?)` and whitespace is collapsed, so that statements differing
+    only in their values share one shape.
+
+    Args:
+        statement (str): The SQL statement.
+
+    Returns:
+        str: The normalized statement shape.
+    """
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _STRING_LITERAL.sub('?', shape)
+    shape = _NAMED_PARAMETER.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PARAMETER_LIST.sub('(?)', shape)
+    shape = _VALUES_LIST.sub(r'VALUES \1', shape)
+    return shape
+
+
+class RequestQueryStats:
+    """
+    Statement counters collected while handling a single request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes = {}
+
+    def record(self, statement, elapsed):
+        """
+        Record one executed statement.
+
+        Args:
+            statement (str): The SQL statement.
+            elapsed (float): The execution time in seconds.
+        """
+        self.count += 1
+        self.total_seconds += elapsed
+        shape = normalize_statement(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated_shapes(self, threshold):
+        """
+        Return the SELECT shapes executed more than `threshold` times.
+
+        Args:
+            threshold (int): The number of repetitions tolerated.
+
+        Returns:
+            list: Tuples of (shape, count), most repeated first.
+        """
+        repeated = [(shape, count) for shape, count in self.shapes.items()
+                    if count > threshold and shape.upper().startswith('SELECT')]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+def query_budget(max_queries):
+    """
+    Decorator to set the SQL query budget of a single route.
+
+    Overrides SQL_QUERY_BUDGET for the decorated view.
+
+    Args:
+        max_queries (int): The maximum number of statements the route may execute.
+
+    Returns:
+        function: The decorated view function.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+def parameter_types(statement, parameters):
+    """
+    Redact the parameters of a statement to the type names of their values.
+
+    Args:
+        statement (str): The SQL statement.
+        parameters: The DBAPI parameters; for executemany, the first set is
+            used.
+
+    Returns:
+        list: The type names in the order the statement uses them.
+    """
+    if isinstance(parameters, list) and parameters and isinstance(parameters[0], (list, tuple, dict)):
+        parameters = parameters[0]
+    if isinstance(parameters, dict):
+        parameters = [parameters.get(pyformat or named) for pyformat, named in _PARAMETER_NAME.findall(statement)]
+    return [type(value).__name__ for value in parameters or ()]
+
+
+class SlowQueryRecorder:
+    """
+    Per-process timing statistics of statement shapes.
+    """
+
+    def __init__(self, directory, slow_seconds, flush_seconds, max_shapes, capture_parameters=False):
+        self.directory = directory
+        self.slow_seconds = slow_seconds
+        self.flush_seconds = flush_seconds
+        self.max_shapes = max_shapes
+        self.capture_parameters = capture_parameters
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._shapes = {}
+        self._dropped = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, statement, parameters, elapsed):
+        """
+        Record one executed statement.
+
+        Args:
+            statement (str): The SQL statement.
+            parameters: The DBAPI parameters of the statement; only their
+                types are kept, and only with `capture_parameters`.
+            elapsed (float): The execution time in seconds.
+        """
+        shape = normalize_statement(statement)
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker starts without the statistics of its parent.
+                self._pid = os.getpid()
+                self._shapes = {}
+                self._dropped = 0
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self._dropped += 1
+                    return
+                stats = self._shapes[shape] = {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                                               'slow_count': 0}
+            stats['count'] += 1
+            stats['total_seconds'] += elapsed
+            if elapsed >= stats['max_seconds']:
+                stats['max_seconds'] = elapsed
+                if self.capture_parameters:
+                    stats['parameter_types'] = parameter_types(statement, parameters)
+            slow = elapsed >= self.slow_seconds
+            if slow:
+                stats['slow_count'] += 1
+            flush_due = time.monotonic() - self._last_flush >= self.flush_seconds
+
+        if slow:
+            log_sampled('slow_query', logging.WARNING, "Slow query (%.1f ms): %s", elapsed * 1000, shape)
+        if flush_due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the statistics of this process to SQL_STATS_DIR.
+        """
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._shapes or self._pid != os.getpid():
+                return
+            snapshot = {'pid': self._pid, 'dropped_shapes': self._dropped,
+                        'shapes': {shape: dict(stats) for shape, stats in self._shapes.items()}}
+
+        path = os.path.join(self.directory, f"query-stats-{snapshot['pid']}.json")
+        try:
+            ensure_private_dir(self.directory)
+            with os.fdopen(open_private_file(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC), 'w',
+                           encoding='utf-8') as file:
+                json.dump(snapshot, file)
+            os.replace(f"{path}.tmp", path)
+        except (OSError, UnsafeRuntimePath) as e:
+            logger.warning(f"Could not write query statistics to {path}: {str(e)}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recorder is not None or (has_request_context() and '_query_stats' in g):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start_time')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if _recorder is not None:
+        _recorder.record(statement, parameters, elapsed)
+    if has_request_context() and '_query_stats' in g:
+        g._query_stats.record(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute.
+    connection = exception_context.connection
+    if connection is not None and exception_context.statement is not None:
+        starts = connection.info.get('query_start_time')
+        if starts:
+            starts.pop()
+
+
+def flush_query_stats():
+    """
+    Write the statement statistics of this process, if they are recorded.
+    """
+    if _recorder is not None:
+        _recorder.flush()
+
+
+def _route_budget():
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        budget = current_app.config.get('SQL_QUERY_BUDGET')
+    return budget
+
+
+def init_query_instrumentation(app):
+    """
+    Install the SQL instrumentation hooks on the application.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    global _listeners_installed, _recorder
+
+    request_stats = app.config.get('SQL_INSTRUMENTATION_ENABLED', True)
+    slow_queries = app.config.get('SQL_STATS_ENABLED', True)
+    if not request_stats and not slow_queries:
+        return
+
+    if not _listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        atexit.register(flush_query_stats)
+        _listeners_installed = True
+
+    if slow_queries and _recorder is None:
+        _recorder = SlowQueryRecorder(app.config['SQL_STATS_DIR'], app.config['SQL_SLOW_QUERY_MS'] / 1000,
+                                      app.config['SQL_STATS_FLUSH_SECONDS'], app.config['SQL_STATS_MAX_SHAPES'],
+                                      app.config.get('SQL_STATS_CAPTURE_PARAMETERS', False))
+
+    if not request_stats:
+        return
+
+    @app.before_request
+    def start_query_stats():
+        g._query_stats = RequestQueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop('_query_stats', None)
+        if stats is None:
+            return response
+
+        threshold = current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        repeated = stats.repeated_shapes(threshold)
+        total_ms = stats.total_seconds * 1000
+
+        response.headers['X-DB-Query-Count'] = str(stats.count)
+        response.headers['X-DB-Query-Time-Ms'] = f"{total_ms:.2f}"
+        response.headers['X-DB-Repeated-Queries'] = str(len(repeated))
+
+        logger.debug(f"{request.method} {request.path}: {stats.count} queries in {total_ms:.2f} ms")
+        for shape, count in repeated:
+            logger.warning(f"Possible N+1 on {request.method} {request.endpoint}: "
+                           f"statement executed {count} times: {shape}")
+
+        budget = _route_budget()
+        over_budget = budget is not None and stats.count > budget
+        if over_budget:
+            logger.warning(f"Query budget exceeded on {request.method} {request.endpoint}: "
+                           f"{stats.count} queries, budget {budget}")
+
+        if current_app.testing and (over_budget or
+                                    (repeated and current_app.config.get('SQL_FAIL_ON_N_PLUS_ONE', False))):
+            failure = jsonify({
+                'status': 'failed',
+                'message': 'SQL query budget exceeded.',
+                'query_count': stats.count,
+                'query_budget': budget,
+                'repeated_queries': [{'statement': shape, 'count': count} for shape, count in repeated],
+            })
+            failure.status_code = 500
+            failure.headers.update({key: value for key, value in response.headers.items()
+                                    if key.startswith('X-DB-')})
+            return failure
+
+        return response
@@ -0,0 +1,293 @@
+"""
+Token-bucket rate limiting shared by all worker processes.
+
+Every limited route has a limit such as "10/60" (10 requests per 60
+seconds, bursts of up to 10). Buckets are kept per route and per identity:
+the JWT `user_id` of authenticated requests, the client IP otherwise.
+Behind a reverse proxy the client IP is only correct with PROXY_FIX_X_FOR
+set (see `app.middleware.proxy`).
+
+Bucket state lives in a fixed-size table in a memory-mapped file, so every
+worker process of the deployment draws from the same buckets. The file is
+RATE_LIMIT_STATE_FILE, by default `rate-limit.bin` in RUNTIME_DIR; it is
+opened without following links and refused if another user owns it. Its
+header records the slot count, and a file laid out for another
+RATE_LIMIT_SLOTS is reset. Each slot holds a
+64-bit key hash, the remaining tokens and the last refill time; lookups
+probe a few neighbouring slots and reuse the stalest one when the table is
+full. Access is serialized with an `fcntl` lock on the file plus a thread
+lock. Where `fcntl` is not available, or with RATE_LIMIT_STORAGE=memory,
+each process keeps its own buckets in a dict.
+
+Rejected requests get a 429 response with a `Retry-After` header.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from app.middleware.auth import get_request_user_id
+from app.runtime_files import ensure_private_dir, open_private_file
+from app.logging_config import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+_HEADER = struct.Struct('<8sQ')
+_MAGIC = b'TRVRATE1'
+_SLOT = struct.Struct('<Qdd')
+_PROBES = 8
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+_limiter = None
+
+
+def parse_limit(spec):
+    """
+    Parse a rate limit specification.
+
+    Args:
+        spec (str): "<count>/<seconds>" or "<count>/<second|minute|hour|day>".
+
+    Returns:
+        tuple: The bucket capacity and the refill rate in tokens per second.
+    """
+    count, period = spec.split('/', 1)
+    period = period.strip().lower()
+    seconds = _PERIODS[period] if period in _PERIODS else float(period)
+    capacity = float(count)
+    return capacity, capacity / seconds
+
+
+def _key_hash(key):
+    # Python's hash() is salted per process; the table is shared between processes.
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+def _take(tokens, updated, capacity, rate, now):
+    """
+    Refill a bucket and try to take one token from it.
+
+    Returns:
+        tuple: (allowed, tokens left, seconds until a token is available).
+    """
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBuckets:
+    """
+    Token buckets held by the current process only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, key, capacity, rate):
+        """
+        Take one token from the bucket of a key.
+
+        Args:
+            key (str): The bucket key.
+            capacity (float): The bucket size.
+            rate (float): Tokens added per second.
+
+        Returns:
+            tuple: (allowed, tokens left, seconds until a token is available).
+        """
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _take(tokens, updated, capacity, rate, now)
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens, retry_after
+
+
+class SharedBuckets:
+    """
+    Token buckets in a memory-mapped file shared by the worker processes of a host.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # flock locks belong to the open file description, which a forked
+        # child shares with its parent, so every process opens its own.
+        if self._pid == os.getpid():
+            return
+        size = _HEADER.size + self.slots * _SLOT.size
+        fd = open_private_file(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, _HEADER.size, 0)
+                if (len(header) < _HEADER.size or _HEADER.unpack(header) != (_MAGIC, self.slots)
+                        or os.fstat(fd).st_size != size):
+                    # A new file, or one laid out for another slot count.
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, _HEADER.pack(_MAGIC, self.slots), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._pid = os.getpid()
+
+    def acquire(self, key, capacity, rate):
+        """
+        Take one token from the bucket of a key.
+
+        Args:
+            key (str): The bucket key.
+            capacity (float): The bucket size.
+            rate (float): Tokens added per second.
+
+        Returns:
+            tuple: (allowed, tokens left, seconds until a token is available).
+        """
+        key_hash = _key_hash(key)
+        start = key_hash % self.slots
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                offset = None
+                stalest = None
+                for probe in range(_PROBES):
+                    slot_offset = _HEADER.size + ((start + probe) % self.slots) * _SLOT.size
+                    slot_key, tokens, updated = _SLOT.unpack_from(self._map, slot_offset)
+                    if slot_key == key_hash:
+                        offset = slot_offset
+                        break
+                    if slot_key == 0:
+                        # Slots are never emptied, so the key is not further along.
+                        stalest = (slot_offset, 0.0)
+                        break
+                    if stalest is None or updated < stalest[1]:
+                        stalest = (slot_offset, updated)
+                if offset is None:
+                    offset = stalest[0]
+                    tokens, updated = capacity, now
+
+                allowed, tokens, retry_after = _take(tokens, updated, capacity, rate, now)
+                _SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return allowed, tokens, retry_after
+
+
+def state_file(config):
+    """
+    Return the path of the shared bucket file, creating its default directory.
+
+    Args:
+        config (dict): The application settings.
+
+    Returns:
+        str: RATE_LIMIT_STATE_FILE, or `rate-limit.bin` in RUNTIME_DIR.
+    """
+    if config.get('RATE_LIMIT_STATE_FILE'):
+        return config['RATE_LIMIT_STATE_FILE']
+    return os.path.join(ensure_private_dir(config['RUNTIME_DIR']), 'rate-limit.bin')
+
+
+def reset_rate_limits(config):
+    """
+    Delete the shared bucket file, so that a restarted server starts with full buckets.
+
+    Args:
+        config (dict): The application settings.
+    """
+    try:
+        os.remove(state_file(config))
+    except FileNotFoundError:
+        pass
+
+
+def init_rate_limiter(app):
+    """
+    Set up the bucket storage from the application settings.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    global _limiter
+    storage = app.config.get('RATE_LIMIT_STORAGE', 'shared')
+    if storage == 'shared' and fcntl is not None:
+        _limiter = SharedBuckets(state_file(app.config), app.config.get('RATE_LIMIT_SLOTS', 4096))
+    else:
+        if storage == 'shared':
+            logger.warning("fcntl is not available; rate limits are enforced per process.")
+        _limiter = MemoryBuckets()
+
+
+def request_identity():
+    """
+    Return the identity a request is rate limited by.
+
+    Returns:
+        str: 'user:<id>' for requests already authenticated, 'ip:<address>' otherwise.
+    """
+    user_id = get_request_user_id()
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.remote_addr}"
+
+
+def rate_limit(name, config_key):
+    """
+    Decorator to rate limit a route with a token bucket per identity.
+
+    Place it below `auth_required` so authenticated requests are limited by
+    their `user_id` instead of their IP.
+
+    Args:
+        name (str): The name of the limited route, part of the bucket key.
+        config_key (str): The setting holding the limit, e.g. "10/60".
+
+    Returns:
+        function: The decorated view function.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            spec = current_app.config.get(config_key)
+            if _limiter is None or not spec or not current_app.config.get('RATE_LIMIT_ENABLED', True):
+                return func(*args, **kwargs)
+
+            capacity, rate = parse_limit(spec)
+            identity = request_identity()
+            allowed, tokens, retry_after = _limiter.acquire(f"{name}:{identity}", capacity, rate)
+            if allowed:
+                return func(*args, **kwargs)
+
+            logger.warning(f"Rate limit '{name}' exceeded by {identity}.")
+            response = jsonify({'message': 'Too many requests. Please retry later.'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+            response.headers['X-RateLimit-Limit'] = spec
+            return response
+
+        return wrapper
+    return decorator
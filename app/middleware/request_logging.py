@@ -0,0 +1,46 @@
+"""
+Request IDs and per-request summary logging.
+
+Every request gets an ID, taken from a well-formed `X-Request-ID` header
+sent by a proxy or generated, which is attached to all records logged
+during the request and echoed in the `X-Request-ID` response header. When
+the request completes, one record with its status and duration is logged.
+"""
+
+import re
+import time
+import uuid
+from flask import g, request
+from app.logging_config import logger
+
+
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def init_request_logging(app):
+    """
+    Install the request ID and summary logging hooks on the application.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    if not app.config.get('REQUEST_LOGGING_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_log():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def finish_request_log(response):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return response
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        response.headers['X-Request-ID'] = g.request_id
+        logger.info("%s %s %s in %.2f ms", request.method, request.path, response.status_code, duration_ms,
+                    extra={'status': response.status_code, 'duration_ms': duration_ms})
+        return response
@@ -0,0 +1,110 @@
+"""
+Receiving and serving of uploaded files.
+
+Multipart file parts named like an image (ALLOWED_EXTENSIONS) are streamed
+straight into an `UploadStream` in UPLOAD_FOLDER while the request body is
+parsed, instead of being spooled by Werkzeug and copied again on save.
+Uploads over PROFILE_PICTURE_MAX_BYTES are rejected with 413 and files that
+are not JPEG, PNG or GIF with 415, before the rest of the body is read.
+
+Content-addressed uploads (`<sha256>.<ext>` and their thumbnails) never
+change, so they are sent with their name as a strong ETag and
+`Cache-Control: public, max-age=<1 year>, immutable`; a revalidation of such
+a file is answered with 304 before the file is even looked up. Other files,
+such as `default.jpg`, get a file-based ETag and UPLOADS_CACHE_SECONDS.
+Range requests are answered with 206.
+
+When a front proxy serves UPLOAD_FOLDER itself, the worker can hand the
+transfer off: with UPLOADS_ACCEL_REDIRECT_PREFIX set (nginx), responses carry
+an `X-Accel-Redirect` to `<prefix><filename>`; with USE_X_SENDFILE (Apache,
+lighttpd), Flask sends an `X-Sendfile` header with the file path.
+"""
+
+import os
+from flask import Request, abort, current_app, request, send_from_directory
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.security import safe_join
+from app.media_names import is_content_addressed
+from app.services.media_service import UnsupportedUpload, UploadStream, UploadTooLarge
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class UploadRequest(Request):
+    """
+    Request class that streams image uploads into the upload folder.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        extension = filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else None
+        if extension not in current_app.config['ALLOWED_EXTENSIONS']:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        stream = UploadStream(current_app.config['UPLOAD_FOLDER'],
+                              current_app.config.get('PROFILE_PICTURE_MAX_BYTES'))
+        self.__dict__.setdefault('_upload_streams', []).append(stream)
+        return stream
+
+    def _load_form_data(self):
+        try:
+            super()._load_form_data()
+        except UploadTooLarge as e:
+            raise RequestEntityTooLarge(str(e))
+        except UnsupportedUpload as e:
+            raise UnsupportedMediaType(str(e))
+
+    def close(self):
+        super().close()
+        # Parts of a body that failed to parse are not in `files`.
+        for stream in self.__dict__.get('_upload_streams', ()):
+            stream.discard()
+
+
+def _set_cache_headers(response, immutable):
+    # send_file marks responses without max_age as no-cache.
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = current_app.config.get('UPLOADS_CACHE_SECONDS', 3600)
+    return response
+
+
+def send_upload(filename):
+    """
+    Build the response serving an uploaded file.
+
+    Args:
+        filename (str): Name of the file in UPLOAD_FOLDER.
+
+    Returns:
+        Response: The file, a 304/206 response, or a proxy redirect.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    if filename.startswith('.'):
+        # Uploads in progress.
+        abort(404)
+    immutable = is_content_addressed(filename)
+
+    if immutable and filename in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(filename)
+        return _set_cache_headers(response, immutable)
+
+    accel_prefix = current_app.config.get('UPLOADS_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        path = safe_join(folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        # The proxy answers conditional and range requests from its own copy.
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+        if immutable:
+            response.set_etag(filename)
+        return _set_cache_headers(response, immutable)
+
+    response = send_from_directory(folder, filename, etag=filename if immutable else True)
+    return _set_cache_headers(response, immutable)
@@ -23,7 +23,7 @@ class GameSession(db.Model, SerializerMixin):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     user = db.relationship('User', backref='game_sessions')
-    questions_asked = db.Column(db.ARRAY(db.Integer), nullable=False)
+    questions_asked = db.Column(db.JSON().with_variant(db.ARRAY(db.Integer), 'postgresql'), nullable=False)
     correct_answers = db.Column(db.Integer, nullable=False)
     total_questions = db.Column(db.Integer, nullable=False)
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
@@ -39,10 +39,10 @@ class Question(db.Model, SerializerMixin):
                       'incorrect_answers', 'created_at', 'times_asked', 'success_rate')
 
     id = db.Column(db.Integer, primary_key=True)
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)  # Use 'categories.id'
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
     category = db.relationship('Category', backref='questions')
     difficulty = db.Column(db.Enum(DifficultyLevel), nullable=False)
-    question_text = db.Column(db.Text, nullable=False)
+    question_text = db.Column(db.Text, nullable=False, index=True)
     answer = db.Column(db.String(255), nullable=False)
     incorrect_answers = db.Column(db.JSON, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,20 @@
+from app import db
+from sqlalchemy_serializer import SerializerMixin
+
+
+class ReferenceDataVersion(db.Model, SerializerMixin):
+    """
+    ReferenceDataVersion model to store the change counter of a reference data table.
+
+    Attributes:
+        name (str): Primary key, name of the reference data set ('roles' or 'categories').
+        version (int): Counter bumped by every write to the reference data set.
+    """
+    __tablename__ = 'reference_data_versions'
+    serialize_only = ('name', 'version')
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ReferenceDataVersion name={self.name}, version={self.version}>"
@@ -0,0 +1,27 @@
+from datetime import datetime
+from app import db
+from sqlalchemy_serializer import SerializerMixin
+
+
+class RevokedToken(db.Model, SerializerMixin):
+    """
+    RevokedToken model to store the IDs of revoked JWTs.
+
+    Attributes:
+        jti (str): Primary key, the unique ID of the revoked token.
+        token_type (str): 'access' or 'refresh'.
+        user_id (int): ID of the user the token was issued to.
+        revoked_at (datetime): Timestamp of the revocation.
+        expires_at (datetime): Expiry of the token; the row can be purged afterwards.
+    """
+    __tablename__ = 'revoked_tokens'
+    serialize_only = ('jti', 'token_type', 'user_id', 'revoked_at', 'expires_at')
+
+    jti = db.Column(db.String(36), primary_key=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken jti={self.jti}, type={self.token_type}>'
@@ -16,15 +16,19 @@ class Score(db.Model, SerializerMixin):
         category_id (int): Foreign key referencing the Category model.
         category (relationship): Relationship to the Category model.
         duration (int): Duration in seconds of the game session.
+
+    On PostgreSQL the table is range-partitioned by month on `date`
+    (see the `partition_scores_by_month` migration).
     """
     __tablename__ = 'scores'
     serialize_only = ('id', 'user_id', 'user', 'score', 'date', 'category_id', 'duration')
+    __table_args__ = (db.Index('ix_scores_category_id_score', 'category_id', 'score'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     user = db.relationship('User', backref='scores')
     score = db.Column(db.Integer, nullable=False)
-    date = db.Column(db.DateTime, default=datetime.utcnow)
+    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
     category = db.relationship('Category', backref='scores')
     duration = db.Column(db.Integer)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from app import db
+from sqlalchemy_serializer import SerializerMixin
+
+
+class ScoreDistribution(db.Model, SerializerMixin):
+    """
+    ScoreDistribution model to store the persisted histogram sketch of a score metric per category.
+
+    Attributes:
+        id (int): Primary key, auto-increment.
+        category_id (int): Foreign key referencing the Category model.
+        metric (str): Name of the sketched Score column ('score' or 'duration').
+        counts (dict): Sparse mapping of histogram bucket index to count.
+        total_count (int): Number of values recorded in the sketch.
+        updated_at (datetime): Timestamp of the last flush into this row.
+    """
+    __tablename__ = 'score_distributions'
+    __table_args__ = (db.UniqueConstraint('category_id', 'metric', name='uq_score_distributions_category_metric'),)
+    serialize_only = ('id', 'category_id', 'metric', 'total_count', 'updated_at')
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    metric = db.Column(db.String(20), nullable=False)
+    counts = db.Column(db.JSON, nullable=False, default=dict)
+    total_count = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ScoreDistribution category_id={self.category_id}, metric={self.metric}, count={self.total_count}>"
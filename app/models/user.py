@@ -1,10 +1,8 @@
 from datetime import datetime
-from flask_bcrypt import Bcrypt
 from app import db
+from app.services.password_service import hash_password, verify_password
 from sqlalchemy_serializer import SerializerMixin
 
-bcrypt = Bcrypt()
-
 
 class User(db.Model, SerializerMixin):
     """
@@ -20,6 +18,7 @@ class User(db.Model, SerializerMixin):
         last_login (datetime): Timestamp of last user login.
         role (relationship): Relationship to Role model.
         profile (relationship): One-to-one relationship with UserProfile.
+        claims (relationship): One-to-many relationship with Claim.
     """
     __tablename__ = 'users'
     serialize_only = ('id', 'username', 'email', 'role', 'created_at', 'last_login')
@@ -28,12 +27,13 @@ class User(db.Model, SerializerMixin):
     username = db.Column(db.String(50), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
-    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     last_login = db.Column(db.DateTime)
 
     role = db.relationship('Role', backref='users')
     profile = db.relationship('UserProfile', uselist=False, back_populates='user', cascade='all, delete-orphan')
+    claims = db.relationship('Claim', cascade='all, delete-orphan', passive_deletes=True)
 
     def set_password(self, password):
         """
@@ -42,7 +42,7 @@ class User(db.Model, SerializerMixin):
         Args:
             password (str): Plain text password.
         """
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """
@@ -54,7 +54,7 @@ class User(db.Model, SerializerMixin):
         Returns:
             bool: True if the password matches, False otherwise.
         """
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<User id={self.id}, username={self.username}>'
@@ -1,4 +1,6 @@
+from flask import current_app
 from app import db
+from app.media_names import thumbnail_names
 from sqlalchemy_serializer import SerializerMixin
 
 
@@ -9,19 +11,28 @@ class UserProfile(db.Model, SerializerMixin):
     Attributes:
         id (int): Primary key, auto-increment.
         user_id (int): Foreign key referencing the User model.
-        profile_picture (str): Path to the user's profile picture.
+        profile_picture (str): Stored name of the user's profile picture,
+            `<sha256>.<ext>` for uploaded pictures.
         level (int): User level, typically used in gamification.
         experience_points (int): Experience points earned by the user.
     """
     __tablename__ = 'user_profiles'
-    serialize_only = ('id', 'user_id', 'level', 'experience_points', 'profile_picture')
+    serialize_only = ('id', 'user_id', 'level', 'experience_points', 'profile_picture', 'thumbnails')
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     profile_picture = db.Column(db.String(255), default='default.jpg')
     level = db.Column(db.Integer, default=1)
     experience_points = db.Column(db.Integer, default=0)
     user = db.relationship('User', back_populates='profile')
 
+    @property
+    def thumbnails(self):
+        """
+        Stored names of the profile picture thumbnails, keyed by size.
+        """
+        return {str(size): names for size, names in
+                thumbnail_names(self.profile_picture, current_app.config['PROFILE_THUMBNAIL_SIZES']).items()}
+
     def __repr__(self):
         return f'<UserProfile id={self.id}, user_id={self.user_id}>'
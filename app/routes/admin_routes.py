@@ -0,0 +1,54 @@
+"""
+Route definitions for administrative diagnostics.
+
+This module exposes the request profiles captured by
+`app.middleware.profiling` to admins.
+"""
+
+import re
+from flask import Blueprint, current_app, jsonify, request, send_from_directory
+from app.middleware.auth import auth_required, ADMIN
+from app.services.profiling_service import get_capture_file, list_captures
+
+admin_bp = Blueprint('admin_bp', __name__)
+
+_CAPTURE_ID_PATTERN = re.compile(r'^\d+-[0-9a-f]{8}$')
+
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@auth_required(ADMIN)
+def list_profiles_route():
+    """
+    List the recent request profiles, newest first.
+
+    Requires admin authentication. The optional `route` query parameter
+    filters by route template and `limit` caps the number of captures.
+
+    Returns:
+        Response: JSON response with the capture metadata.
+    """
+    limit = min(request.args.get('limit', 100, type=int), current_app.config['PROFILE_MAX_FILES'])
+    captures = list_captures(current_app.config['PROFILE_DIR'], route=request.args.get('route'), limit=limit)
+    return jsonify({"profiles": captures}), 200
+
+
+@admin_bp.route('/admin/profiles/<capture_id>', methods=['GET'])
+@auth_required(ADMIN)
+def download_profile_route(capture_id):
+    """
+    Download the profile file of a capture.
+
+    Requires admin authentication. Sampled profiles are collapsed stacks for
+    flamegraph tools; cProfile captures are pstats files.
+
+    Args:
+        capture_id (str): The capture ID.
+
+    Returns:
+        Response: The profile file, or a 404 JSON response.
+    """
+    filename = get_capture_file(current_app.config['PROFILE_DIR'], capture_id) \
+        if _CAPTURE_ID_PATTERN.match(capture_id) else None
+    if filename is None:
+        return jsonify({"message": "Profile not found."}), 404
+    return send_from_directory(current_app.config['PROFILE_DIR'], filename, as_attachment=True)
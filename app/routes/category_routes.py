@@ -7,18 +7,18 @@ leverage the service layer to ensure proper request handling and business logic
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
 from app.services.category_service import (create_category, get_all_categories, get_category_by_id, update_category,
                                            delete_category)
-from app.middleware.decorators import admin_required, json_validator
+from app.services.score_distribution_service import get_score_distribution
+from app.middleware.decorators import json_validator
+from app.middleware.auth import auth_required, ADMIN
 from app.schemas.category_schemas import category_create_schema
 
 category_bp = Blueprint('category_bp', __name__)
 
 
 @category_bp.route("/categories", methods=['POST'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 @json_validator(category_create_schema)
 def create_category_route():
     """
@@ -35,8 +35,7 @@ def create_category_route():
 
 
 @category_bp.route("/categories", methods=['GET'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 def get_all_categories_route():
     """
     Retrieve all categories.
@@ -51,8 +50,7 @@ def get_all_categories_route():
 
 
 @category_bp.route("/categories/<int:category_id>", methods=['GET'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 def get_category_by_id_route(category_id):
     """
     Retrieve a category by its ID.
@@ -70,8 +68,7 @@ def get_category_by_id_route(category_id):
 
 
 @category_bp.route("/categories/<int:category_id>", methods=['PUT'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 @json_validator(category_create_schema)
 def update_category_route(category_id):
     """
@@ -91,8 +88,7 @@ def update_category_route(category_id):
 
 
 @category_bp.route("/categories/<int:category_id>", methods=['DELETE'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 def delete_category_route(category_id):
     """
     Delete a category.
@@ -107,3 +103,22 @@ def delete_category_route(category_id):
     """
     response, status = delete_category(category_id)
     return jsonify(response), status
+
+
+@category_bp.route("/categories/<int:category_id>/score-distribution", methods=['GET'])
+@auth_required()
+def get_score_distribution_route(category_id):
+    """
+    Retrieve the score and duration distributions of a category.
+
+    Requires authentication. Percentiles (p50, p90, p99) and the histogram
+    are served from pre-aggregated sketches, not from a scan of the scores.
+
+    Args:
+        category_id (int): The ID of the category.
+
+    Returns:
+        Response: JSON response with the distributions and HTTP status code.
+    """
+    response, status = get_score_distribution(category_id)
+    return jsonify(response), status
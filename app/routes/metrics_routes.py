@@ -0,0 +1,25 @@
+"""
+Route definition for the Prometheus metrics endpoint.
+
+The metrics of every worker process on the host are aggregated at scrape
+time; see `app.services.metrics_service`.
+"""
+
+from flask import Blueprint, Response, current_app
+from app.services.metrics_service import render_metrics
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Export the application metrics in the Prometheus text format.
+
+    Returns:
+        Response: The metrics as text/plain, or 404 when metrics are disabled.
+    """
+    if not current_app.config.get('METRICS_ENABLED', True):
+        return Response('Metrics are disabled.\n', status=404, mimetype='text/plain')
+    return Response(render_metrics(current_app.config['METRICS_DIR']),
+                    mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -1,12 +1,15 @@
 from flask import Blueprint, request, jsonify
 from app.services.openai_service import create_question_with_ai
-from app.middleware.decorators import admin_required, json_validator
+from app.middleware.decorators import json_validator
+from app.middleware.auth import auth_required, ADMIN
+from app.middleware.rate_limit import rate_limit
 
 openai_bp = Blueprint('openai_bp', __name__)
 
 
 @openai_bp.route('/questions/ai', methods=['POST'])
-@admin_required()
+@auth_required(ADMIN)
+@rate_limit('questions_ai', 'AI_QUESTION_RATE_LIMIT')
 # @json_validator(schema=create_question_schema)
 def create_question_route():
     """
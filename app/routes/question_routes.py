@@ -10,7 +10,8 @@ request validation.
 from flask import Blueprint, request, jsonify
 from app.services.question_service import (get_question_by_id_service, get_all_questions_service,
                                            update_question_service, delete_question_service)
-from app.middleware.decorators import admin_required, json_validator
+from app.middleware.decorators import json_validator
+from app.middleware.auth import auth_required, ADMIN
 
 question_bp = Blueprint('question_bp', __name__)
 
@@ -28,7 +29,7 @@ def get_all_questions_route():
 
 
 @question_bp.route('/questions/<int:question_id>', methods=['PATCH'])
-@admin_required()
+@auth_required(ADMIN)
 # @json_validator(schema=update_question_schema)
 def update_question_route(question_id):
     data = request.json
@@ -37,7 +38,7 @@ def update_question_route(question_id):
 
 
 @question_bp.route('/questions/<int:question_id>', methods=['DELETE'])
-@admin_required()
+@auth_required(ADMIN)
 def delete_question_route(question_id):
     response, status = delete_question_service(question_id)
     return jsonify(response), status
@@ -7,17 +7,16 @@ layer to ensure proper request handling and business logic execution.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
 from app.services.role_service import create_role, get_all_roles, get_role_by_id
-from app.middleware.decorators import admin_required, json_validator
+from app.middleware.decorators import json_validator
+from app.middleware.auth import auth_required, ADMIN
 from app.schemas.role_create_schema import create_role_schema
 
 role_bp = Blueprint('role_bp', __name__)
 
 
 @role_bp.route("/roles", methods=['POST'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 @json_validator(create_role_schema)
 def create_role_route():
     """
@@ -34,8 +33,7 @@ def create_role_route():
 
 
 @role_bp.route("/roles", methods=['GET'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 def get_all_roles_route():
     """
     Retrieve all roles.
@@ -50,8 +48,7 @@ def get_all_roles_route():
 
 
 @role_bp.route("/roles/<int:role_id>", methods=['GET'])
-@jwt_required()
-@admin_required()
+@auth_required(ADMIN)
 def get_role_by_id_route(role_id):
     """
     Retrieve a role by ID.
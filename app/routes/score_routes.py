@@ -15,14 +15,17 @@ from app.services.score_service import (
     update_score_service,
     delete_score_service
 )
-from app.middleware.decorators import admin_required, json_validator
+from app.services.score_archive_service import get_score_history_of_user_service
+from app.middleware.decorators import json_validator
+from app.middleware.auth import auth_required, ADMIN, ADMIN_OR_SELF
+from app.middleware.pagination import parse_history_request, add_page_headers
 from app.schemas.score_schemas import create_score_schema, update_score_schema
 
 score_bp = Blueprint('score_bp', __name__)
 
 
 @score_bp.route('/users/<int:user_id>/scores', methods=['POST'])
-@admin_required()
+@auth_required(ADMIN)
 @json_validator(schema=create_score_schema)
 def create_score(user_id):
     """
@@ -61,6 +64,32 @@ def get_all_scores_of_user(user_id):
     return jsonify(response), status
 
 
+@score_bp.route('/users/<int:user_id>/scores/history', methods=['GET'])
+@auth_required(ADMIN_OR_SELF)
+def get_score_history_of_user(user_id):
+    """
+    API endpoint to retrieve the scores of the user in a date range, including archived periods.
+
+    Accepts the `from`, `to`, `cursor` and `limit` query arguments; the
+    range defaults to the last HISTORY_MAX_DAYS days and cannot be longer.
+    This reads the detached and archived score periods of the range and is
+    slower than the regular scores endpoint, which only reads hot data. The
+    next page is linked in the `X-Next-Cursor` and `Link` headers.
+
+    Returns:
+        Response: JSON response with one page of scores, newest first, or error message.
+    """
+    try:
+        history_request = parse_history_request(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'fail', 'message': str(e)}), 400
+
+    response, status = get_score_history_of_user_service(user_id, history_request)
+    if status != 200:
+        return jsonify(response), status
+    return add_page_headers(jsonify(response), response['next_cursor']), status
+
+
 @score_bp.route('/scores', methods=['GET'])
 def get_all_scores():
     """
@@ -74,7 +103,7 @@ def get_all_scores():
 
 
 @score_bp.route('/users/<int:user_id>/scores/<int:score_id>', methods=['PUT'])
-@admin_required()
+@auth_required(ADMIN)
 @json_validator(schema=update_score_schema)
 def update_score_route(user_id, score_id):
     """
@@ -93,7 +122,7 @@ def update_score_route(user_id, score_id):
 
 
 @score_bp.route('/users/<int:user_id>/scores/<int:score_id>', methods=['DELETE'])
-@admin_required()
+@auth_required(ADMIN)
 def delete_score(user_id, score_id):
     """
     API endpoint to delete a score.
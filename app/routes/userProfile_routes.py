@@ -7,38 +7,49 @@ utilize the service layer to handle business logic and ensure
 request validation.
 """
 
-from flask import Blueprint, jsonify, request, send_from_directory, current_app, render_template
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, jsonify, request, render_template
 from app.services.userProfile_service import (
     get_all_profiles,
     get_user_profile_by_id,
     update_user_profile
 )
-from app.middleware.decorators import permission_required, form_data_validator
+from app.services.xp_service import award_experience
+from app.middleware.decorators import form_data_validator, json_validator
+from app.middleware.auth import auth_required, ADMIN, ADMIN_OR_SELF
+from app.middleware.pagination import parse_page_request, add_page_headers
+from app.middleware.uploads import send_upload
 from app.models.user import User
 from app.logging_config import logger
-from app.schemas.user_schemas import user_update_schema
+from app.schemas.user_schemas import profile_update_schema, xp_award_schema
 
 userProfile_bp = Blueprint('userProfile_bp', __name__)
 
 
 @userProfile_bp.route('/users/profile', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_users_profiles():
     """
-    Retrieve all user profiles.
+    Retrieve one page of user profiles.
 
-    Requires authentication.
+    Requires authentication. Accepts the same pagination and filter query
+    arguments as GET /users.
 
     Returns:
         Response: JSON response with a list of user profiles and HTTP status code.
     """
-    profiles, status = get_all_profiles()
-    return jsonify(profiles), status
+    try:
+        page_request = parse_page_request(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'fail', 'message': str(e)}), 400
+
+    profiles, status = get_all_profiles(page_request)
+    if status != 200:
+        return jsonify(profiles), status
+    return add_page_headers(jsonify(profiles['items']), profiles['next_cursor']), status
 
 
 @userProfile_bp.route('/users/<int:user_id>/profile', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_user_profile(user_id):
     """
     Retrieve a user profile by user ID.
@@ -60,13 +71,16 @@ def uploaded_file(filename):
     """
     Serve uploaded files.
 
+    Supports conditional and range requests; content-addressed files are
+    cacheable forever.
+
     Args:
         filename (str): Name of the file to serve.
 
     Returns:
         Response: File response.
     """
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    return send_upload(filename)
 
 
 @userProfile_bp.route('/profile/<int:user_id>')
@@ -91,14 +105,14 @@ def view_profile(user_id):
 
 
 @userProfile_bp.route('/users/<int:user_id>/profile', methods=['PATCH'])
-@jwt_required()
-@permission_required()
-@form_data_validator(user_update_schema)
+@auth_required(ADMIN_OR_SELF)
+@form_data_validator(profile_update_schema)
 def update_user_profile_route(user_id):
     """
-    Update a user's profile.
+    Update a user's profile picture.
 
-    Requires authentication and permission.
+    Requires authentication and permission. Level and experience points
+    are rejected; they only change through `POST /users/<id>/xp`.
 
     Args:
         user_id (int): ID of the user whose profile to update.
@@ -108,3 +122,23 @@ def update_user_profile_route(user_id):
     """
     response, status = update_user_profile(user_id, request.form, request.files)
     return jsonify(response), status
+
+
+@userProfile_bp.route('/users/<int:user_id>/xp', methods=['POST'])
+@auth_required(ADMIN)
+@json_validator(xp_award_schema)
+def award_experience_route(user_id):
+    """
+    Award experience points to a user.
+
+    Requires admin permission. The points are added atomically and the
+    user's level is raised according to the level curve.
+
+    Args:
+        user_id (int): ID of the user to award.
+
+    Returns:
+        Response: JSON response with the new experience points and level and HTTP status code.
+    """
+    response, status = award_experience(user_id, request.json['points'])
+    return jsonify(response), status
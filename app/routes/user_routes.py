@@ -8,10 +8,12 @@ validation and authentication.
 """
 
 from app.services.user_service import login as login_service
-from flask_jwt_extended import jwt_required
-from app.middleware.decorators import json_validator, permission_required, form_data_validator
+from app.middleware.decorators import json_validator, form_data_validator
+from app.middleware.auth import auth_required, get_request_claims, ADMIN, ADMIN_OR_SELF
+from app.middleware.rate_limit import rate_limit
+from app.middleware.pagination import parse_page_request, add_page_headers
 from app.schemas.user_schemas import login_schema, user_create_schema, user_update_schema
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file, url_for
 from app.services.user_service import (
     create_user as create_user_service,
     get_users as get_users_service,
@@ -19,12 +21,21 @@ from app.services.user_service import (
     update_user as update_user_service,
     delete_user as delete_user_service
 )
+from app.services.token_service import refresh_tokens, revoke_tokens
+from app.services.user_provisioning_service import (
+    detect_format,
+    submit_provisioning_job,
+    get_provisioning_job,
+    get_provisioning_results_path
+)
+from app.logging_config import logger
 
 
 user_bp = Blueprint('user_bp', __name__)
 
 
 @user_bp.route('/login', methods=['POST'])
+@rate_limit('login', 'LOGIN_RATE_LIMIT')
 @json_validator(login_schema)
 def login():
     """
@@ -40,6 +51,37 @@ def login():
     return jsonify(response), status
 
 
+@user_bp.route('/token/refresh', methods=['POST'])
+@auth_required(refresh=True)
+def refresh_token():
+    """
+    Exchange a refresh token for a new access token and refresh token.
+
+    The presented refresh token is revoked; each refresh token works once.
+
+    Returns:
+        Response: JSON response with the new tokens and HTTP status code.
+    """
+    response, status = refresh_tokens(get_request_claims(refresh=True))
+    return jsonify(response), status
+
+
+@user_bp.route('/logout', methods=['POST'])
+@auth_required()
+def logout():
+    """
+    Revoke the access token of the request.
+
+    An optional `refresh_token` in the JSON body is revoked as well.
+
+    Returns:
+        Response: JSON response with a status message and HTTP status code.
+    """
+    data = request.get_json(silent=True) or {}
+    response, status = revoke_tokens(get_request_claims(), data.get('refresh_token'))
+    return jsonify(response), status
+
+
 @user_bp.route('/users', methods=['POST'])
 @form_data_validator(user_create_schema)
 def create_user():
@@ -57,23 +99,113 @@ def create_user():
     return jsonify(response), status
 
 
+@user_bp.route('/users/bulk', methods=['POST'])
+@auth_required(ADMIN)
+def bulk_create_users():
+    """
+    Start creating users in bulk from a CSV or NDJSON file.
+
+    The file is sent as the `file` field of a multipart form, or as the raw
+    request body with a `text/csv` or `application/x-ndjson` content type.
+    The `format` query argument overrides format detection. The users are
+    created by a background job; its status is at the `Location` URL.
+
+    Requires admin privileges.
+
+    Returns:
+        Response: JSON job status with HTTP status code 202.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        fmt = detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        fmt = detect_format(content_type=request.content_type)
+    fmt = request.args.get('format', fmt)
+
+    try:
+        job = submit_provisioning_job(stream, fmt)
+    except Exception as e:
+        msg = f"Error provisioning users: {str(e)}"
+        logger.error(msg)
+        return jsonify({'status': 'failed', 'message': msg}), 500
+
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers['Location'] = url_for('user_bp.get_bulk_job', job_id=job['id'])
+    return response
+
+
+@user_bp.route('/users/bulk/<job_id>', methods=['GET'])
+@auth_required(ADMIN)
+def get_bulk_job(job_id):
+    """
+    Get the status of a bulk provisioning job.
+
+    Requires admin privileges.
+
+    Returns:
+        Response: JSON job status and HTTP status code.
+    """
+    job = get_provisioning_job(job_id)
+    if job is None:
+        return jsonify({'status': 'fail', 'message': f'Provisioning job {job_id} not found.'}), 404
+    return jsonify(job), 200
+
+
+@user_bp.route('/users/bulk/<job_id>/results', methods=['GET'])
+@auth_required(ADMIN)
+def get_bulk_job_results(job_id):
+    """
+    Download the result of every input record of a finished bulk provisioning job.
+
+    Requires admin privileges.
+
+    Returns:
+        Response: CSV file, or a JSON message with HTTP status code 404 or 409.
+    """
+    job = get_provisioning_job(job_id)
+    if job is None:
+        return jsonify({'status': 'fail', 'message': f'Provisioning job {job_id} not found.'}), 404
+    path = get_provisioning_results_path(job_id)
+    if path is None:
+        return jsonify({'status': 'fail', 'message': f"Provisioning job {job_id} is {job['status']}."}), 409
+
+    response = send_file(path, mimetype='text/csv', as_attachment=True,
+                         download_name='provisioning-results.csv')
+    response.headers['X-Provisioned-Created'] = str(job['created'])
+    response.headers['X-Provisioned-Failed'] = str(job['failed'])
+    return response
+
+
 @user_bp.route('/users', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_users():
     """
-    Retrieve all users.
+    Retrieve one page of users.
 
-    Requires authentication.
+    Requires authentication. Accepts the `cursor`, `limit`, `role`,
+    `created_from`, `created_to`, `level_min` and `level_max` query
+    arguments; the next page is linked in the `X-Next-Cursor` and `Link`
+    headers.
 
     Returns:
         Response: JSON response with a list of users and HTTP status code.
     """
-    response, status = get_users_service()
-    return jsonify(response), status
+    try:
+        page_request = parse_page_request(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'fail', 'message': str(e)}), 400
+
+    response, status = get_users_service(page_request)
+    if status != 200:
+        return jsonify(response), status
+    return add_page_headers(jsonify(response['items']), response['next_cursor']), status
 
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_user_by_id(user_id):
     """
     Retrieve a user by ID.
@@ -91,8 +223,7 @@ def get_user_by_id(user_id):
 
 
 @user_bp.route('/users/<int:user_id>', methods=['PATCH'])
-@jwt_required()
-@permission_required()
+@auth_required(ADMIN_OR_SELF)
 @json_validator(user_update_schema)
 def update_user(user_id):
     """
@@ -112,8 +243,7 @@ def update_user(user_id):
 
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
-@permission_required()
+@auth_required(ADMIN_OR_SELF)
 def delete_user(user_id):
     """
     Delete a user by ID.
@@ -0,0 +1,80 @@
+"""
+Private files shared by the worker processes of one deployment.
+
+Rate limit buckets, metric samples and query statistics live in files that
+every worker process writes. By default they are kept under RUNTIME_DIR,
+which belongs to the deployment rather than to the world-writable temporary
+directory. Directories and files are refused when they are symbolic links,
+owned by another user, or writable by group or others, so another local
+user cannot plant a link or a file that makes the workers write over, or
+read from, something else.
+"""
+
+import os
+import stat
+
+
+_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+
+class UnsafeRuntimePath(Exception):
+    """
+    Raised when a runtime file or directory could be controlled by another user.
+    """
+
+
+def _check_owner(path, info):
+    if stat.S_ISLNK(info.st_mode):
+        raise UnsafeRuntimePath(f"{path} is a symbolic link.")
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise UnsafeRuntimePath(f"{path} is owned by another user.")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise UnsafeRuntimePath(f"{path} is writable by other users.")
+
+
+def ensure_private_dir(path):
+    """
+    Create a directory only the current user can write, or check an existing one.
+
+    Args:
+        path (str): The directory.
+
+    Returns:
+        str: The directory.
+
+    Raises:
+        UnsafeRuntimePath: If the directory is a link, owned by another user or writable by others.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    _check_owner(path, os.lstat(path))
+    return path
+
+
+def open_private_file(path, flags, mode=0o600):
+    """
+    Open a file without following symbolic links and check who owns it.
+
+    Args:
+        path (str): The file.
+        flags (int): `os.open` flags, e.g. `os.O_RDWR | os.O_CREAT`.
+        mode (int): The permissions of a newly created file.
+
+    Returns:
+        int: The file descriptor.
+
+    Raises:
+        UnsafeRuntimePath: If the file is a link, owned by another user or writable by others.
+    """
+    try:
+        fd = os.open(path, flags | _NOFOLLOW | _CLOEXEC, mode)
+    except OSError as e:
+        if os.path.islink(path):
+            raise UnsafeRuntimePath(f"{path} is a symbolic link.") from e
+        raise
+    try:
+        _check_owner(path, os.fstat(fd))
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
@@ -35,3 +35,22 @@ user_update_schema = {
     },
     "required": []
 }
+
+# JSON schema to validate profile updates; level and experience points only change through XP awards
+profile_update_schema = {
+    "type": "object",
+    "properties": {
+        "profile_picture": {"type": "string"},
+    },
+    "additionalProperties": False,
+    "required": []
+}
+
+# JSON schema to validate experience point awards
+xp_award_schema = {
+    "type": "object",
+    "properties": {
+        "points": {"type": "integer", "minimum": 1},
+    },
+    "required": ["points"]
+}
@@ -6,8 +6,11 @@ of categories. It interacts with the Category Data Access Layer (DAL) to perform
 database operations and manage category-related business logic.
 """
 
+from sqlalchemy.exc import IntegrityError
 from app.dal.category_dal import CategoryDAL
+from app.dal.unit_of_work import unit_of_work
 from app.models.category import Category
+from app.services.reference_data_service import reference_data, mark_reference_data_changed, CATEGORIES
 from app.logging_config import logger
 
 
@@ -28,7 +31,7 @@ def create_category(data):
         return {"message": msg}, 400
 
     try:
-        existing_category = CategoryDAL.get_category_by_name(category_name)
+        existing_category = reference_data.get_category_by_name(category_name)
         if existing_category:
             msg = f"Category '{category_name}' already exists."
             logger.info(msg)
@@ -36,12 +39,21 @@ def create_category(data):
 
         category = Category(name=category_name)
         CategoryDAL.create_category(category)
+        mark_reference_data_changed(CATEGORIES)
         CategoryDAL.commit_changes()
+        reference_data.invalidate()
 
         msg = f"Category '{category_name}' created successfully."
         logger.info(msg)
         return {"message": msg}, 201
 
+    except IntegrityError:
+        # The name check reads a cache that may not have seen the other row yet.
+        reference_data.invalidate()
+        msg = f"Category '{category_name}' already exists."
+        logger.info(msg)
+        return {"message": msg}, 400
+
     except Exception as e:
         msg = f"Error creating category '{category_name}': {str(e)}"
         logger.error(msg)
@@ -56,7 +68,7 @@ def get_all_categories():
         tuple: A list of categories and an HTTP status code.
     """
     try:
-        categories = CategoryDAL.get_all_categories()
+        categories = reference_data.get_all_categories()
         if not categories:
             msg = "The categories list is empty!"
             logger.info(msg)
@@ -82,7 +94,7 @@ def get_category_by_id(category_id):
         tuple: A category object and an HTTP status code.
     """
     try:
-        category = CategoryDAL.get_category_by_id(category_id)
+        category = reference_data.get_category_by_id(category_id)
         if not category:
             msg = f"Category with ID {category_id} not found."
             logger.info(msg)
@@ -108,26 +120,34 @@ def update_category(category_id, data):
         tuple: A response message and an HTTP status code.
     """
     try:
-        category = CategoryDAL.get_category_by_id(category_id)
-        if not category:
-            msg = f"Category with ID {category_id} not found."
-            logger.info(msg)
-            return {"message": msg}, 404
-
-        if 'name' in data:
-            existing_category = CategoryDAL.get_category_by_name(data['name'])
-            if existing_category and existing_category.id != category_id:
-                msg = f"Category name '{data['name']}' already exists."
+        with unit_of_work():
+            category = CategoryDAL.get_category_by_id(category_id)
+            if not category:
+                msg = f"Category with ID {category_id} not found."
                 logger.info(msg)
-                return {"message": msg}, 400
+                return {"message": msg}, 404
 
-        category.name = data.get('name', category.name)  # Update only the name
-        CategoryDAL.commit_changes()
+            if 'name' in data:
+                existing_category = reference_data.get_category_by_name(data['name'])
+                if existing_category and existing_category.id != category_id:
+                    msg = f"Category name '{data['name']}' already exists."
+                    logger.info(msg)
+                    return {"message": msg}, 400
+
+            category.name = data.get('name', category.name)  # Update only the name
+            mark_reference_data_changed(CATEGORIES)
+        reference_data.invalidate()
 
         msg = f"Category with ID {category_id} updated successfully."
         logger.info(msg)
         return {"message": msg}, 204
 
+    except IntegrityError:
+        reference_data.invalidate()
+        msg = f"Category name '{data['name']}' already exists."
+        logger.info(msg)
+        return {"message": msg}, 400
+
     except Exception as e:
         msg = f"Error updating category with ID {category_id}: {str(e)}"
         logger.error(msg)
@@ -145,14 +165,16 @@ def delete_category(category_id):
         tuple: A response message and an HTTP status code.
     """
     try:
-        category = CategoryDAL.get_category_by_id(category_id)
-        if not category:
-            msg = f"Category with ID {category_id} not found."
-            logger.info(msg)
-            return {"message": msg}, 404
+        with unit_of_work():
+            category = CategoryDAL.get_category_by_id(category_id)
+            if not category:
+                msg = f"Category with ID {category_id} not found."
+                logger.info(msg)
+                return {"message": msg}, 404
 
-        CategoryDAL.delete_category(category)
-        CategoryDAL.commit_changes()
+            CategoryDAL.delete_category(category)
+            mark_reference_data_changed(CATEGORIES)
+        reference_data.invalidate()
 
         msg = f"Category with ID {category_id} deleted successfully."
         logger.info(msg)
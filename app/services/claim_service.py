@@ -7,13 +7,38 @@ and maintain claim-related business logic.
 """
 
 from app.dal.claim_dal import ClaimDAL
+from app.models.claim import Claim
 from app.logging_config import logger
 
 
+def build_user_claims(user_id, username, email, role_name):
+    """
+    Build the claim rows of a user.
+
+    Args:
+        user_id (int): The ID of the user.
+        username (str): The username of the user.
+        email (str): The email address of the user.
+        role_name (str): The role name of the user.
+
+    Returns:
+        list: Dictionaries with the type, value and user_id of each claim.
+    """
+    return [
+        {'type': 'user_id', 'value': str(user_id), 'user_id': user_id},
+        {'type': 'username', 'value': username, 'user_id': user_id},
+        {'type': 'email', 'value': email, 'user_id': user_id},
+        {'type': 'role', 'value': role_name, 'user_id': user_id},
+    ]
+
+
 def create_claims_for_user(user_id, username, email, role_name):
     """
     Create claims for a user based on their ID, username, email, and role.
 
+    Inside a unit of work the claims are only flushed, as one multi-row
+    insert, and committed with the rest of the operation.
+
     Args:
         user_id (int): The ID of the user.
         username (str): The username of the user.
@@ -23,20 +48,13 @@ def create_claims_for_user(user_id, username, email, role_name):
     Raises:
         Exception: If an error occurs while creating claims.
     """
-    claims_list = [
-        {'type': 'user_id', 'value': str(user_id)},
-        {'type': 'username', 'value': username},
-        {'type': 'email', 'value': email},
-        {'type': 'role', 'value': role_name},
-    ]
+    claims_list = build_user_claims(user_id, username, email, role_name)
 
     try:
-        for item in claims_list:
-            ClaimDAL.create_claim(type=item['type'], value=item['value'], user_id=user_id)
-
+        ClaimDAL.add_claims([Claim(**item) for item in claims_list])
         ClaimDAL.commit_changes()
         logger.info(f"Claims for user ID {user_id} created successfully.")
     except Exception as e:
         msg = f"Error creating claims for user ID {user_id}: {str(e)}"
         logger.error(msg)
-        raise e  
+        raise e
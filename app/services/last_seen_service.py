@@ -0,0 +1,37 @@
+"""
+Service layer for coalesced last login writes.
+
+Logins only record the user's timestamp in memory. A background thread of
+each worker process writes the collected timestamps every
+LAST_SEEN_FLUSH_SECONDS with one batched UPDATE, so the login request
+itself stays read-only. Several logins of the same user between two
+flushes cost a single row update. Pending timestamps are also written
+when the process exits.
+"""
+
+from app.dal.user_dal import UserDAL
+from app.services.write_buffer import CoalescingBuffer
+
+
+class LastSeenTracker(CoalescingBuffer):
+    """
+    Per-process buffer of last login timestamps not yet written.
+    """
+
+    description = 'last logins'
+    thread_name = 'last-seen-flush'
+    interval_setting = 'LAST_SEEN_FLUSH_SECONDS'
+    default_interval = 10
+
+    def _merge(self, current, value):
+        return max(current, value)
+
+    def _write(self, pending):
+        batch_size = self._app.config.get('LAST_SEEN_BATCH_SIZE', 1000) if self._app else 1000
+        items = list(pending.items())
+        for start in range(0, len(items), batch_size):
+            UserDAL.set_last_logins(dict(items[start:start + batch_size]))
+        UserDAL.commit_changes()
+
+
+last_seen = LastSeenTracker()
@@ -0,0 +1,347 @@
+"""
+Service layer for content-addressed profile picture storage.
+
+Uploads are stored under the SHA-256 of their bytes (`<sha256>.<ext>`), so
+identical images are stored once and two uploads never overwrite each other.
+Stored names never change content, which lets clients cache them forever.
+
+Request bodies are streamed into an `UploadStream`, which checks the size
+limit and the image magic bytes and hashes the data while writing it to a
+temporary file in the upload folder; storing the upload is then a rename.
+
+After an upload is stored, a background thread renders fixed-size square
+thumbnails (PROFILE_THUMBNAIL_SIZES) as WebP and JPEG next to it, named
+`<sha256>_<size>.<format>`. Images with more than PROFILE_PICTURE_MAX_PIXELS
+pixels are not thumbnailed, and JPEGs are decoded at a reduced scale close to
+the largest thumbnail. Thumbnailing needs Pillow; without it only the
+original is kept and a warning is logged once.
+"""
+
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from app.media_names import THUMBNAIL_FORMATS, is_content_addressed, thumbnail_name
+from app.logging_config import logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+CHUNK_SIZE = 64 * 1024
+MAGIC_NUMBERS = {
+    b'\xff\xd8\xff': 'jpg',
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif',
+}
+MAGIC_HEADER_SIZE = max(len(magic) for magic in MAGIC_NUMBERS)
+# Larger images are not thumbnailed: decoding them could exhaust memory.
+DEFAULT_MAX_PIXELS = 40 * 1000 * 1000
+
+_thumbnail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+_warned_missing_pillow = False
+
+
+class UploadTooLarge(Exception):
+    """
+    Raised when an upload exceeds its size limit.
+    """
+
+
+class UnsupportedUpload(Exception):
+    """
+    Raised when an upload is not a supported image type.
+    """
+
+
+def detect_image_type(header):
+    """
+    Identify an image by its leading magic bytes.
+
+    Args:
+        header (bytes): The first bytes of the file.
+
+    Returns:
+        str: The file extension of the image type, or None if it is not supported.
+    """
+    for magic, extension in MAGIC_NUMBERS.items():
+        if header.startswith(magic):
+            return extension
+    return None
+
+
+class UploadStream:
+    """
+    Writable file that stores an upload by content while it is received.
+
+    Every chunk is counted, hashed and written to a temporary file in the
+    upload folder as it arrives; the image type is checked as soon as the
+    first bytes are in. `commit` then renames the file to `<sha256>.<ext>`,
+    so the data is written once and memory use does not grow with the
+    upload. An upload that is never committed is deleted on `close`.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.extension = None
+        self.stored_name = None
+        self._digest = hashlib.sha256()
+        self._header = b''
+        fd, self._temp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+        self._file = os.fdopen(fd, 'w+b')
+
+    def write(self, data):
+        """
+        Write a chunk of the upload.
+
+        Args:
+            data (bytes): The chunk.
+
+        Returns:
+            int: The number of bytes written.
+
+        Raises:
+            UploadTooLarge: If the upload exceeds `max_bytes`.
+            UnsupportedUpload: If the upload does not start like a supported image.
+        """
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.discard()
+            raise UploadTooLarge(f"Uploads are limited to {self.max_bytes} bytes.")
+
+        if self.extension is None and len(self._header) < MAGIC_HEADER_SIZE:
+            self._header += data[:MAGIC_HEADER_SIZE - len(self._header)]
+            self.extension = detect_image_type(self._header)
+            if self.extension is None and len(self._header) == MAGIC_HEADER_SIZE:
+                self.discard()
+                raise UnsupportedUpload("Only JPEG, PNG and GIF images are supported.")
+
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def content_name(self):
+        """
+        Return the content-addressed name the upload will be stored under.
+
+        Returns:
+            str: `<sha256>.<ext>` of the data received so far.
+
+        Raises:
+            UnsupportedUpload: If the upload is not a supported image.
+        """
+        if self.extension is None:
+            self.discard()
+            raise UnsupportedUpload("Only JPEG, PNG and GIF images are supported.")
+        return f"{self._digest.hexdigest()}.{self.extension}"
+
+    def commit(self):
+        """
+        Move the upload to its content-addressed name.
+
+        Returns:
+            tuple: The stored file name and whether it was newly written.
+
+        Raises:
+            UnsupportedUpload: If the upload is not a supported image.
+        """
+        if self.stored_name is not None:
+            return self.stored_name, False
+        filename = self.content_name()
+
+        self._file.close()
+        path = os.path.join(self.folder, filename)
+        created = not os.path.exists(path)
+        if created:
+            os.chmod(self._temp_path, 0o644)
+            os.replace(self._temp_path, path)
+        else:
+            os.unlink(self._temp_path)
+        self.stored_name = filename
+        return filename, created
+
+    def discard(self):
+        """
+        Delete the temporary file of an upload that was not committed.
+        """
+        self._file.close()
+        if self.stored_name is None and os.path.exists(self._temp_path):
+            os.unlink(self._temp_path)
+
+    def close(self):
+        self.discard()
+
+
+def _iter_file(file):
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_thumbnails(folder, filename, sizes, max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Render the thumbnails of a stored original.
+
+    Args:
+        folder (str): The upload folder.
+        filename (str): The stored original.
+        sizes (iterable): The thumbnail edge lengths.
+        max_pixels (int): The largest image, in pixels, that is decoded.
+
+    Returns:
+        list: The names of the thumbnails written.
+
+    Raises:
+        UnsupportedUpload: If the image has more than `max_pixels` pixels.
+    """
+    written = []
+    with Image.open(os.path.join(folder, filename)) as image:
+        # Only the header has been read so far.
+        width, height = image.size
+        if width * height > max_pixels:
+            raise UnsupportedUpload(f"Image of {width}x{height} pixels exceeds {max_pixels} pixels.")
+        if image.format == 'JPEG':
+            largest = max(sizes)
+            image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size in sizes:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            for fmt, pillow_format in THUMBNAIL_FORMATS.items():
+                name = thumbnail_name(filename, size, fmt)
+                target = os.path.join(folder, name)
+                if os.path.exists(target):
+                    continue
+                fd, temp_path = tempfile.mkstemp(dir=folder, prefix='.thumb-')
+                with os.fdopen(fd, 'wb') as temp:
+                    thumbnail.save(temp, pillow_format, quality=82)
+                os.chmod(temp_path, 0o644)
+                os.replace(temp_path, target)
+                written.append(name)
+    return written
+
+
+def _generate_thumbnails_in_background(folder, filename, sizes, max_pixels):
+    try:
+        written = generate_thumbnails(folder, filename, sizes, max_pixels)
+        logger.debug(f"Wrote {len(written)} thumbnails of {filename}.")
+    except Exception as e:
+        logger.error(f"Error generating thumbnails of {filename}: {str(e)}")
+
+
+def schedule_thumbnails(folder, filename, sizes, max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Render the thumbnails of a stored original in the background.
+
+    Args:
+        folder (str): The upload folder.
+        filename (str): The stored original.
+        sizes (iterable): The thumbnail edge lengths.
+        max_pixels (int): The largest image, in pixels, that is decoded.
+
+    Returns:
+        Future: The background job, or None when Pillow is not installed.
+    """
+    global _warned_missing_pillow
+    if Image is None:
+        if not _warned_missing_pillow:
+            logger.warning("Pillow is not installed; profile picture thumbnails are disabled.")
+            _warned_missing_pillow = True
+        return None
+    return _thumbnail_executor.submit(_generate_thumbnails_in_background, folder, filename, tuple(sizes), max_pixels)
+
+
+def stage_profile_picture(file, folder, max_bytes=None):
+    """
+    Receive an uploaded profile picture without storing it yet.
+
+    The returned upload knows its stored name (`content_name`) but stays a
+    temporary file until `publish_profile_picture`, so a caller can commit
+    the rows referencing it first. Closing it unpublished deletes it.
+
+    Args:
+        file (FileStorage): The uploaded file.
+        folder (str): The upload folder.
+        max_bytes (int, optional): The size limit for files that are copied in.
+
+    Returns:
+        UploadStream: The staged upload.
+
+    Raises:
+        UploadTooLarge: If the file exceeds `max_bytes`.
+        UnsupportedUpload: If the file is not a supported image.
+    """
+    stream = file.stream
+    if not isinstance(stream, UploadStream) or stream.folder != folder:
+        stream = UploadStream(folder, max_bytes)
+        try:
+            for chunk in _iter_file(file.stream):
+                stream.write(chunk)
+        except BaseException:
+            stream.discard()
+            raise
+    stream.content_name()
+    return stream
+
+
+def publish_profile_picture(stream, sizes, max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Store a staged profile picture under its content name and queue its thumbnails.
+
+    Args:
+        stream (UploadStream): The upload returned by `stage_profile_picture`.
+        sizes (iterable): The thumbnail edge lengths.
+        max_pixels (int): The largest image, in pixels, that is thumbnailed.
+
+    Returns:
+        str: The stored file name.
+    """
+    filename, created = stream.commit()
+    if created:
+        schedule_thumbnails(stream.folder, filename, sizes, max_pixels)
+    return filename
+
+
+def store_profile_picture(file, folder, sizes, max_bytes=None, max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Store an uploaded profile picture by content and queue its thumbnails.
+
+    Files received through an `UploadStream` are already in the upload
+    folder and are only renamed; other files are copied in once.
+
+    Args:
+        file (FileStorage): The uploaded file.
+        folder (str): The upload folder.
+        sizes (iterable): The thumbnail edge lengths.
+        max_bytes (int, optional): The size limit for files that are copied in.
+        max_pixels (int): The largest image, in pixels, that is thumbnailed.
+
+    Returns:
+        str: The stored file name, `<sha256>.<ext>`, named after the detected image type.
+
+    Raises:
+        UploadTooLarge: If the file exceeds `max_bytes`.
+        UnsupportedUpload: If the file is not a supported image.
+    """
+    return publish_profile_picture(stage_profile_picture(file, folder, max_bytes), sizes, max_pixels)
+
+
+def shutdown_thumbnail_worker():
+    """
+    Wait for queued thumbnails and stop the background thread.
+    """
+    _thumbnail_executor.shutdown(wait=True)
@@ -0,0 +1,514 @@
+"""
+Service layer for application metrics in the Prometheus text format.
+
+Counters, gauges and histograms are kept in memory-mapped files, one per
+worker process, in METRICS_DIR. A process only ever writes its own file, so
+recording a sample takes a thread lock and a few in-place writes, never a
+file lock. `render_metrics` reads the files of every process and adds them
+up, so a scrape of any worker reports the whole host. Gauges describe the
+state of a single process; they are reported with a `pid` label, and only
+for processes that are still running.
+
+File layout: an 8-byte count of the bytes in use, then entries made of a
+4-byte key length, the UTF-8 JSON key padded to 8 bytes, and an 8-byte
+float value. Entries are only appended, and the count is updated after the
+entry is written, so readers never see a partial entry.
+
+When a worker exits, `fold_exited_metrics` adds the counters and
+histograms of every process that is gone into a single aggregate file and
+deletes their files, so recycled workers do not leave a file each behind.
+Folding and scraping take a lock on METRICS_DIR, so a scrape never counts
+a process twice or not at all.
+
+Clear METRICS_DIR when the server starts; counters of earlier runs are
+otherwise added to the new ones. It defaults to RUNTIME_DIR/metrics and is
+held to the rules of `app.runtime_files`.
+"""
+
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from app.runtime_files import UnsafeRuntimePath, ensure_private_dir, open_private_file
+from app.logging_config import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+_USED = struct.Struct('<Q')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_SIZE = 64 * 1024
+_AGGREGATE = 'metrics-aggregate.db'
+_LOCK = 'metrics.lock'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_store = None
+_families = {}
+
+
+class MetricsFile:
+    """
+    The memory-mapped sample file of the current process.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+        self._used = 0
+        self._offsets = {}
+
+    def _open(self):
+        # A forked worker must not write into its parent's file.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        ensure_private_dir(self.directory)
+        path = os.path.join(self.directory, f'metrics-{pid}.db')
+        self._fd = open_private_file(path, os.O_RDWR | os.O_CREAT)
+        size = os.fstat(self._fd).st_size
+        if size < _INITIAL_SIZE:
+            os.ftruncate(self._fd, _INITIAL_SIZE)
+            size = _INITIAL_SIZE
+        self._map = mmap.mmap(self._fd, size)
+        self._offsets = {}
+        self._used = _USED.unpack_from(self._map, 0)[0] or _USED.size
+        for key, value_offset, _ in _read_entries(self._map, self._used):
+            self._offsets[key] = value_offset
+        self._pid = pid
+
+    def _append(self, key):
+        encoded = key.encode('utf-8')
+        padded = len(encoded) + (-(_KEY_LENGTH.size + len(encoded)) % 8)
+        entry_size = _KEY_LENGTH.size + padded + _VALUE.size
+        if self._used + entry_size > len(self._map):
+            new_size = max(len(self._map) * 2, self._used + entry_size)
+            self._map.close()
+            os.ftruncate(self._fd, new_size)
+            self._map = mmap.mmap(self._fd, new_size)
+
+        offset = self._used
+        _KEY_LENGTH.pack_into(self._map, offset, len(encoded))
+        self._map[offset + _KEY_LENGTH.size:offset + _KEY_LENGTH.size + len(encoded)] = encoded
+        value_offset = offset + _KEY_LENGTH.size + padded
+        _VALUE.pack_into(self._map, value_offset, 0.0)
+        self._used += entry_size
+        _USED.pack_into(self._map, 0, self._used)
+        self._offsets[key] = value_offset
+        return value_offset
+
+    def add(self, key, amount):
+        """
+        Add to the value of a sample.
+
+        Args:
+            key (str): The sample key.
+            amount (float): The amount to add.
+        """
+        with self._lock:
+            self._open()
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._append(key)
+            _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def set(self, key, value):
+        """
+        Set the value of a sample.
+
+        Args:
+            key (str): The sample key.
+            value (float): The value.
+        """
+        with self._lock:
+            self._open()
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._append(key)
+            _VALUE.pack_into(self._map, offset, value)
+
+
+def _read_entries(buffer, used):
+    """
+    Yield (key, value offset, value) for every entry of a sample file.
+    """
+    offset = _USED.size
+    while offset + _KEY_LENGTH.size <= used:
+        length = _KEY_LENGTH.unpack_from(buffer, offset)[0]
+        padded = length + (-(_KEY_LENGTH.size + length) % 8)
+        key = bytes(buffer[offset + _KEY_LENGTH.size:offset + _KEY_LENGTH.size + length]).decode('utf-8')
+        value_offset = offset + _KEY_LENGTH.size + padded
+        yield key, value_offset, _VALUE.unpack_from(buffer, value_offset)[0]
+        offset = value_offset + _VALUE.size
+
+
+def _encode_entries(values):
+    """
+    Build the content of a sample file holding the given values.
+    """
+    parts = [b'']
+    used = _USED.size
+    for key, value in values.items():
+        encoded = key.encode('utf-8')
+        padding = -(_KEY_LENGTH.size + len(encoded)) % 8
+        parts.append(_KEY_LENGTH.pack(len(encoded)) + encoded + b'\0' * padding + _VALUE.pack(value))
+        used += _KEY_LENGTH.size + len(encoded) + padding + _VALUE.size
+    parts[0] = _USED.pack(used)
+    return b''.join(parts)
+
+
+def _read_file(path):
+    """
+    Read the entries of a sample file as a list of (key, value).
+    """
+    with os.fdopen(open_private_file(path, os.O_RDONLY), 'rb') as file:
+        data = file.read()
+    if len(data) < _USED.size:
+        return []
+    return [(key, value) for key, _, value in _read_entries(data, min(_USED.unpack_from(data, 0)[0], len(data)))]
+
+
+def _file_pid(path):
+    """
+    Return the process ID of a sample file, or None for the aggregate file.
+    """
+    name = os.path.basename(path)
+    if name == _AGGREGATE:
+        return None
+    return int(name[len('metrics-'):-len('.db')])
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    fd = open_private_file(os.path.join(ensure_private_dir(directory), _LOCK), os.O_RDWR | os.O_CREAT)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._keys = {}
+        _families[name] = self
+
+    def _key(self, sample, label_values):
+        cache_key = (sample, label_values)
+        key = self._keys.get(cache_key)
+        if key is None:
+            key = json.dumps([self.name, sample, [str(value) for value in label_values]])
+            self._keys[cache_key] = key
+        return key
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter, summed across processes.
+    """
+
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        """
+        Increment the counter of a label combination.
+
+        Args:
+            *label_values: One value per label name.
+            amount (float): The increment.
+        """
+        if _store is not None:
+            _store.add(self._key(self.name, label_values), amount)
+
+
+class Gauge(_Metric):
+    """
+    Value of the current process, reported per process.
+    """
+
+    kind = 'gauge'
+
+    def set(self, value, *label_values):
+        """
+        Set the gauge of a label combination.
+
+        Args:
+            value (float): The value.
+            *label_values: One value per label name.
+        """
+        if _store is not None:
+            _store.set(self._key(self.name, label_values), value)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in fixed buckets, summed across processes.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        """
+        Record an observed value.
+
+        Args:
+            value (float): The value, e.g. a duration in seconds.
+            *label_values: One value per label name.
+        """
+        if _store is None:
+            return
+        index = bisect_left(self.buckets, value)
+        bound = _format_value(self.buckets[index]) if index < len(self.buckets) else '+Inf'
+        _store.add(self._key(self.name + '_bucket', label_values + (bound,)), 1)
+        _store.add(self._key(self.name + '_sum', label_values), value)
+        _store.add(self._key(self.name + '_count', label_values), 1)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def init_metrics(app):
+    """
+    Set up the sample file of this process from the application settings.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    global _store
+    if not app.config.get('METRICS_ENABLED', True):
+        _store = None
+        return
+    _store = MetricsFile(app.config['METRICS_DIR'])
+
+
+def collect_samples(directory):
+    """
+    Read and aggregate the samples of every process.
+
+    Args:
+        directory (str): The metrics directory.
+
+    Returns:
+        dict: Values keyed by (metric name, sample name, label values).
+    """
+    samples = {}
+    with _directory_lock(directory, exclusive=False):
+        for path in glob.glob(os.path.join(directory, 'metrics-*.db')):
+            try:
+                pid = _file_pid(path)
+                entries = _read_file(path)
+            except (ValueError, OSError, UnsafeRuntimePath):
+                continue
+
+            alive = None
+            for key, value in entries:
+                name, sample, label_values = json.loads(key)
+                family = _families.get(name)
+                if family is None:
+                    continue
+                if family.kind == 'gauge':
+                    if pid is None:
+                        continue
+                    if alive is None:
+                        alive = _process_alive(pid)
+                    if not alive:
+                        continue
+                    label_values = label_values + [str(pid)]
+                sample_key = (name, sample, tuple(label_values))
+                samples[sample_key] = samples.get(sample_key, 0.0) + value
+    return samples
+
+
+def fold_exited_metrics(directory):
+    """
+    Fold the sample files of exited processes into the aggregate file.
+
+    Counters and histograms are added to the aggregate; gauges of exited
+    processes are no longer reported and are dropped. The files of the
+    exited processes are then deleted.
+
+    Args:
+        directory (str): The metrics directory.
+
+    Returns:
+        int: The number of folded files.
+    """
+    with _directory_lock(directory, exclusive=True):
+        exited = []
+        for path in glob.glob(os.path.join(directory, 'metrics-*.db')):
+            try:
+                pid = _file_pid(path)
+            except ValueError:
+                continue
+            if pid is not None and pid != os.getpid() and not _process_alive(pid):
+                exited.append(path)
+        if not exited:
+            return 0
+
+        aggregate_path = os.path.join(directory, _AGGREGATE)
+        totals = {}
+        if os.path.exists(aggregate_path):
+            totals.update(_read_file(aggregate_path))
+        for path in exited:
+            try:
+                entries = _read_file(path)
+            except (OSError, UnsafeRuntimePath) as e:
+                logger.warning(f"Could not fold metrics file {path}: {str(e)}")
+                continue
+            for key, value in entries:
+                family = _families.get(json.loads(key)[0])
+                if family is not None and family.kind != 'gauge':
+                    totals[key] = totals.get(key, 0.0) + value
+
+        temp_path = f"{aggregate_path}.{os.getpid()}.tmp"
+        with os.fdopen(open_private_file(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC), 'wb') as file:
+            file.write(_encode_entries(totals))
+        os.replace(temp_path, aggregate_path)
+        for path in exited:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not delete metrics file {path}: {str(e)}")
+    return len(exited)
+
+
+def render_metrics(directory):
+    """
+    Render the metrics of every process in the Prometheus text format.
+
+    Args:
+        directory (str): The metrics directory.
+
+    Returns:
+        str: The exposition text.
+    """
+    samples = collect_samples(directory)
+    by_family = {}
+    for (name, sample, label_values), value in samples.items():
+        by_family.setdefault(name, []).append((sample, label_values, value))
+
+    lines = []
+    for name in sorted(by_family):
+        family = _families[name]
+        lines.append(f"# HELP {name} {family.documentation}")
+        lines.append(f"# TYPE {name} {family.kind}")
+        entries = sorted(by_family[name])
+
+        if family.kind == 'histogram':
+            lines.extend(_render_histogram(family, entries))
+            continue
+
+        label_names = family.label_names + (('pid',) if family.kind == 'gauge' else ())
+        for sample, label_values, value in entries:
+            lines.append(f"{sample}{_labels(label_names, label_values)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def _render_histogram(family, entries):
+    buckets = {}
+    totals = {}
+    for sample, label_values, value in entries:
+        if sample.endswith('_bucket'):
+            buckets.setdefault(label_values[:-1], {})[label_values[-1]] = value
+        else:
+            totals[(sample, label_values)] = value
+
+    bounds = [_format_value(bound) for bound in family.buckets] + ['+Inf']
+    lines = []
+    for label_values in sorted(set(buckets) | {labels for _, labels in totals}):
+        cumulative = 0.0
+        counts = buckets.get(label_values, {})
+        for bound in bounds:
+            cumulative += counts.get(bound, 0.0)
+            lines.append(f"{family.name}_bucket"
+                         f"{_labels(family.label_names + ('le',), label_values + (bound,))} "
+                         f"{_format_value(cumulative)}")
+        for suffix in ('_sum', '_count'):
+            value = totals.get((family.name + suffix, label_values), 0.0)
+            lines.append(f"{family.name}{suffix}{_labels(family.label_names, label_values)} {_format_value(value)}")
+    return lines
+
+
+def reset_metrics(directory):
+    """
+    Delete the sample files of every process and the aggregate file.
+
+    Args:
+        directory (str): The metrics directory.
+
+    Returns:
+        int: The number of deleted files.
+    """
+    deleted = 0
+    for path in glob.glob(os.path.join(directory, 'metrics-*.db')):
+        try:
+            os.remove(path)
+            deleted += 1
+        except OSError as e:
+            logger.warning(f"Could not delete metrics file {path}: {str(e)}")
+    return deleted
+
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by route and status.', ('method', 'route', 'status'))
+REQUEST_ERRORS = Counter('http_request_errors_total', 'HTTP requests answered with a 5xx status.',
+                         ('method', 'route'))
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency in seconds.',
+                            ('method', 'route'))
+DB_POOL = Gauge('db_pool_connections', 'Database connection pool state of a worker process.', ('engine', 'state'))
+AI_LATENCY = Histogram('ai_request_duration_seconds', 'Latency of AI provider calls in seconds.',
+                       ('provider', 'operation'), buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0))
+AI_TOKENS = Counter('ai_tokens_total', 'Tokens used in AI provider calls.', ('provider', 'kind'))
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Lookups of in-process caches by result.', ('cache', 'result'))
+COMPRESSION_INPUT = Counter('http_response_compression_input_bytes_total',
+                            'Response bytes before compression.', ('route', 'encoding'))
+COMPRESSION_SAVED = Counter('http_response_compression_saved_bytes_total',
+                            'Response bytes saved by compression.', ('route', 'encoding'))
+COMPRESSION_SECONDS = Counter('http_response_compression_seconds_total',
+                              'CPU time spent compressing responses in seconds.', ('route', 'encoding'))
@@ -1,11 +1,27 @@
-import openai
+import logging
 import os
+import time
 from datetime import datetime
-from app.logging_config import logger
+from app.logging_config import logger, log_sampled
 from app.models.question import Question, DifficultyLevel
 from app.dal.question_dal import QuestionDAL
+from app.services.metrics_service import AI_LATENCY, AI_TOKENS
 
-openai.api_key = os.getenv('OPENAI_API_KEY')
+
+
+def _openai():
+    """
+    Import the OpenAI SDK on first use.
+
+    The SDK takes about a second to import, so it is loaded by the first AI
+    call instead of at application startup.
+
+    Returns:
+        module: The `openai` module, with the API key set.
+    """
+    import openai
+    openai.api_key = os.getenv('OPENAI_API_KEY')
+    return openai
 
 
 def parse_ai_response(response_text):
@@ -22,7 +38,7 @@ def parse_ai_response(response_text):
 
         # Split the response by lines
         lines = [line.strip() for line in response_text.split('\n') if line.strip()]
-        logger.debug(f"Parsed lines: {lines}")
+        log_sampled('ai_parse', logging.DEBUG, "Parsed lines: %s", lines)
 
         question_text = ""
         answer = ""
@@ -43,9 +59,8 @@ def parse_ai_response(response_text):
         if answer == "" and incorrect_answers:
             answer = incorrect_answers.pop(0).replace("Correct Answer:", "").strip()
 
-        logger.debug(f"Parsed question: {question_text}")
-        logger.debug(f"Parsed answer: {answer}")
-        logger.debug(f"Parsed incorrect answers: {incorrect_answers}")
+        log_sampled('ai_parse', logging.DEBUG, "Parsed question: %s, answer: %s, incorrect answers: %s",
+                    question_text, answer, incorrect_answers)
 
         # Ensure at least three incorrect answers
         while len(incorrect_answers) < 3:
@@ -95,23 +110,29 @@ def generate_trivia_question(prompt):
     Returns:
         dict: A dictionary containing the question, answer, and incorrect answers.
     """
+    openai = _openai()
     try:
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-        logger.debug(f"Using OpenAI API Key: {openai.api_key}")
-
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a trivia question generator."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=150,
-            temperature=0.7,
-            n=1
-        )
+        started = time.perf_counter()
+        try:
+            response = openai.ChatCompletion.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a trivia question generator."},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=150,
+                temperature=0.7,
+                n=1
+            )
+        finally:
+            AI_LATENCY.observe(time.perf_counter() - started, 'openai', 'generate_question')
+
+        usage = response.get('usage') or {}
+        AI_TOKENS.inc('openai', 'prompt', amount=usage.get('prompt_tokens', 0))
+        AI_TOKENS.inc('openai', 'completion', amount=usage.get('completion_tokens', 0))
 
         response_text = response['choices'][0]['message']['content'].strip()
-        logger.debug(f"OpenAI response: {response_text}")
+        log_sampled('ai_parse', logging.DEBUG, "OpenAI response: %s", response_text)
 
         question_data = parse_ai_response(response_text)
         return question_data
@@ -0,0 +1,243 @@
+"""
+Service layer for password hashing and verification.
+
+bcrypt is deliberately slow (tens of milliseconds of CPU per call at the
+default cost), so this module runs it in a bounded process pool instead
+of on the request thread. The pool size, the number of calls allowed to
+wait for it and the bcrypt cost factor are configurable.
+
+Every server worker process has its own pool, so BCRYPT_POOL_SIZE is
+multiplied by the number of workers; it defaults to 1 because the workers
+already spread logins over the CPUs. Pool processes are started with the
+`forkserver` method (BCRYPT_POOL_START_METHOD) rather than forked from the
+server worker, so they do not inherit its listening socket, database
+connections or threads.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+
+class PasswordPoolBusy(Exception):
+    """
+    Raised when the password pool queue is full or does not answer in time.
+    """
+
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_slots = None
+_settings = {
+    'pool_size': 0,
+    'queue_size': 0,
+    'timeout': 5.0,
+    'log_rounds': 12,
+    'start_method': 'forkserver',
+    'in_flight': 1,
+}
+
+
+def _check_password(password_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def _hash_password(password, log_rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=log_rounds)).decode('utf-8')
+
+
+def init_password_pool(app, pool_size=None, dedicated=False):
+    """
+    Configure the password pool from the application settings.
+
+    The pool itself is started lazily on first use, so that each forked
+    worker process gets its own pool.
+
+    Args:
+        app (Flask): The Flask application.
+        pool_size (int, optional): Overrides BCRYPT_POOL_SIZE.
+        dedicated (bool): The process serves no logins, so `hash_passwords`
+            may use the whole pool instead of half of it.
+    """
+    global _slots
+    if pool_size is None:
+        pool_size = app.config.get('BCRYPT_POOL_SIZE', 1)
+    start_method = app.config.get('BCRYPT_POOL_START_METHOD', 'forkserver')
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = 'spawn'
+    _settings.update({
+        'pool_size': pool_size,
+        'queue_size': pool_size + app.config.get('BCRYPT_POOL_QUEUE_SIZE', 4),
+        'timeout': app.config.get('BCRYPT_POOL_TIMEOUT', 5.0),
+        'log_rounds': app.config.get('BCRYPT_LOG_ROUNDS', 12),
+        'start_method': start_method,
+        'in_flight': pool_size if dedicated else max(1, pool_size // 2),
+    })
+    _slots = threading.BoundedSemaphore(max(_settings['queue_size'], 1))
+
+
+def _get_pool():
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            context = multiprocessing.get_context(_settings['start_method'])
+            if _settings['start_method'] == 'forkserver':
+                # Pool processes fork from a server that already imported
+                # this module, instead of importing the app each time.
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=_settings['pool_size'], mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(pool, func, *args):
+    """
+    Submit a bcrypt function to the pool; the caller holds a queue slot.
+
+    The slot is released when the task finishes, not when its caller stops
+    waiting, so tasks abandoned after a timeout still count against the
+    queue.
+    """
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _run(func, *args):
+    """
+    Run a bcrypt function in the pool, or inline when the pool is disabled.
+
+    A broken pool, e.g. after a pool process was killed, is dropped so that
+    the next call starts a new one.
+
+    Raises:
+        PasswordPoolBusy: If no queue slot frees up, or the task does not finish, within the timeout.
+    """
+    if _settings['pool_size'] <= 0 or _slots is None:
+        return func(*args)
+
+    pool = _get_pool()
+    if not _slots.acquire(timeout=_settings['timeout']):
+        raise PasswordPoolBusy("Password verification queue is full.")
+    try:
+        return _submit(pool, func, *args).result(timeout=_settings['timeout'])
+    except TimeoutError:
+        raise PasswordPoolBusy("Password verification timed out.")
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise PasswordPoolBusy("Password pool was restarted.")
+
+
+def verify_password(password_hash, password):
+    """
+    Check a plain text password against a bcrypt hash.
+
+    Args:
+        password_hash (str): The stored bcrypt hash.
+        password (str): Plain text password.
+
+    Returns:
+        bool: True if the password matches, False otherwise.
+    """
+    if not password_hash or password is None:
+        return False
+    return _run(_check_password, password_hash, password)
+
+
+def hash_password(password):
+    """
+    Hash a plain text password with the configured cost factor.
+
+    Args:
+        password (str): Plain text password.
+
+    Returns:
+        str: The bcrypt hash.
+    """
+    return _run(_hash_password, password, _settings['log_rounds'])
+
+
+def hash_passwords(passwords, log_rounds=None):
+    """
+    Hash many plain text passwords across the pool.
+
+    Every password is one pool task holding a queue slot, like a login,
+    and at most half of the pool workers hash a batch at a time, or all of
+    them in a dedicated pool. Logins queued meanwhile therefore wait for at
+    most one hash instead of the whole batch. The batch waits for free
+    slots rather than failing.
+
+    Args:
+        passwords (list): Plain text passwords.
+        log_rounds (int, optional): Cost factor, defaults to the configured one.
+
+    Returns:
+        list: The bcrypt hashes, in the order of `passwords`.
+    """
+    log_rounds = log_rounds or _settings['log_rounds']
+    if _settings['pool_size'] <= 0 or _slots is None or not passwords:
+        return [_hash_password(password, log_rounds) for password in passwords]
+
+    in_flight = _settings['in_flight']
+    pool = _get_pool()
+    futures = deque()
+    hashes = []
+    try:
+        for password in passwords:
+            if len(futures) >= in_flight:
+                hashes.append(futures.popleft().result())
+            _slots.acquire()
+            futures.append(_submit(pool, _hash_password, password, log_rounds))
+        while futures:
+            hashes.append(futures.popleft().result())
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+    return hashes
+
+
+def needs_rehash(password_hash):
+    """
+    Check whether a bcrypt hash uses less than the configured cost factor.
+
+    Args:
+        password_hash (str): The stored bcrypt hash.
+
+    Returns:
+        bool: True if the hash should be upgraded.
+    """
+    try:
+        return int(password_hash.split('$')[2]) < _settings['log_rounds']
+    except (AttributeError, IndexError, ValueError):
+        return False
+
+
+def shutdown_password_pool():
+    """
+    Stop the pool of the current process, if any.
+    """
+    global _pool
+    with _lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=True)
+        _pool = None
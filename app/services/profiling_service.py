@@ -0,0 +1,222 @@
+"""
+Service layer for request profiles.
+
+A profiled request runs under one of two profilers. The stack sampler
+(PROFILE_MODE=sample) is a background thread that reads the stack of the
+request thread every PROFILE_SAMPLE_INTERVAL_MS and counts the collapsed
+stacks; the request itself is not slowed down beyond the sampler's share
+of the GIL. The output is one `frame;frame;frame count` line per stack, the
+input format of flamegraph.pl and speedscope. The deterministic profiler
+(PROFILE_MODE=cprofile) traces every call and writes a pstats file; it is
+exact but roughly doubles the time of Python-heavy requests.
+
+Only one cProfile capture can run per process (on Python 3.12+ a second
+one fails to start), so a request that would start a second one while
+another thread is traced is simply not profiled.
+
+Each capture is stored in PROFILE_DIR as the profile file and a JSON file
+with its metadata. Only the newest PROFILE_MAX_FILES captures are kept.
+"""
+
+import cProfile
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from app.logging_config import logger
+
+
+PROFILE_EXTENSIONS = {'sample': 'folded', 'cprofile': 'prof'}
+
+_tracing_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        labels = {}
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                frames.append(label)
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class TracingProfiler:
+    """
+    Deterministic cProfile profiler of the current thread.
+    """
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._running = False
+
+    def start(self):
+        """
+        Start tracing, unless another thread of the process is traced.
+
+        Returns:
+            bool: True if tracing started.
+        """
+        if not _tracing_lock.acquire(blocking=False):
+            return False
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Another tool has installed a profiler in this process.
+            _tracing_lock.release()
+            return False
+        self._running = True
+        return True
+
+    def stop(self):
+        if not self._running:
+            return
+        self._profile.disable()
+        self._running = False
+        _tracing_lock.release()
+
+    def dump(self, path):
+        self._profile.dump_stats(path)
+
+
+def _frame_label(code):
+    parts = code.co_filename.replace('\\', '/').rsplit('/', 2)
+    return f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+def start_profiler(mode, interval):
+    """
+    Start profiling the current thread.
+
+    Args:
+        mode (str): 'sample' for the stack sampler, 'cprofile' for cProfile.
+        interval (float): The sampling interval in seconds.
+
+    Returns:
+        StackSampler | TracingProfiler: The running profiler, or None if a
+        cProfile capture is already running in this process.
+    """
+    if mode == 'cprofile':
+        profiler = TracingProfiler()
+        return profiler if profiler.start() else None
+    profiler = StackSampler(interval)
+    profiler.start()
+    return profiler
+
+
+def save_capture(directory, max_files, profiler, mode, metadata):
+    """
+    Write a stopped profiler to the capture directory.
+
+    Args:
+        directory (str): The capture directory.
+        max_files (int): Number of captures to keep.
+        profiler (StackSampler | TracingProfiler): The stopped profiler.
+        mode (str): The profiler mode.
+        metadata (dict): Route, method, status and duration of the request.
+
+    Returns:
+        str: The capture ID, or None if it could not be written.
+    """
+    capture_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    filename = f"{capture_id}.{PROFILE_EXTENSIONS[mode]}"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump(os.path.join(directory, filename))
+        with open(os.path.join(directory, f"{capture_id}.json"), 'w', encoding='utf-8') as file:
+            json.dump(dict(metadata, id=capture_id, mode=mode, file=filename, captured_at=time.time()), file)
+    except OSError as e:
+        logger.warning(f"Could not write profile {capture_id}: {str(e)}")
+        return None
+
+    _prune_captures(directory, max_files)
+    return capture_id
+
+
+def _prune_captures(directory, max_files):
+    # Capture IDs start with the capture time, so name order is age order.
+    for path in sorted(glob.glob(os.path.join(directory, '*.json')))[:-max(max_files, 1)]:
+        capture_id = os.path.basename(path)[:-len('.json')]
+        for stale in glob.glob(os.path.join(directory, f"{glob.escape(capture_id)}.*")):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def list_captures(directory, route=None, limit=100):
+    """
+    List the stored captures, newest first.
+
+    Args:
+        directory (str): The capture directory.
+        route (str): Only list captures of this route template, if given.
+        limit (int): Maximum number of captures.
+
+    Returns:
+        list: The capture metadata.
+    """
+    captures = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.json')), reverse=True):
+        try:
+            with open(path, encoding='utf-8') as file:
+                capture = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if route is None or capture.get('route') == route:
+            captures.append(capture)
+            if len(captures) >= limit:
+                break
+    return captures
+
+
+def get_capture_file(directory, capture_id):
+    """
+    Find the profile file of a capture.
+
+    Args:
+        directory (str): The capture directory.
+        capture_id (str): The capture ID.
+
+    Returns:
+        str: The profile filename inside the directory, or None.
+    """
+    for extension in PROFILE_EXTENSIONS.values():
+        filename = f"{capture_id}.{extension}"
+        if os.path.isfile(os.path.join(directory, filename)):
+            return filename
+    return None
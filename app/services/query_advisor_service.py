@@ -0,0 +1,362 @@
+"""
+Service layer for the index advisor.
+
+The statement statistics written by the slow-query recorder (see
+`app.middleware.query_instrumentation`) of every process are merged, and
+the shapes with the most total time are run through `EXPLAIN`. No
+parameter values are recorded, so every `?` of a shape is replaced by a
+sample literal, of the recorded parameter type when
+SQL_STATS_CAPTURE_PARAMETERS is on. For every table the plan reads
+with a full scan, an index is proposed from the statement's predicates on
+that table: equality columns first, then one range column, or the ORDER
+BY columns when there is no range. Proposals already covered by the
+leading columns of an existing index are dropped.
+
+The advisor executes the shapes it loads, so it only reads a statistics
+directory that no other user can write, and never explains a shape with
+more than one statement.
+"""
+
+import glob
+import json
+import os
+import re
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy import inspect
+from app import db
+from app.runtime_files import UnsafeRuntimePath, ensure_private_dir, open_private_file
+from app.logging_config import logger
+
+
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+_TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN|UPDATE)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(?!(?:WHERE|JOIN|ON|SET|LEFT|RIGHT|'
+                              r'INNER|OUTER|CROSS|ORDER|GROUP|LIMIT|FOR|USING)\b)(\w+)"?)?', re.IGNORECASE)
+_PREDICATE = re.compile(r'(?:"?(\w+)"?\.)?"?(\w+)"?\s*(=|<=|>=|<>|!=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b)'
+                        r'(?:\s*"?(\w+)"?\."?(\w+)"?)?', re.IGNORECASE)
+_ORDER_BY = re.compile(r'\bORDER BY\s+(.+?)(?:\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)', re.IGNORECASE)
+_COLUMN_REFERENCE = re.compile(r'(?:"?(\w+)"?\.)?"?(\w*)"?')
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?!.*\bUSING\b)')
+_EQUALITY = {'=', 'IN', 'IS'}
+_RANGE = {'<', '>', '<=', '>=', 'BETWEEN'}
+_MAX_INDEX_COLUMNS = 3
+# An untyped string literal is converted to the type of the column it is compared with.
+_DEFAULT_LITERAL = "'1'"
+_SAMPLE_LITERALS = {
+    'int': '1', 'float': '1.0', 'Decimal': '1.0', 'bool': 'TRUE', 'NoneType': 'NULL', 'str': "'a'",
+    'datetime': "'2000-01-01 00:00:00'", 'date': "'2000-01-01'", 'time': "'00:00:00'",
+}
+
+
+def load_query_stats(directory):
+    """
+    Merge the statement statistics written by every process.
+
+    Args:
+        directory (str): The statistics directory.
+
+    Returns:
+        dict: Statistics keyed by statement shape.
+
+    Raises:
+        UnsafeRuntimePath: If the directory is a link, owned by another user or writable by others.
+    """
+    merged = {}
+    ensure_private_dir(directory)
+    for path in glob.glob(os.path.join(directory, 'query-stats-*.json')):
+        try:
+            with os.fdopen(open_private_file(path, os.O_RDONLY), encoding='utf-8') as file:
+                shapes = json.load(file)['shapes']
+        except (OSError, ValueError, KeyError, UnsafeRuntimePath) as e:
+            logger.warning(f"Skipping unreadable query statistics {path}: {str(e)}")
+            continue
+
+        for shape, stats in shapes.items():
+            current = merged.get(shape)
+            if current is None:
+                merged[shape] = dict(stats)
+                continue
+            current['count'] += stats['count']
+            current['total_seconds'] += stats['total_seconds']
+            current['slow_count'] += stats['slow_count']
+            if stats['max_seconds'] > current['max_seconds']:
+                current['max_seconds'] = stats['max_seconds']
+                if 'parameter_types' in stats:
+                    current['parameter_types'] = stats['parameter_types']
+    return merged
+
+
+def reset_query_stats(directory):
+    """
+    Delete the statement statistics of every process.
+
+    Args:
+        directory (str): The statistics directory.
+
+    Returns:
+        int: The number of deleted files.
+    """
+    deleted = 0
+    for path in glob.glob(os.path.join(directory, 'query-stats-*.json')):
+        try:
+            os.remove(path)
+            deleted += 1
+        except OSError as e:
+            logger.warning(f"Could not delete query statistics {path}: {str(e)}")
+    return deleted
+
+
+def worst_shapes(stats, limit):
+    """
+    Return the statement shapes with the most total execution time.
+
+    Args:
+        stats (dict): Statistics keyed by statement shape.
+        limit (int): Maximum number of shapes.
+
+    Returns:
+        list: Tuples of (shape, statistics), worst first.
+    """
+    return sorted(stats.items(), key=lambda item: item[1]['total_seconds'], reverse=True)[:limit]
+
+
+def sample_statement(shape, parameter_types=None):
+    """
+    Replace the placeholders of a statement shape with sample literals.
+
+    Args:
+        shape (str): The normalized statement.
+        parameter_types (list): The type names of the parameters, if they
+            were recorded. They are only used when there is one per
+            placeholder; collapsed IN-lists otherwise shift them.
+
+    Returns:
+        str: A statement that can be explained without parameters.
+    """
+    placeholders = shape.count('?')
+    if not parameter_types or len(parameter_types) != placeholders:
+        parameter_types = [None] * placeholders
+    literals = iter(_SAMPLE_LITERALS.get(name, _DEFAULT_LITERAL) for name in parameter_types)
+    return re.sub(r'\?', lambda match: next(literals), shape)
+
+
+def explain_statement(connection, shape, parameter_types=None):
+    """
+    Find the tables a statement shape reads with a full scan.
+
+    Args:
+        connection (Connection): The database connection.
+        shape (str): The normalized statement.
+        parameter_types (list): The type names of the parameters, if they
+            were recorded.
+
+    Returns:
+        tuple: The plan lines and the scanned table names or aliases.
+
+    Raises:
+        ValueError: If the shape contains a `;`, i.e. could hold a second statement.
+    """
+    if ';' in shape:
+        raise ValueError("Statement shapes containing ';' are not explained.")
+    statement = sample_statement(shape, parameter_types)
+    if connection.dialect.paramstyle in ('format', 'pyformat'):
+        statement = statement.replace('%', '%%')
+    if connection.dialect.name == 'postgresql':
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}").scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, scanned = [], []
+        _walk_postgres_plan(plan[0]['Plan'], 0, lines, scanned)
+        return lines, scanned
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+    lines = [row[-1] for row in rows]
+    scanned = [match.group(1) for match in map(_SQLITE_SCAN.match, lines) if match]
+    return lines, scanned
+
+
+def _walk_postgres_plan(node, depth, lines, scanned):
+    relation = node.get('Relation Name')
+    lines.append('  ' * depth + node['Node Type'] + (f" on {relation}" if relation else '')
+                 + (f" (filter: {node['Filter']})" if node.get('Filter') else ''))
+    if node['Node Type'] == 'Seq Scan' and relation:
+        scanned.append(node.get('Alias') or relation)
+    for child in node.get('Plans', []):
+        _walk_postgres_plan(child, depth + 1, lines, scanned)
+
+
+def _table_aliases(shape):
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(shape):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def propose_columns(shape, table, alias, columns):
+    """
+    Choose the index columns of one table for a statement shape.
+
+    Args:
+        shape (str): The normalized statement.
+        table (str): The scanned table.
+        alias (str): The name the statement uses for the table.
+        columns (set): The column names of the table.
+
+    Returns:
+        list: The proposed index columns, possibly empty.
+    """
+    single_table = len(set(_table_aliases(shape).values())) == 1
+    qualifiers = {table, alias}
+    where = re.split(r'\bWHERE\b', shape, maxsplit=1, flags=re.IGNORECASE)
+    conditions = ' '.join(re.findall(r'\bON\b(.+?)(?=\bJOIN\b|\bWHERE\b|$)', where[0], re.IGNORECASE))
+    if len(where) > 1:
+        conditions += ' ' + where[1]
+
+    equality, ranges = [], []
+    for qualifier, column, operator, other_qualifier, other_column in _PREDICATE.findall(conditions):
+        operator = operator.upper()
+        # Join conditions compare two columns; either side may belong to the table.
+        for qualifier, column in ((qualifier, column), (other_qualifier, other_column)):
+            if column not in columns or (qualifier and qualifier not in qualifiers) or \
+                    (not qualifier and not single_table):
+                continue
+            if operator in _EQUALITY and column not in equality:
+                equality.append(column)
+            elif operator in _RANGE and column not in ranges:
+                ranges.append(column)
+
+    if re.search(r'\bOR\b', conditions, re.IGNORECASE):
+        # Columns compared in different OR branches cannot share a composite index.
+        return equality[:1] or ranges[:1]
+
+    proposal = equality[:_MAX_INDEX_COLUMNS]
+    if ranges:
+        proposal += [column for column in ranges[:1] if column not in proposal]
+    else:
+        order_by = _ORDER_BY.search(shape)
+        if order_by:
+            for term in order_by.group(1).split(','):
+                qualifier, column = _COLUMN_REFERENCE.match(term.strip()).groups()
+                if column in columns and column not in proposal and (qualifier in qualifiers or single_table):
+                    proposal.append(column)
+    return proposal[:_MAX_INDEX_COLUMNS]
+
+
+def _covered(proposal, indexes, unique_keys):
+    # A proposal starting with a unique key finds at most one row through the existing index.
+    return any(existing[:len(proposal)] == proposal for existing in indexes) or \
+        any(key and proposal[:len(key)] == key for key in unique_keys)
+
+
+def advise_indexes(stats, limit=10):
+    """
+    Propose indexes for the statement shapes with the most total time.
+
+    Args:
+        stats (dict): Statistics keyed by statement shape.
+        limit (int): Number of shapes to explain.
+
+    Returns:
+        tuple: The explained shapes, each with its plan, and the index
+        proposals keyed by (table, columns).
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    explained, proposals = [], {}
+
+    with db.engine.connect() as connection:
+        for shape, shape_stats in worst_shapes(stats, limit):
+            if not shape.lstrip().upper().startswith(_EXPLAINABLE):
+                continue
+            try:
+                plan, scanned = explain_statement(connection, shape, shape_stats.get('parameter_types'))
+            except Exception as e:
+                connection.rollback()
+                logger.warning(f"Could not explain {shape}: {str(e)}")
+                continue
+            explained.append((shape, shape_stats, plan))
+
+            aliases = _table_aliases(shape)
+            for alias in scanned:
+                table = aliases.get(alias, alias)
+                if table not in tables:
+                    continue
+                indexes = inspector.get_indexes(table)
+                unique_keys = [index['column_names'] for index in indexes if index['unique']]
+                unique_keys += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table)]
+                unique_keys.append(inspector.get_pk_constraint(table)['constrained_columns'])
+                indexes = [index['column_names'] for index in indexes] + unique_keys
+                columns = {column['name'] for column in inspector.get_columns(table)}
+                proposal = propose_columns(shape, table, alias, columns)
+                if not proposal or _covered(proposal, indexes, unique_keys):
+                    continue
+                entry = proposals.setdefault((table, tuple(proposal)), {'shapes': [], 'total_seconds': 0.0})
+                entry['shapes'].append(shape)
+                entry['total_seconds'] += shape_stats['total_seconds']
+
+    # A proposal that is the prefix of a longer one is served by the longer index.
+    for table, columns in list(proposals):
+        if any(other_table == table and len(other) > len(columns) and other[:len(columns)] == columns
+               for other_table, other in proposals):
+            proposals.pop((table, columns))
+    return explained, proposals
+
+
+def index_name(table, columns):
+    """
+    Build the name of a proposed index.
+
+    Args:
+        table (str): The table name.
+        columns (tuple): The index columns.
+
+    Returns:
+        str: The index name, e.g. 'ix_claims_user_id_type'.
+    """
+    return f"ix_{table}_{'_'.join(columns)}"[:63]
+
+
+def render_migration(proposals, down_revision):
+    """
+    Render an Alembic migration creating the proposed indexes.
+
+    Args:
+        proposals (dict): Index proposals keyed by (table, columns).
+        down_revision (str): The current head revision.
+
+    Returns:
+        tuple: The revision ID and the migration source.
+    """
+    revision = uuid4().hex[:12]
+    ordered = sorted(proposals)
+    upgrade = '\n'.join(f"    op.create_index('{index_name(table, columns)}', '{table}', {list(columns)!r}, "
+                        f"if_not_exists=True)" for table, columns in ordered)
+    downgrade = '\n'.join(f"    op.drop_index('{index_name(table, columns)}', table_name='{table}', if_exists=True)"
+                          for table, columns in reversed(ordered))
+    source = f'''"""advised indexes
+
+Revision ID: {revision}
+Revises: {down_revision or ''}
+Create Date: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')}
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+{upgrade}
+
+
+def downgrade():
+{downgrade}
+'''
+    return revision, source
@@ -7,6 +7,7 @@ perform database operations.
 """
 
 from app.dal.question_dal import QuestionDAL
+from app.dal.unit_of_work import unit_of_work
 from app.logging_config import logger
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -63,14 +64,14 @@ def update_question_service(question_id, question_data):
         tuple: Response message and status code.
     """
     try:
-        question = QuestionDAL.get_question_by_id(question_id)
-        if question is None:
-            msg = f"Question ID: {question_id} not found."
-            logger.info(msg)
-            return {'status': 'fail', 'message': msg}, 404
-
-        QuestionDAL.update_question(question, **question_data)
-        QuestionDAL.commit_changes()
+        with unit_of_work():
+            question = QuestionDAL.get_question_by_id(question_id)
+            if question is None:
+                msg = f"Question ID: {question_id} not found."
+                logger.info(msg)
+                return {'status': 'fail', 'message': msg}, 404
+
+            QuestionDAL.update_question(question, **question_data)
         msg = f"Question ID: {question_id} updated successfully."
         logger.info(msg)
         return {'status': 'success', 'message': msg}, 200
@@ -91,13 +92,14 @@ def delete_question_service(question_id):
         tuple: Response message and status code.
     """
     try:
-        question = QuestionDAL.get_question_by_id(question_id)
-        if question is None:
-            msg = f"Question ID: {question_id} not found."
-            logger.info(msg)
-            return {'status': 'fail', 'message': msg}, 404
-
-        QuestionDAL.delete_question(question)
+        with unit_of_work():
+            question = QuestionDAL.get_question_by_id(question_id)
+            if question is None:
+                msg = f"Question ID: {question_id} not found."
+                logger.info(msg)
+                return {'status': 'fail', 'message': msg}, 404
+
+            QuestionDAL.delete_question(question)
         msg = f"Question ID: {question_id} deleted successfully."
         logger.info(msg)
         return {'status': 'success', 'message': msg}, 200
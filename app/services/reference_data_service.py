@@ -0,0 +1,223 @@
+"""
+Service layer for the in-memory reference data cache.
+
+Roles and categories change a few times a year but are looked up on hot
+paths (every signup needs the 'Customer' role, category writes check name
+uniqueness). This module keeps both tables in memory and serves name and
+ID lookups from there.
+
+Each table has a version counter in `reference_data_versions`. Role and
+category write services bump it in the same transaction as their change.
+Every worker process compares its cached versions with the stored ones at
+most once every REFERENCE_CACHE_CHECK_SECONDS, with a single small query,
+and reloads only the tables whose version moved. A lookup that misses
+reloads its table (the first time right away, then at most once per
+interval), so rows inserted outside the services, e.g. by seed scripts,
+are still picked up.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from app.dal.reference_data_dal import ReferenceDataDAL
+from app.dal.role_dal import RoleDAL
+from app.dal.category_dal import CategoryDAL
+from app.services.metrics_service import CACHE_LOOKUPS
+from app.logging_config import logger
+
+
+ROLES = 'roles'
+CATEGORIES = 'categories'
+
+CachedRole = namedtuple('CachedRole', ['id', 'name'])
+CachedCategory = namedtuple('CachedCategory', ['id', 'name'])
+
+
+def _to_dict(entry):
+    return {'id': entry.id, 'name': entry.name}
+
+
+CachedRole.to_dict = _to_dict
+CachedCategory.to_dict = _to_dict
+
+
+class ReferenceDataCache:
+    """
+    Per-process cache of roles and categories keyed by ID and by name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._versions = {}
+        self._checked_at = None
+        self._miss_reloaded_at = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, name):
+        if name == ROLES:
+            entries = [CachedRole(role.id, role.name) for role in RoleDAL.get_all_roles()]
+        else:
+            entries = [CachedCategory(category.id, category.name) for category in CategoryDAL.get_all_categories()]
+        return {
+            'by_id': {entry.id: entry for entry in entries},
+            'by_name': {entry.name: entry for entry in entries},
+            'all': sorted(entries, key=lambda entry: entry.id),
+        }
+
+    def _interval(self):
+        return current_app.config.get('REFERENCE_CACHE_CHECK_SECONDS', 5)
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        interval = self._interval()
+        if not force and self._checked_at is not None and now - self._checked_at < interval:
+            return
+
+        with self._lock:
+            if not force and self._checked_at is not None and now - self._checked_at < interval:
+                return
+            versions = ReferenceDataDAL.get_versions()
+            for name in (ROLES, CATEGORIES):
+                version = versions.get(name, 0)
+                if force or name not in self._tables or self._versions.get(name) != version:
+                    self._tables[name] = self._load(name)
+                    self._versions[name] = version
+                    self.misses += 1
+                    CACHE_LOOKUPS.inc('reference_data', 'miss')
+                    logger.debug(f"Reference data '{name}' loaded at version {version}.")
+            self._checked_at = now
+
+    def _table(self, name):
+        self._refresh()
+        self.hits += 1
+        CACHE_LOOKUPS.inc('reference_data', 'hit')
+        return self._tables[name]
+
+    def _lookup(self, name, index, key):
+        entry = self._table(name)[index].get(key)
+        now = time.monotonic()
+        last = self._miss_reloaded_at.get(name)
+        if entry is None and (last is None or now - last >= self._interval()):
+            with self._lock:
+                self._tables[name] = self._load(name)
+                self._miss_reloaded_at[name] = now
+                self.misses += 1
+                CACHE_LOOKUPS.inc('reference_data', 'miss')
+            entry = self._tables[name][index].get(key)
+        return entry
+
+    def load(self):
+        """
+        Load every reference data table, ignoring the check interval.
+        """
+        self._refresh(force=True)
+
+    def invalidate(self):
+        """
+        Force a version check on the next lookup.
+
+        Write services call this after committing, so the writing process
+        sees its own change immediately.
+        """
+        self._checked_at = None
+
+    def get_role_by_name(self, name):
+        """
+        Look up a role by name.
+
+        Args:
+            name (str): The name of the role.
+
+        Returns:
+            CachedRole: The role, or None if not found.
+        """
+        return self._lookup(ROLES, 'by_name', name)
+
+    def get_role_by_id(self, role_id):
+        """
+        Look up a role by ID.
+
+        Args:
+            role_id (int): The ID of the role.
+
+        Returns:
+            CachedRole: The role, or None if not found.
+        """
+        return self._lookup(ROLES, 'by_id', role_id)
+
+    def get_all_roles(self):
+        """
+        Return every role ordered by ID.
+
+        Returns:
+            list: A list of CachedRole entries.
+        """
+        return list(self._table(ROLES)['all'])
+
+    def get_category_by_name(self, name):
+        """
+        Look up a category by name.
+
+        Args:
+            name (str): The name of the category.
+
+        Returns:
+            CachedCategory: The category, or None if not found.
+        """
+        return self._lookup(CATEGORIES, 'by_name', name)
+
+    def get_category_by_id(self, category_id):
+        """
+        Look up a category by ID.
+
+        Args:
+            category_id (int): The ID of the category.
+
+        Returns:
+            CachedCategory: The category, or None if not found.
+        """
+        return self._lookup(CATEGORIES, 'by_id', category_id)
+
+    def get_all_categories(self):
+        """
+        Return every category ordered by ID.
+
+        Returns:
+            list: A list of CachedCategory entries.
+        """
+        return list(self._table(CATEGORIES)['all'])
+
+
+reference_data = ReferenceDataCache()
+
+
+def mark_reference_data_changed(name):
+    """
+    Bump the version of a reference data set in the current transaction.
+
+    Call before committing a role or category write, then call
+    `reference_data.invalidate()` after the commit.
+
+    Args:
+        name (str): ROLES or CATEGORIES.
+    """
+    ReferenceDataDAL.bump_version(name)
+
+
+def warm_reference_data(app):
+    """
+    Load the reference data cache at startup.
+
+    Startup continues with a cold cache if the tables are not available yet.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    try:
+        with app.app_context():
+            reference_data.load()
+    except Exception as e:
+        logger.warning(f"Reference data cache not loaded at startup: {str(e)}")
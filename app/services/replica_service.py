@@ -0,0 +1,70 @@
+"""
+Service layer for the read replica.
+
+In production the replica is a streaming replica of the primary and needs
+nothing from the application. For local testing, REPLICA_DATABASE_URL may
+point at a second SQLite file: it is refreshed from the primary file at
+startup and by `flask replica sync`. Between syncs it lags behind the
+primary like a real replica, so that reads-after-write routing can be
+tested.
+"""
+
+import sqlite3
+from sqlalchemy.engine import make_url
+from app import db
+from app.dal.routing_session import REPLICA_BIND
+from app.logging_config import logger
+
+
+def _sqlite_path(url):
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return url.database
+
+
+def sync_sqlite_replica(primary_url, replica_url):
+    """
+    Copy a SQLite primary database file into a SQLite replica file.
+
+    Args:
+        primary_url (str): The SQLAlchemy URL of the primary.
+        replica_url (str): The SQLAlchemy URL of the replica.
+
+    Returns:
+        bool: True if the replica was copied, False if either database is
+        not a SQLite file.
+    """
+    primary_path, replica_path = _sqlite_path(primary_url), _sqlite_path(replica_url)
+    if primary_path is None or replica_path is None:
+        return False
+
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return True
+
+
+def init_read_replica(app):
+    """
+    Prepare the replica bind of the application, if one is configured.
+
+    A SQLite replica file is refreshed from the primary; its engine pool is
+    disposed so that no connection keeps reading the old file.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    replica_url = app.config.get('SQLALCHEMY_BINDS', {}).get(REPLICA_BIND)
+    if not replica_url:
+        return
+
+    with app.app_context():
+        if sync_sqlite_replica(app.config['SQLALCHEMY_DATABASE_URI'], replica_url):
+            db.engines[REPLICA_BIND].dispose()
+            logger.info("SQLite replica refreshed from the primary.")
+    logger.info("Read replica routing enabled.")
@@ -6,8 +6,10 @@ of user roles. It interacts with the Role Data Access Layer (DAL) to perform
 database operations and manage role-related business logic.
 """
 
+from sqlalchemy.exc import IntegrityError
 from app.dal.role_dal import RoleDAL
 from app.models.role import Role
+from app.services.reference_data_service import reference_data, mark_reference_data_changed, ROLES
 from app.logging_config import logger
 
 
@@ -28,7 +30,7 @@ def create_role(data):
         return {"message": msg}, 400
 
     try:
-        existing_role = RoleDAL.get_role_by_name(role_name)
+        existing_role = reference_data.get_role_by_name(role_name)
         if existing_role:
             msg = f"Role '{role_name}' already exists."
             logger.info(msg)
@@ -36,12 +38,21 @@ def create_role(data):
 
         role = Role(name=role_name)
         RoleDAL.create_role(role)
+        mark_reference_data_changed(ROLES)
         RoleDAL.commit_changes()
+        reference_data.invalidate()
 
         msg = f"Role '{role_name}' created successfully."
         logger.info(msg)
         return {"message": msg}, 201
 
+    except IntegrityError:
+        # The name check reads a cache that may not have seen the other row yet.
+        reference_data.invalidate()
+        msg = f"Role '{role_name}' already exists."
+        logger.info(msg)
+        return {"message": msg}, 400
+
     except Exception as e:
         msg = f"Error creating role '{role_name}': {str(e)}"
         logger.error(msg)
@@ -56,7 +67,7 @@ def get_all_roles():
         tuple: A list of roles and an HTTP status code.
     """
     try:
-        roles = RoleDAL.get_all_roles()
+        roles = reference_data.get_all_roles()
         if not roles:
             msg = "The roles list is empty!"
             logger.info(msg)
@@ -82,7 +93,7 @@ def get_role_by_id(role_id):
         tuple: The role data as a dictionary and an HTTP status code.
     """
     try:
-        role = RoleDAL.get_role_by_id(role_id)
+        role = reference_data.get_role_by_id(role_id)
         if role:
             return role.to_dict(), 200
         else:
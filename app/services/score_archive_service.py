@@ -0,0 +1,245 @@
+"""
+Service layer for score partition maintenance and archived score history.
+
+This module rotates monthly score periods out of the hot `scores` table,
+archives periods older than the configured age into gzip-compressed
+NDJSON files, and serves the slower history path that reads hot, detached
+and archived scores of a bounded date range together.
+"""
+
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, timedelta
+from flask import current_app
+from app.dal.score_dal import ScoreDAL
+from app.dal.score_partition_dal import (ScorePartitionDAL, period_start, add_months, period_table_name,
+                                         PERIOD_TABLE_PATTERN)
+from app.middleware.pagination import encode_position_cursor
+from app.logging_config import logger
+
+
+ARCHIVE_SUFFIX = '.ndjson.gz'
+PENDING_SUFFIX = '.pending'
+
+
+def _archive_folder():
+    folder = current_app.config['SCORE_ARCHIVE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _hot_cutoff(now=None):
+    now = now or datetime.utcnow()
+    return add_months(period_start(now), 1 - current_app.config['SCORE_HOT_MONTHS'])
+
+
+def _archive_cutoff(now=None):
+    now = now or datetime.utcnow()
+    return now - timedelta(days=current_app.config['SCORE_ARCHIVE_AFTER_DAYS'])
+
+
+def _publish_pending_archives():
+    """
+    Finish archive runs that stopped between writing an archive and publishing it.
+
+    A pending archive is complete. If its period table is gone, the drop
+    was committed and the file is published; otherwise the rows are still
+    in the table and the file is discarded, to be written again.
+    """
+    folder = current_app.config['SCORE_ARCHIVE_FOLDER']
+    if not os.path.isdir(folder):
+        return
+    tables = set(ScorePartitionDAL.get_period_tables())
+    for filename in os.listdir(folder):
+        if not filename.endswith(ARCHIVE_SUFFIX + PENDING_SUFFIX):
+            continue
+        match = PERIOD_TABLE_PATTERN.match(filename[:-len(ARCHIVE_SUFFIX + PENDING_SUFFIX)])
+        if not match:
+            continue
+        pending_path = os.path.join(folder, filename)
+        if datetime(int(match.group(1)), int(match.group(2)), 1) in tables:
+            os.remove(pending_path)
+            logger.info(f"Discarded {pending_path}; its period table was not dropped.")
+        else:
+            os.replace(pending_path, pending_path[:-len(PENDING_SUFFIX)])
+            logger.info(f"Published {pending_path[:-len(PENDING_SUFFIX)]} left by an earlier archive run.")
+
+
+def rotate_score_partitions(now=None):
+    """
+    Keep only the hot periods in the `scores` table.
+
+    On PostgreSQL, partitions for the coming months are created ahead of
+    time and partitions older than the hot window are detached. On SQLite,
+    rows older than the hot window are moved into per-period tables.
+
+    Args:
+        now (datetime, optional): The reference time, defaults to now.
+
+    Returns:
+        list: Names of the period tables that left the hot window.
+    """
+    now = now or datetime.utcnow()
+    cutoff = _hot_cutoff(now)
+    # Before a period table can be created again for late rows.
+    _publish_pending_archives()
+
+    if ScorePartitionDAL.is_natively_partitioned():
+        start = cutoff
+        last = add_months(period_start(now), current_app.config['SCORE_PARTITION_PREMAKE_MONTHS'])
+        while start <= last:
+            if ScorePartitionDAL.ensure_partition(start):
+                logger.info(f"Created score partition {period_table_name(start)}.")
+            start = add_months(start, 1)
+        ScorePartitionDAL.commit_changes()
+
+    rotated = []
+    for start in ScorePartitionDAL.get_hot_periods_before(cutoff):
+        moved = ScorePartitionDAL.detach_period(start)
+        ScorePartitionDAL.commit_changes()
+        rotated.append(period_table_name(start))
+        logger.info(f"Rotated score period {period_table_name(start)} out of the hot table "
+                    f"({'detached' if moved < 0 else f'{moved} rows moved'}).")
+    return rotated
+
+
+def archive_score_partitions(now=None):
+    """
+    Archive detached score periods older than the configured age.
+
+    Each period is written to `<SCORE_ARCHIVE_FOLDER>/scores_YYYY_MM.ndjson.gz`
+    through a pending file; its table is dropped and committed before the
+    file is renamed into place, so a failed run never leaves rows both in
+    the archive and in the table. A pending file left by a run that stopped
+    after the drop is published by the next run. Periods still inside the
+    hot window are rotated out first.
+
+    Args:
+        now (datetime, optional): The reference time, defaults to now.
+
+    Returns:
+        list: Paths of the archive files written.
+    """
+    now = now or datetime.utcnow()
+    rotate_score_partitions(now)
+    cutoff = _archive_cutoff(now)
+    folder = _archive_folder()
+
+    written = []
+    for start in ScorePartitionDAL.get_period_tables():
+        if add_months(start, 1) > cutoff:
+            continue
+        name = period_table_name(start)
+        path = os.path.join(folder, name + ARCHIVE_SUFFIX)
+        temp_path = path + '.tmp'
+        pending_path = path + PENDING_SUFFIX
+
+        rows = 0
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+            if os.path.exists(path):
+                with gzip.open(path, 'rt', encoding='utf-8') as previous:
+                    for line in previous:
+                        archive.write(line)
+            for row in ScorePartitionDAL.iter_period_rows(start):
+                record = dict(row)
+                record['date'] = record['date'].isoformat() if record['date'] else None
+                archive.write(json.dumps(record) + '\n')
+                rows += 1
+        os.replace(temp_path, pending_path)
+
+        ScorePartitionDAL.drop_period_table(start)
+        ScorePartitionDAL.commit_changes()
+        os.replace(pending_path, path)
+        written.append(path)
+        logger.info(f"Archived {rows} scores of {name} to {path}.")
+    return written
+
+
+def _overlaps(start, date_from, date_to):
+    return start < date_to and add_months(start, 1) > date_from
+
+
+def _iter_archived_scores(user_id, date_from, date_to):
+    folder = current_app.config['SCORE_ARCHIVE_FOLDER']
+    if not os.path.isdir(folder):
+        return
+    for filename in sorted(os.listdir(folder)):
+        match = filename.endswith(ARCHIVE_SUFFIX) and PERIOD_TABLE_PATTERN.match(filename[:-len(ARCHIVE_SUFFIX)])
+        if not match:
+            continue
+        if not _overlaps(datetime(int(match.group(1)), int(match.group(2)), 1), date_from, date_to):
+            continue
+        with gzip.open(os.path.join(folder, filename), 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                record = json.loads(line)
+                if record['user_id'] == user_id and record['date']:
+                    record['date'] = datetime.fromisoformat(record['date'])
+                    yield record
+
+
+def _iter_history(user_id, date_from, date_to, before, limit):
+    for score in ScoreDAL.get_scores_of_user_between(user_id, date_from, date_to, before=before, limit=limit):
+        yield {
+            'id': score.id,
+            'user_id': score.user_id,
+            'score': score.score,
+            'date': score.date,
+            'category_id': score.category_id,
+            'duration': score.duration,
+            'source': 'hot',
+        }
+
+    # Older pages end before the cursor, so newer periods need not be read.
+    upper = min(date_to, before[0] + timedelta(microseconds=1)) if before else date_to
+    for start in ScorePartitionDAL.get_period_tables():
+        if not _overlaps(start, date_from, upper):
+            continue
+        for row in ScorePartitionDAL.iter_period_rows(start, user_id=user_id, date_from=date_from, date_to=upper):
+            record = dict(row)
+            record['source'] = 'detached'
+            yield record
+
+    for record in _iter_archived_scores(user_id, date_from, upper):
+        if date_from <= record['date'] < upper:
+            record['source'] = 'archive'
+            yield record
+
+
+def get_score_history_of_user_service(user_id, history_request):
+    """
+    Service function to retrieve one page of a user's scores in a date range, including archived history.
+
+    This is the slow path: besides the hot table it reads the detached
+    period tables and archive files of the months in the range. Regular
+    score endpoints read hot data only.
+
+    Args:
+        user_id (int): The ID of the user.
+        history_request (dict): Date range, cursor and page size from `parse_history_request`.
+
+    Returns:
+        tuple: A dict with the scores, newest first, and the next cursor, and an HTTP status code.
+    """
+    try:
+        before = history_request['before']
+        limit = history_request['limit']
+        records = _iter_history(user_id, history_request['date_from'], history_request['date_to'], before,
+                                limit + 1)
+        if before is not None:
+            records = (record for record in records if (record['date'], record['id']) < before)
+        # Only the newest limit + 1 records are kept in memory.
+        page = heapq.nlargest(limit + 1, records, key=lambda record: (record['date'], record['id']))
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_position_cursor(page[-1]['date'], page[-1]['id'])
+        for record in page:
+            record['date'] = record['date'].isoformat()
+        return {'status': 'success', 'data': page, 'next_cursor': next_cursor}, 200
+    except Exception as e:
+        logger.error(f"Error retrieving score history of user {user_id}: {str(e)}")
+        return {'status': 'failed',
+                'message': f"Error retrieving score history: {str(e)}"}, 500
@@ -0,0 +1,385 @@
+"""
+Service layer for per-category score and duration distributions.
+
+This module keeps mergeable HDR-style histogram sketches of the `score` and
+`duration` columns for every category. Sketches are updated in memory when
+scores are ingested, flushed by a background thread of each worker process
+into the `score_distributions` table every SCORE_DISTRIBUTION_FLUSH_SECONDS,
+and read back to answer percentile queries without scanning scores.
+
+Memory bound: a sketch is a fixed array of 896 signed 64-bit counters
+(7 KB). Each category keeps at most one in-memory delta sketch per metric,
+so a category costs at most 14 KB per worker process, regardless of how
+many scores it has. Persisted rows store only the non-empty buckets.
+"""
+
+from array import array
+from flask import current_app
+from app.dal.score_dal import ScoreDAL
+from app.dal.score_distribution_dal import ScoreDistributionDAL
+from app.models.scoreDistribution import ScoreDistribution
+from app.services.reference_data_service import reference_data
+from app.services.write_buffer import CoalescingBuffer
+from app.logging_config import logger
+
+
+METRICS = ('score', 'duration')
+PERCENTILES = (50, 90, 99)
+
+
+class ScoreHistogram:
+    """
+    Fixed-size, mergeable histogram with bounded relative error.
+
+    Values below 64 get one exact bucket each. Larger values are grouped into
+    32 sub-buckets per power of two, which bounds the relative error of any
+    reported value to about 3%. Values above 2^32 - 1 are clamped into the
+    last bucket.
+    """
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    MAX_VALUE_BITS = 32
+    BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKET_COUNT
+    MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+    def __init__(self):
+        self.counts = array('q', bytes(8 * self.BUCKET_COUNT))
+        self.total = 0
+
+    @classmethod
+    def bucket_index(cls, value):
+        """
+        Map a value to its bucket index.
+
+        Args:
+            value (int): The value to bucket.
+
+        Returns:
+            int: The bucket index.
+        """
+        value = min(max(int(value), 0), cls.MAX_VALUE)
+        shift = max(0, value.bit_length() - (cls.SUB_BUCKET_BITS + 1))
+        return shift * cls.SUB_BUCKET_COUNT + (value >> shift)
+
+    @classmethod
+    def bucket_bounds(cls, index):
+        """
+        Return the inclusive value range covered by a bucket.
+
+        Args:
+            index (int): The bucket index.
+
+        Returns:
+            tuple: The lowest and highest value of the bucket.
+        """
+        if index < 2 * cls.SUB_BUCKET_COUNT:
+            return index, index
+        shift = index // cls.SUB_BUCKET_COUNT - 1
+        mantissa = index - shift * cls.SUB_BUCKET_COUNT
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        """
+        Record a value. A negative count retracts previously recorded values.
+
+        Args:
+            value (int): The value to record.
+            count (int): How many times to record the value.
+        """
+        if value is None:
+            return
+        self.counts[self.bucket_index(value)] += count
+        self.total += count
+
+    def merge(self, other):
+        """
+        Add the counts of another histogram into this one.
+
+        Args:
+            other (ScoreHistogram): The histogram to merge.
+        """
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+
+    def merge_sparse(self, sparse_counts):
+        """
+        Add counts stored in the sparse persisted format into this histogram.
+
+        Args:
+            sparse_counts (dict): Mapping of bucket index (as str) to count.
+        """
+        for index, count in sparse_counts.items():
+            self.counts[int(index)] += count
+            self.total += count
+
+    def clamp(self):
+        """
+        Reset buckets that went negative to zero.
+
+        A retraction can outrun the value it retracts, e.g. when the score
+        was recorded before the sketch was rebuilt; a persisted sketch must
+        never hold negative counts.
+        """
+        for index, count in enumerate(self.counts):
+            if count < 0:
+                self.counts[index] = 0
+        self.total = sum(self.counts)
+
+    def to_sparse(self):
+        """
+        Return the non-empty buckets in the sparse persisted format.
+
+        Returns:
+            dict: Mapping of bucket index (as str) to count.
+        """
+        return {str(index): count for index, count in enumerate(self.counts) if count}
+
+    def is_empty(self):
+        """
+        Check whether any value is recorded.
+
+        Returns:
+            bool: True if the histogram holds no values.
+        """
+        return not any(self.counts)
+
+    def percentile(self, percent):
+        """
+        Estimate the value at a percentile.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            int: The midpoint of the bucket holding the percentile, or None if empty.
+        """
+        total = sum(count for count in self.counts if count > 0)
+        if total <= 0:
+            return None
+        rank = max(1, -(-total * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count <= 0:
+                continue
+            seen += count
+            if seen >= rank:
+                low, high = self.bucket_bounds(index)
+                return (low + high) // 2
+        return None
+
+    def histogram(self):
+        """
+        Return the non-empty buckets with their value ranges.
+
+        Returns:
+            list: A list of dictionaries with 'min', 'max' and 'count' keys.
+        """
+        buckets = []
+        for index, count in enumerate(self.counts):
+            if count > 0:
+                low, high = self.bucket_bounds(index)
+                buckets.append({'min': low, 'max': high, 'count': count})
+        return buckets
+
+
+class ScoreDistributionRegistry(CoalescingBuffer):
+    """
+    Per-process store of score sketches not yet flushed to the database.
+
+    Only deltas are kept in memory, so several worker processes can each
+    flush into the same persisted row by merging instead of overwriting.
+    The flush runs on the buffer's background thread with its own session,
+    never inside the request that recorded the score.
+    """
+
+    description = 'score distribution sketches'
+    thread_name = 'score-distribution-flush'
+    interval_setting = 'SCORE_DISTRIBUTION_FLUSH_SECONDS'
+    default_interval = 30
+
+    def record(self, app, category_id, score=None, duration=None, count=1):
+        """
+        Record the values of one score in the sketches of its category.
+
+        Args:
+            app (Flask): The Flask application, used by the flush thread.
+            category_id (int): The category of the score.
+            score (int): The score value.
+            duration (int): The game duration in seconds.
+            count (int): 1 to record the values, -1 to retract them.
+        """
+        if category_id is None:
+            return
+        with self._lock:
+            for metric, value in (('score', score), ('duration', duration)):
+                if value is None:
+                    continue
+                key = (category_id, metric)
+                if key not in self._pending:
+                    self._pending[key] = ScoreHistogram()
+                self._pending[key].record(value, count)
+            self._app = app
+        self._ensure_thread()
+
+    def pending(self, category_id, metric):
+        """
+        Return a copy of the unflushed sketch for a category metric.
+
+        Args:
+            category_id (int): The ID of the category.
+            metric (str): The sketched metric.
+
+        Returns:
+            ScoreHistogram: The pending sketch, or None if there is none.
+        """
+        with self._lock:
+            histogram = self._pending.get((category_id, metric))
+            if histogram is None:
+                return None
+            snapshot = ScoreHistogram()
+            snapshot.merge(histogram)
+            return snapshot
+
+    def clear(self):
+        """
+        Drop every pending sketch.
+        """
+        with self._lock:
+            self._pending = {}
+
+    def _merge(self, current, value):
+        current.merge(value)
+        return current
+
+    def _write(self, pending):
+        for (category_id, metric), histogram in sorted(pending.items()):
+            if histogram.is_empty():
+                continue
+            distribution = ScoreDistributionDAL.get_distribution_for_update(category_id, metric)
+            if distribution is None:
+                distribution = ScoreDistribution(category_id=category_id, metric=metric, counts={},
+                                                 total_count=0)
+            merged = ScoreHistogram()
+            merged.merge_sparse(distribution.counts or {})
+            merged.merge(histogram)
+            merged.clamp()
+            distribution.counts = merged.to_sparse()
+            distribution.total_count = merged.total
+            ScoreDistributionDAL.save_distribution(distribution)
+        ScoreDistributionDAL.commit_changes()
+
+
+distribution_registry = ScoreDistributionRegistry()
+
+
+def record_score_values(category_id, score, duration, count=1):
+    """
+    Record (or retract) the values of a score in the category sketches.
+
+    Only the in-memory sketches are touched; the background flush writes
+    them. Sketch maintenance never fails the calling request; errors are
+    logged.
+
+    Args:
+        category_id (int): The category of the score.
+        score (int): The score value.
+        duration (int): The game duration in seconds.
+        count (int): 1 to record the values, -1 to retract them.
+    """
+    try:
+        distribution_registry.record(current_app._get_current_object(), category_id, score=score,
+                                     duration=duration, count=count)
+    except Exception as e:
+        logger.error(f"Error recording score distribution for category {category_id}: {str(e)}")
+
+
+def _load_histogram(category_id, metric):
+    """
+    Build the current sketch of a metric: persisted counts plus local pending deltas.
+
+    Args:
+        category_id (int): The ID of the category.
+        metric (str): The sketched metric.
+
+    Returns:
+        ScoreHistogram: The merged sketch.
+    """
+    histogram = ScoreHistogram()
+    distribution = ScoreDistributionDAL.get_distribution(category_id, metric)
+    if distribution is not None:
+        histogram.merge_sparse(distribution.counts or {})
+    pending = distribution_registry.pending(category_id, metric)
+    if pending is not None:
+        histogram.merge(pending)
+    return histogram
+
+
+def get_score_distribution(category_id):
+    """
+    Retrieve percentiles and a histogram of scores and durations for a category.
+
+    Args:
+        category_id (int): The ID of the category.
+
+    Returns:
+        tuple: The distribution data and an HTTP status code.
+    """
+    try:
+        category = reference_data.get_category_by_id(category_id)
+        if not category:
+            msg = f"Category with ID {category_id} not found."
+            logger.info(msg)
+            return {"message": msg}, 404
+
+        response = {'category_id': category_id}
+        for metric in METRICS:
+            histogram = _load_histogram(category_id, metric)
+            summary = {'count': max(histogram.total, 0)}
+            for percent in PERCENTILES:
+                summary[f'p{percent}'] = histogram.percentile(percent)
+            summary['histogram'] = histogram.histogram()
+            response[metric] = summary
+
+        return response, 200
+
+    except Exception as e:
+        msg = f"Error retrieving score distribution for category ID {category_id}: {str(e)}"
+        logger.error(msg)
+        return {'status': 'failed', 'message': msg}, 500
+
+
+def rebuild_score_distributions():
+    """
+    Rebuild every persisted sketch from the scores table.
+
+    Returns:
+        int: The number of scores read.
+    """
+    sketches = {}
+    scores_read = 0
+    for category_id, score, duration in ScoreDAL.iter_score_values():
+        scores_read += 1
+        if category_id is None:
+            continue
+        for metric, value in (('score', score), ('duration', duration)):
+            if value is None:
+                continue
+            key = (category_id, metric)
+            if key not in sketches:
+                sketches[key] = ScoreHistogram()
+            sketches[key].record(value)
+
+    distribution_registry.clear()
+    ScoreDistributionDAL.delete_all_distributions()
+    for (category_id, metric), histogram in sketches.items():
+        ScoreDistributionDAL.save_distribution(ScoreDistribution(
+            category_id=category_id,
+            metric=metric,
+            counts=histogram.to_sparse(),
+            total_count=histogram.total
+        ))
+    ScoreDistributionDAL.commit_changes()
+    logger.info(f"Rebuilt score distributions for {len(sketches)} category metrics from {scores_read} scores.")
+    return scores_read
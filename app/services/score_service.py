@@ -7,7 +7,9 @@ database operations and manage score-related business logic.
 """
 
 from app.dal.score_dal import ScoreDAL
+from app.dal.unit_of_work import unit_of_work
 from app.models.score import Score
+from app.services.score_distribution_service import record_score_values
 
 
 def create_score_service(score_data):
@@ -21,7 +23,9 @@ def create_score_service(score_data):
         dict: Response message and status code.
     """
     try:
-        score = ScoreDAL.create_score(score_data)
+        with unit_of_work():
+            score = ScoreDAL.create_score(score_data)
+        record_score_values(score.category_id, score.score, score.duration)
         return {'status': 'success',
                 'message': 'Score created successfully.',
                 'data': score.to_dict()}, 201
@@ -94,7 +98,16 @@ def update_score_service(score_id, user_id, data):
         Score: The updated Score object.
     """
     try:
-        updated_score = ScoreDAL.update_score(score_id, user_id, data)
+        # The retracted values must be the committed ones, so the old row is
+        # read on the primary inside the transaction that replaces it.
+        with unit_of_work():
+            previous = ScoreDAL.get_score_by_id(user_id, score_id)
+            previous_values = (previous.category_id, previous.score, previous.duration) if previous else None
+            updated_score = ScoreDAL.update_score(score_id, user_id, data)
+
+        if previous_values:
+            record_score_values(*previous_values, count=-1)
+        record_score_values(updated_score.category_id, updated_score.score, updated_score.duration)
         return {'status': 'success',
                 'message': 'Score updated successfully.',
                 'data': updated_score.to_dict()}, 204
@@ -114,7 +127,12 @@ def delete_score_service(user_id, score_id):
         dict: Response message and status code.
     """
     try:
-        result = ScoreDAL.delete_score(score_id, user_id)
+        with unit_of_work():
+            score = ScoreDAL.get_score_by_id(user_id, score_id)
+            previous_values = (score.category_id, score.score, score.duration) if score else None
+            result = ScoreDAL.delete_score(score_id, user_id)
+        if result and previous_values:
+            record_score_values(*previous_values, count=-1)
         if not result:
             return {'status': 'failed',
                     'message': 'Score not found.'}, 404
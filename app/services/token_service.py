@@ -0,0 +1,364 @@
+"""
+Service layer for JWT issuance, refresh-token rotation and revocation.
+
+Access tokens are short-lived (JWT_ACCESS_TOKEN_EXPIRES); clients renew
+them with a refresh token, which is rotated on every use: the presented
+refresh token is revoked and a new pair is issued.
+
+Revoked token IDs (`jti`) are stored in `revoked_tokens`. Each worker
+process keeps a Bloom filter of the unexpired revoked IDs and checks every
+request against it; only a filter hit, i.e. a revoked token or a rare false
+positive, costs a database lookup. A background thread of each worker picks
+up revocations made by other workers with an incremental query every
+TOKEN_REVOCATION_SYNC_SECONDS. It rebuilds the filter every
+TOKEN_REVOCATION_REBUILD_SECONDS, so that expired IDs drop out, and as soon
+as the filter holds TOKEN_BLOOM_REBUILD_FILL of its capacity. A rebuilt
+filter is sized for twice the unexpired revocations (at least
+TOKEN_BLOOM_CAPACITY) and swapped in once it is filled.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from sqlalchemy.exc import IntegrityError
+from app.dal.claim_dal import ClaimDAL
+from app.dal.revoked_token_dal import RevokedTokenDAL
+from app.services.metrics_service import CACHE_LOOKUPS
+from app.logging_config import logger
+
+
+# Revocations are read back with this overlap, so rows committed slightly
+# out of order or stamped by a worker with a skewed clock are not missed.
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings.
+
+    Attributes:
+        capacity (int): The number of items the filter is sized for.
+        count (int): The number of distinct items added, approximately.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """
+        Add an item to the filter.
+
+        Items that were already present do not count again, so re-adding
+        the rows of an overlapping sync does not inflate `count`.
+
+        Args:
+            item (str): The item.
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Per-process view of the token denylist.
+
+    A background thread of each worker process keeps the filter current,
+    so request threads only read it. A rebuild fills a new filter, sized
+    from the number of unexpired revocations, and swaps it in.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._watermark = None
+        self._rebuilt_at = None
+        self._local = None
+        self._app = None
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.filter_hits = 0
+
+    def _needs_rebuild(self):
+        config = self._app.config
+        bloom = self._bloom
+        if bloom is None or self._rebuilt_at is None:
+            return True
+        if time.monotonic() - self._rebuilt_at >= config.get('TOKEN_REVOCATION_REBUILD_SECONDS', 3600):
+            return True
+        # Past its capacity the false positive rate of a filter climbs towards 1.
+        return bloom.count >= bloom.capacity * config.get('TOKEN_BLOOM_REBUILD_FILL', 0.9)
+
+    def _rebuild(self):
+        config = self._app.config
+        started = datetime.utcnow()
+        with self._lock:
+            # Revocations made by this process during the rebuild may be
+            # missing from the query; they are replayed into the new filter.
+            self._local = []
+        try:
+            live = RevokedTokenDAL.count_unexpired(started)
+            bloom = BloomFilter(max(config.get('TOKEN_BLOOM_CAPACITY', 100000), 2 * live),
+                                config.get('TOKEN_BLOOM_ERROR_RATE', 0.001))
+            for jti, _ in RevokedTokenDAL.iter_unexpired_jtis(started):
+                bloom.add(jti)
+        except BaseException:
+            with self._lock:
+                self._local = None
+            raise
+
+        with self._lock:
+            for jti in self._local:
+                bloom.add(jti)
+            self._local = None
+            self._bloom = bloom
+            self._watermark = started
+            self._rebuilt_at = time.monotonic()
+        logger.debug(f"Rebuilt the token denylist filter: {live} revocations, capacity {bloom.capacity}.")
+
+    def _sync(self):
+        started = datetime.utcnow()
+        rows = RevokedTokenDAL.get_jtis_revoked_since(self._watermark - _SYNC_OVERLAP)
+        with self._lock:
+            for jti, _ in rows:
+                self._bloom.add(jti)
+        self._watermark = started
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self._app.app_context():
+                    if self._needs_rebuild():
+                        self._rebuild()
+                    else:
+                        self._sync()
+            except Exception as e:
+                logger.error(f"Error refreshing the token denylist filter: {str(e)}")
+            self._wake.wait(self._app.config.get('TOKEN_REVOCATION_SYNC_SECONDS', 2))
+            self._wake.clear()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            self._app = current_app._get_current_object()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='token-denylist-sync', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def add(self, jti):
+        """
+        Add a token ID revoked by this process to the filter right away.
+
+        Args:
+            jti (str): The unique ID of the token.
+        """
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            if self._local is not None:
+                self._local.append(jti)
+
+    def invalidate(self):
+        """
+        Rebuild the filter in the background as soon as possible.
+        """
+        self._rebuilt_at = None
+        self._wake.set()
+
+    def stop(self):
+        """
+        Stop the background thread of this process.
+        """
+        self._stop.set()
+        self._wake.set()
+
+    def is_revoked(self, jti):
+        """
+        Check whether a token ID is revoked.
+
+        Args:
+            jti (str): The unique ID of the token.
+
+        Returns:
+            bool: True if the token is revoked.
+        """
+        self._ensure_thread()
+        bloom = self._bloom
+        if bloom is not None and jti not in bloom:
+            CACHE_LOOKUPS.inc('token_denylist', 'hit')
+            return False
+        # A filter hit, or no filter built yet in this process.
+        self.filter_hits += 1
+        CACHE_LOOKUPS.inc('token_denylist', 'miss')
+        return RevokedTokenDAL.is_revoked(jti)
+
+
+revocation_list = RevocationList()
+
+
+def init_token_revocation(jwt_manager):
+    """
+    Register the denylist check with the JWT manager.
+
+    Args:
+        jwt_manager (JWTManager): The application's JWT manager.
+    """
+    @jwt_manager.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return revocation_list.is_revoked(jwt_payload['jti'])
+
+
+def issue_tokens(user_id, claims):
+    """
+    Create an access token and a refresh token for a user.
+
+    Args:
+        user_id (int): The ID of the user.
+        claims (dict): The user's claims, added to the access token.
+
+    Returns:
+        dict: The tokens and the validity window of the access token.
+    """
+    iat = datetime.utcnow()
+    exp = iat + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    return {
+        "access_token": create_access_token(identity=user_id, additional_claims=claims),
+        "refresh_token": create_refresh_token(identity=user_id, additional_claims={'user_id': str(user_id)}),
+        "token_type": "Bearer",
+        "iat": iat.isoformat(),
+        "exp": exp.isoformat()
+    }
+
+
+def _revoke(payload):
+    """
+    Stage the revocation of a decoded token.
+    """
+    RevokedTokenDAL.add_revoked_token(
+        jti=payload['jti'],
+        token_type=payload.get('type', 'access'),
+        user_id=int(payload['sub']),
+        revoked_at=datetime.utcnow(),
+        expires_at=datetime.utcfromtimestamp(payload['exp'])
+    )
+
+
+def refresh_tokens(refresh_claims):
+    """
+    Rotate a refresh token: revoke it and issue a new token pair.
+
+    The user's claims are read again, so role changes reach the new access
+    token. A refresh token can be used once; a second use is rejected.
+
+    Args:
+        refresh_claims (dict): The decoded, verified refresh token.
+
+    Returns:
+        tuple: The new tokens and an HTTP status code.
+    """
+    try:
+        user_id = int(refresh_claims['sub'])
+        claims = {claim.type: claim.value for claim in ClaimDAL.get_claims_by_user_id(user_id)}
+        if not claims:
+            msg = "User no longer exists."
+            logger.info(msg)
+            return {"message": msg}, 401
+
+        _revoke(refresh_claims)
+        RevokedTokenDAL.commit_changes()
+        revocation_list.add(refresh_claims['jti'])
+
+        logger.info(f"Refresh token of user ID {user_id} rotated.")
+        return issue_tokens(user_id, claims), 200
+
+    except IntegrityError:
+        msg = "Refresh token has already been used."
+        logger.warning(f"{msg} jti={refresh_claims.get('jti')}")
+        return {"message": msg}, 401
+
+    except Exception as e:
+        msg = f"An unexpected error occurred during token refresh: {str(e)}"
+        logger.error(msg)
+        return {"error": msg}, 500
+
+
+def revoke_tokens(access_claims, refresh_token=None):
+    """
+    Revoke the access token of a request and optionally its refresh token.
+
+    Args:
+        access_claims (dict): The decoded access token of the request.
+        refresh_token (str, optional): An encoded refresh token of the same user.
+
+    Returns:
+        tuple: A response message and an HTTP status code.
+    """
+    try:
+        payloads = [access_claims]
+        if refresh_token:
+            refresh_claims = decode_token(refresh_token)
+            if refresh_claims.get('type') != 'refresh' or refresh_claims['sub'] != access_claims['sub']:
+                msg = "Refresh token does not belong to this session."
+                logger.info(msg)
+                return {"message": msg}, 400
+            payloads.append(refresh_claims)
+
+        for payload in payloads:
+            _revoke(payload)
+        RevokedTokenDAL.commit_changes()
+        for payload in payloads:
+            revocation_list.add(payload['jti'])
+
+        logger.info(f"User ID {access_claims['sub']} logged out.")
+        return {"message": "Successfully logged out."}, 200
+
+    except IntegrityError:
+        msg = "Token has already been revoked."
+        logger.info(msg)
+        return {"message": msg}, 401
+
+    except Exception as e:
+        msg = f"An unexpected error occurred during logout: {str(e)}"
+        logger.error(msg)
+        return {"error": msg}, 500
+
+
+def purge_expired_revocations():
+    """
+    Delete the denylist entries of tokens that have expired.
+
+    Returns:
+        int: The number of deleted entries.
+    """
+    deleted = RevokedTokenDAL.delete_expired(datetime.utcnow())
+    RevokedTokenDAL.commit_changes()
+    return deleted
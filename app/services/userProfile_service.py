@@ -8,21 +8,41 @@ operations.
 """
 
 from app.dal.userProfile_dal import UserProfileDAL
+from app.dal.unit_of_work import unit_of_work
 from app.middleware.helpers import save_profile_picture
+from app.services.media_service import UnsupportedUpload, UploadTooLarge
+from app.middleware.pagination import encode_cursor
+from app.services.reference_data_service import reference_data
 from app.logging_config import logger
 from sqlalchemy.exc import SQLAlchemyError
 
 
-def get_all_profiles():
+def get_all_profiles(page_request):
     """
-    Retrieve all user profiles.
+    Retrieve one page of user profiles.
+
+    Args:
+        page_request (dict): Cursor, page size and filters from `parse_page_request`.
 
     Returns:
-        tuple: A list of user profile data and an HTTP status code.
+        tuple: A dict with the profile data and the next cursor, and an HTTP status code.
     """
     try:
-        users_profiles = UserProfileDAL.get_all_profiles()
-        return [profile.to_dict() for profile in users_profiles], 200
+        filters = dict(page_request)
+        role_name = filters.pop('role')
+        if role_name is not None:
+            role = reference_data.get_role_by_name(role_name)
+            if role is None:
+                return {'items': [], 'next_cursor': None}, 200
+            filters['role_id'] = role.id
+
+        limit = filters['limit']
+        filters['limit'] = limit + 1
+        users_profiles = UserProfileDAL.get_profiles_page(**filters)
+
+        next_cursor = encode_cursor(users_profiles[limit - 1].id) if len(users_profiles) > limit else None
+        return {'items': [profile.to_dict() for profile in users_profiles[:limit]],
+                'next_cursor': next_cursor}, 200
     except Exception as e:
         msg = f'Failed to return users list! \nError: {str(e)}'
         logger.error(msg)
@@ -66,33 +86,33 @@ def update_user_profile(user_id, form_data, files):
         tuple: A response message and an HTTP status code.
     """
     try:
-        user_profile = UserProfileDAL.get_profile_by_user_id(user_id)
+        with unit_of_work():
+            user_profile = UserProfileDAL.get_profile_by_user_id(user_id)
 
-        if user_profile is None:
-            return {"status": "fail", "message": "User profile not found"}, 404
+            if user_profile is None:
+                return {"status": "fail", "message": "User profile not found"}, 404
 
-        profile_picture = files.get('profile_picture')
-        level = form_data.get('level', type=int)
-        experience_points = form_data.get('experience_points', type=int)
+            profile_picture = files.get('profile_picture')
 
-        if profile_picture:
-            filename = save_profile_picture(profile_picture)
-        else:
-            filename = user_profile.profile_picture
+            if profile_picture:
+                filename = save_profile_picture(profile_picture)
+            else:
+                filename = user_profile.profile_picture
 
-        UserProfileDAL.update_user_profile(
-            user_profile=user_profile,
-            profile_picture=filename,
-            level=level,
-            experience_points=experience_points
-        )
-
-        UserProfileDAL.commit_changes()
+            UserProfileDAL.update_user_profile(user_profile=user_profile, profile_picture=filename)
 
         msg = f"User ID: {user_id} details updated successfully."
         logger.info(msg)
         return {'status': 'success', 'message': msg}, 204
 
+    except UploadTooLarge as e:
+        logger.error(f"Error updating profile picture: {str(e)}")
+        return {'status': 'failed', 'message': str(e)}, 413
+
+    except UnsupportedUpload as e:
+        logger.error(f"Error updating profile picture: {str(e)}")
+        return {'status': 'failed', 'message': str(e)}, 415
+
     except SQLAlchemyError as e:
         msg = f"Database error during user update: {str(e)}"
         logger.error(msg)
@@ -0,0 +1,479 @@
+"""
+Service layer for bulk user provisioning.
+
+Users are read from a CSV or NDJSON stream one record at a time and
+processed in batches. For every batch the duplicate check is one query,
+the passwords are hashed across the password pool, and users, profiles
+and claims are written with multi-row INSERT statements in a single
+transaction. The outcome of every input record is written to a CSV result
+file as soon as it is known: rejected records right away, the others when
+their batch is written. Every row carries its input line number.
+
+Bulk hashing uses BCRYPT_LOG_ROUNDS unless BULK_PROVISION_LOG_ROUNDS opts
+into a lower cost; such hashes are upgraded on the user's first login.
+
+Provisioning never runs in a server worker: at full cost it takes far
+longer than a request may. `POST /users/bulk` stores the upload as a job
+under RUNTIME_DIR and starts `flask users run-provisioning-job` in its own
+process, which hashes with a password pool of BULK_PROVISION_POOL_SIZE
+processes. The job's status file and result file can be read by any
+worker while and after it runs.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+from app.dal.user_dal import UserDAL
+from app.dal.claim_dal import ClaimDAL
+from app.dal.unit_of_work import unit_of_work
+from app.runtime_files import ensure_private_dir, open_private_file
+from .claim_service import build_user_claims
+from .password_service import hash_passwords, init_password_pool
+from .reference_data_service import reference_data
+from app.logging_config import logger
+
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+RESULT_FIELDS = ['line', 'username', 'email', 'status', 'user_id', 'message']
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+_job_processes = []
+
+
+def detect_format(filename=None, content_type=None):
+    """
+    Guess the input format from a file name or content type.
+
+    Args:
+        filename (str, optional): The name of the uploaded file.
+        content_type (str, optional): The MIME type of the input.
+
+    Returns:
+        str: CSV or NDJSON. CSV is assumed when nothing points to NDJSON.
+    """
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return NDJSON
+    if content_type and content_type.split(';')[0].strip().lower() in _NDJSON_TYPES:
+        return NDJSON
+    return CSV
+
+
+def iter_records(stream, fmt):
+    """
+    Read provisioning records from a stream one at a time.
+
+    Args:
+        stream (file): A binary or text stream.
+        fmt (str): CSV or NDJSON.
+
+    Returns:
+        Iterator: Tuples of (line number, record dict or None, error message or None).
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    if fmt == CSV:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Each line must be a JSON object."
+            continue
+        yield line_number, record, None
+
+
+def _validate(record):
+    """
+    Check one provisioning record.
+
+    Returns:
+        tuple: The normalized entry and None, or None and an error message.
+    """
+    username = str(record.get('username') or '').strip()
+    email = str(record.get('email') or '').strip()
+    password = record.get('password') or ''
+
+    if not username or not email or not password:
+        return None, "username, email and password are required."
+    if len(username) > 50:
+        return None, "username is longer than 50 characters."
+    if len(email) > 120 or not _EMAIL.match(email):
+        return None, "email is not a valid email address."
+
+    try:
+        level = int(record.get('level') or 1)
+        experience_points = int(record.get('experience_points') or 0)
+    except (TypeError, ValueError):
+        return None, "level and experience_points must be integers."
+
+    return {
+        'username': username,
+        'email': email,
+        'password': str(password),
+        'level': level,
+        'experience_points': experience_points,
+        'role_name': str(record.get('role') or '').strip() or 'Customer',
+    }, None
+
+
+def _insert_batch(entries, log_rounds):
+    """
+    Hash the passwords of a batch and insert its users, profiles and claims.
+
+    Returns:
+        dict: The new user IDs keyed by username.
+    """
+    hashes = hash_passwords([entry['password'] for entry in entries], log_rounds)
+    now = datetime.utcnow()
+
+    with unit_of_work():
+        user_ids = UserDAL.bulk_insert_users([{
+            'username': entry['username'],
+            'email': entry['email'],
+            'password_hash': password_hash,
+            'role_id': entry['role'].id,
+            'created_at': now,
+        } for entry, password_hash in zip(entries, hashes)])
+
+        UserDAL.bulk_insert_profiles([{
+            'user_id': user_ids[entry['username']],
+            'profile_picture': 'default.jpg',
+            'level': entry['level'],
+            'experience_points': entry['experience_points'],
+        } for entry in entries])
+
+        claims = []
+        for entry in entries:
+            claims.extend(build_user_claims(user_ids[entry['username']], entry['username'],
+                                            entry['email'], entry['role'].name))
+        ClaimDAL.bulk_insert_claims(claims)
+
+    return user_ids
+
+
+def _provision_batch(batch, log_rounds):
+    """
+    Provision one batch of validated entries.
+
+    Args:
+        batch (list): Tuples of (line number, entry).
+        log_rounds (int): The bcrypt cost factor.
+
+    Returns:
+        list: Result rows, in input order.
+    """
+    taken_usernames, taken_emails = UserDAL.get_taken_usernames_and_emails(
+        [entry['username'] for _, entry in batch], [entry['email'] for _, entry in batch])
+    roles = {role.name: role for role in reference_data.get_all_roles()}
+
+    results = {}
+    accepted = []
+    for line, entry in batch:
+        entry['role'] = roles.get(entry['role_name'])
+        if entry['role'] is None:
+            results[line] = (entry, 'failed', None, f"Role '{entry['role_name']}' not found.")
+            continue
+        if entry['username'] in taken_usernames or entry['email'] in taken_emails:
+            results[line] = (entry, 'failed', None, 'Email or username already exists.')
+            continue
+        taken_usernames.add(entry['username'])
+        taken_emails.add(entry['email'])
+        accepted.append((line, entry))
+
+    if accepted:
+        try:
+            user_ids = _insert_batch([entry for _, entry in accepted], log_rounds)
+            for line, entry in accepted:
+                results[line] = (entry, 'created', user_ids[entry['username']], '')
+        except Exception as e:
+            logger.error(f"Error provisioning users of lines {accepted[0][0]}-{accepted[-1][0]}: {str(e)}")
+            for line, entry in accepted:
+                results[line] = (entry, 'failed', None, str(e))
+
+    return [{
+        'line': line,
+        'username': entry['username'],
+        'email': entry['email'],
+        'status': status,
+        'user_id': user_id,
+        'message': message,
+    } for line, (entry, status, user_id, message) in sorted(results.items())]
+
+
+def provision_users(stream, fmt, output, progress=None):
+    """
+    Create users in bulk from a CSV or NDJSON stream.
+
+    Each record has `username`, `email` and `password` and optionally
+    `level`, `experience_points` and `role` (default 'Customer'). Every
+    batch is its own transaction; a failing batch does not undo earlier ones.
+    Meant for a process that serves no requests: the password pool of the
+    process is resized to BULK_PROVISION_POOL_SIZE and used in full.
+
+    Args:
+        stream (file): The input stream.
+        fmt (str): CSV or NDJSON.
+        output (file): A text stream receiving the CSV result rows.
+        progress (callable, optional): Called with the summary after every batch.
+
+    Returns:
+        dict: The number of created and failed records.
+    """
+    config = current_app.config
+    batch_size = config.get('BULK_PROVISION_BATCH_SIZE', 1000)
+    log_rounds = config.get('BCRYPT_LOG_ROUNDS', 12)
+    if config.get('BULK_PROVISION_LOG_ROUNDS'):
+        log_rounds = min(config['BULK_PROVISION_LOG_ROUNDS'], log_rounds)
+    init_password_pool(current_app, pool_size=config.get('BULK_PROVISION_POOL_SIZE', 1), dedicated=True)
+
+    writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS)
+    writer.writeheader()
+    summary = {'created': 0, 'failed': 0}
+    pending = []
+
+    def write(row):
+        writer.writerow(row)
+        summary[row['status']] += 1
+
+    def flush():
+        if pending:
+            for row in _provision_batch(pending, log_rounds):
+                write(row)
+            if progress is not None:
+                progress(summary)
+        pending.clear()
+
+    for line, record, error in iter_records(stream, fmt):
+        entry = None
+        if error is None:
+            entry, error = _validate(record)
+        if error is not None:
+            record = record or {}
+            write({'line': line, 'username': record.get('username'), 'email': record.get('email'),
+                   'status': 'failed', 'user_id': None, 'message': error})
+            continue
+
+        pending.append((line, entry))
+        if len(pending) >= batch_size:
+            flush()
+
+    flush()
+    logger.info(f"Bulk provisioning finished: {summary['created']} created, {summary['failed']} failed.")
+    return summary
+
+
+def _jobs_dir():
+    config = current_app.config
+    return ensure_private_dir(config.get('BULK_PROVISION_JOB_DIR')
+                              or os.path.join(config['RUNTIME_DIR'], 'provisioning'))
+
+
+def _job_path(job_id, suffix):
+    return os.path.join(_jobs_dir(), job_id + suffix)
+
+
+def _write_job(job):
+    path = _job_path(job['id'], '.json')
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with os.fdopen(open_private_file(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC), 'w',
+                   encoding='utf-8') as file:
+        json.dump(job, file)
+    os.replace(temp_path, path)
+
+
+def _read_job(job_id):
+    try:
+        fd = open_private_file(_job_path(job_id, '.json'), os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    with os.fdopen(fd, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _process_alive(pid):
+    # Reap finished job processes started by this worker first, so that
+    # they do not linger as zombies that still look alive.
+    _job_processes[:] = [process for process in _job_processes if process.poll() is None]
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _purge_old_jobs(directory, max_age):
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.lstat(path).st_mtime < cutoff:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _start_job_process(job_id):
+    _job_processes[:] = [process for process in _job_processes if process.poll() is None]
+    _job_processes.append(subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', current_app.import_name,
+         'users', 'run-provisioning-job', job_id],
+        cwd=os.path.dirname(current_app.root_path),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True))
+
+
+def submit_provisioning_job(stream, fmt):
+    """
+    Store a provisioning input and start a job process for it.
+
+    Args:
+        stream (file): The binary input stream.
+        fmt (str): CSV or NDJSON.
+
+    Returns:
+        dict: The job status, including its `id`.
+    """
+    directory = _jobs_dir()
+    _purge_old_jobs(directory, current_app.config.get('BULK_PROVISION_JOB_RETENTION_DAYS', 7) * 86400)
+
+    job_id = uuid.uuid4().hex
+    with os.fdopen(open_private_file(_job_path(job_id, '.input'), os.O_WRONLY | os.O_CREAT | os.O_EXCL),
+                   'wb') as file:
+        shutil.copyfileobj(stream, file)
+
+    job = {
+        'id': job_id,
+        'status': QUEUED,
+        'format': fmt,
+        'created': 0,
+        'failed': 0,
+        'message': '',
+        'submitted_at': datetime.utcnow().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'pid': None,
+    }
+    _write_job(job)
+    try:
+        _start_job_process(job_id)
+    except OSError as e:
+        job.update(status=FAILED, message=f"Could not start the provisioning process: {str(e)}")
+        _write_job(job)
+    logger.info(f"Provisioning job {job_id} submitted.")
+    return job
+
+
+def run_provisioning_job(job_id):
+    """
+    Run a queued provisioning job in the current process.
+
+    The job status is updated after every batch; the result rows are
+    written to the job's result file.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        dict: The final job status.
+
+    Raises:
+        ValueError: If the job does not exist or is not queued.
+    """
+    job = get_provisioning_job(job_id)
+    if job is None:
+        raise ValueError(f"Provisioning job {job_id} not found.")
+    if job['status'] != QUEUED:
+        raise ValueError(f"Provisioning job {job_id} is {job['status']}.")
+
+    job.update(status=RUNNING, pid=os.getpid(), started_at=datetime.utcnow().isoformat())
+    _write_job(job)
+
+    def progress(summary):
+        job.update(summary)
+        _write_job(job)
+
+    input_path = _job_path(job_id, '.input')
+    try:
+        with os.fdopen(open_private_file(input_path, os.O_RDONLY), 'rb') as source, \
+                os.fdopen(open_private_file(_job_path(job_id, '.csv'), os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+                          'w', encoding='utf-8', newline='') as output:
+            job.update(provision_users(source, job['format'], output, progress=progress))
+        job['status'] = FINISHED
+    except Exception as e:
+        logger.error(f"Provisioning job {job_id} failed: {str(e)}")
+        job.update(status=FAILED, message=str(e))
+    finally:
+        job['finished_at'] = datetime.utcnow().isoformat()
+        _write_job(job)
+        try:
+            os.unlink(input_path)
+        except FileNotFoundError:
+            pass
+    return job
+
+
+def get_provisioning_job(job_id):
+    """
+    Read the status of a provisioning job.
+
+    A running job whose process has gone, e.g. killed by the OS, is
+    reported as failed.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        dict: The job status, or None if there is no such job.
+    """
+    if not _JOB_ID.match(job_id or ''):
+        return None
+    job = _read_job(job_id)
+    if job is not None and job['status'] == RUNNING and not _process_alive(job['pid']):
+        job.update(status=FAILED, message="The provisioning process exited before the job finished.")
+    return job
+
+
+def get_provisioning_results_path(job_id):
+    """
+    Locate the result file of a finished provisioning job.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        str: The path of the CSV result file, or None if the job has not finished.
+    """
+    job = get_provisioning_job(job_id)
+    if job is None or job['status'] != FINISHED:
+        return None
+    return _job_path(job_id, '.csv')
@@ -6,32 +6,38 @@ updating, and deletion, utilizing the Data Access Layer (DAL) to
 perform database operations.
 """
 
-from datetime import datetime, timedelta
-from flask_jwt_extended import create_access_token
+from datetime import datetime
+from flask import current_app
 from app.models.user import User
 from app.dal.user_dal import UserDAL
-from app.models.claim import Claim
+from app.dal.unit_of_work import unit_of_work
 from app.models.userProfile import UserProfile
 from .claim_service import create_claims_for_user
-from app.middleware.helpers import save_profile_picture, allowed_file
+from .password_service import PasswordPoolBusy, needs_rehash
+from .reference_data_service import reference_data
+from .last_seen_service import last_seen
+from .token_service import issue_tokens
+from .media_service import UnsupportedUpload, UploadTooLarge
+from app.middleware.helpers import stage_uploaded_profile_picture, publish_uploaded_profile_picture
+from app.middleware.pagination import encode_cursor
 from app.logging_config import logger
 
 
 def login(data):
     """
-    Authenticate a user and generate an access token.
+    Authenticate a user and generate an access token and a refresh token.
 
     Args:
         data (dict): A dictionary containing username and password.
 
     Returns:
-        tuple: A response containing an access token and an HTTP status code.
+        tuple: A response containing the tokens and an HTTP status code.
     """
     try:
         username = data.get("username")
         password = data.get("password")
 
-        user = UserDAL.get_user_by_username(username)
+        user = UserDAL.get_user_with_claims_by_username(username)
 
         if user is None:
             msg = "Username invalid"
@@ -43,32 +49,25 @@ def login(data):
             logger.info(msg)
             return {"message": msg}, 401
 
-        user.last_login = datetime.utcnow()
-        UserDAL.commit_changes()
+        user_id = user.id
+        all_claims = {claim.type: claim.value for claim in user.claims}
 
-        user_claims = Claim.query.filter_by(user_id=user.id).all()
-
-        iat = datetime.utcnow()
-        exp = iat + timedelta(hours=24)
-
-        additional_claims = {
-            'iat': iat,
-            "exp": exp,
-        }
-
-        all_claims = {claim.type: claim.value for claim in user_claims}
-        all_claims.update(additional_claims)
+        # Accounts provisioned in bulk may use a cheaper cost factor; upgrade
+        # them to the configured one on their first login.
+        if needs_rehash(user.password_hash):
+            user.set_password(password)
+            UserDAL.commit_changes()
 
-        access_token = create_access_token(identity=user.id, additional_claims=all_claims)
+        last_seen.record(current_app._get_current_object(), user_id, datetime.utcnow())
 
         logger.info(f"User '{username}' logged in successfully.")
 
-        return {
-            "access_token": access_token,
-            "token_type": "Bearer",
-            "iat": iat.isoformat(),
-            "exp": exp.isoformat()
-        }, 200
+        return issue_tokens(user_id, all_claims), 200
+
+    except PasswordPoolBusy as e:
+        msg = f"Login is temporarily unavailable: {str(e)}"
+        logger.warning(msg)
+        return {"message": msg}, 503
 
     except Exception as e:
         msg = f"An unexpected error occurred during login: {str(e)}"
@@ -87,6 +86,7 @@ def create_user(data, files):
     Returns:
         tuple: A response containing user data and an HTTP status code.
     """
+    staged_picture = None
     try:
         username = data.get('username')
         email = data.get('email')
@@ -95,7 +95,6 @@ def create_user(data, files):
         level = data.get('level', 1)
         experience_points = data.get('experience_points', 0)
 
-        print("password:",password)
         if not password:
             raise ValueError("Password must be non-empty.")
 
@@ -105,12 +104,19 @@ def create_user(data, files):
             logger.error(msg)
             return {'status': 'fail', 'message': msg}, 409
 
-        user_role = UserDAL.get_role_by_name('Customer')
+        user_role = reference_data.get_role_by_name('Customer')
         if not user_role:
             msg = 'User role not found.'
             logger.error(msg)
             return {'status': 'fail', 'message': msg}, 500
 
+        # The picture is only received here; it is stored once the user is
+        # committed, so a failed signup leaves no file behind.
+        filename = 'default.jpg'
+        staged_picture = stage_uploaded_profile_picture(profile_picture)
+        if staged_picture is not None:
+            filename = staged_picture.content_name()
+
         new_user = User(
             username=username,
             email=email,
@@ -121,29 +127,26 @@ def create_user(data, files):
 
         new_user.set_password(password)
 
-        UserDAL.add_user(new_user)
-        UserDAL.commit_changes()
-
-        filename = 'default.jpg'
-        if profile_picture and allowed_file(profile_picture.filename):
-            filename = save_profile_picture(profile_picture)
-
-        new_user_profile = UserProfile(
-            user_id=new_user.id,
+        new_user.profile = UserProfile(
             profile_picture=filename,
             level=level,
             experience_points=experience_points
         )
 
-        UserDAL.add_user_profile(new_user_profile)
-        UserDAL.commit_changes()
+        # The user, its profile and its claims are committed together.
+        with unit_of_work():
+            UserDAL.add_user(new_user)
+            UserDAL.commit_changes()
 
-        create_claims_for_user(
-            user_id=new_user.id,
-            username=username,
-            email=email,
-            role_name=user_role.name
-        )
+            create_claims_for_user(
+                user_id=new_user.id,
+                username=username,
+                email=email,
+                role_name=user_role.name
+            )
+
+        if staged_picture is not None:
+            publish_uploaded_profile_picture(staged_picture)
 
         logger.info('New user successfully created.')
         return {'status': 'success', 'message': 'Successfully created.', 'data': new_user.to_dict()}, 201
@@ -152,24 +155,48 @@ def create_user(data, files):
         logger.error(f'Error creating user: {str(e)}')
         return {'status': 'failed', 'message': str(e)}, 400
 
+    except UploadTooLarge as e:
+        logger.error(f'Error creating user: {str(e)}')
+        return {'status': 'failed', 'message': str(e)}, 413
+
+    except UnsupportedUpload as e:
+        logger.error(f'Error creating user: {str(e)}')
+        return {'status': 'failed', 'message': str(e)}, 415
+
     except Exception as e:
         logger.error(f'Error creating user: {str(e)}')
         return {'status': 'failed', 'message': str(e)}, 500
 
+    finally:
+        if staged_picture is not None:
+            staged_picture.close()
+
 
-def get_users():
+def get_users(page_request):
     """
-    Retrieve all users.
+    Retrieve one page of users.
+
+    Args:
+        page_request (dict): Cursor, page size and filters from `parse_page_request`.
 
     Returns:
-        tuple: A list of user data and an HTTP status code.
+        tuple: A dict with the user data and the next cursor, and an HTTP status code.
     """
     try:
-        users = UserDAL.get_all_users()
-        if not users:
-            return [], 200
-        users_list = [user.to_dict() for user in users]
-        return users_list, 200
+        filters = dict(page_request)
+        role_name = filters.pop('role')
+        if role_name is not None:
+            role = reference_data.get_role_by_name(role_name)
+            if role is None:
+                return {'items': [], 'next_cursor': None}, 200
+            filters['role_id'] = role.id
+
+        limit = filters['limit']
+        filters['limit'] = limit + 1
+        users = UserDAL.get_users_page(**filters)
+
+        next_cursor = encode_cursor(users[limit - 1].id) if len(users) > limit else None
+        return {'items': [user.to_dict() for user in users[:limit]], 'next_cursor': next_cursor}, 200
     except Exception as e:
         logger.error(f'Error fetching users: {str(e)}')
         return {'status': 'failed', 'message': str(e)}, 500
@@ -210,27 +237,29 @@ def update_user(user_id, data):
         email = data.get('email')
         password = data.get('password')
 
-        user = UserDAL.get_user_by_id(user_id)
-
-        if user is None:
-            msg = f"User ID: {user_id} not found."
-            logger.info(msg)
-            return {'status': 'fail', 'message': msg}, 404
+        # Read the row on the primary: a lagging replica could miss it or
+        # return values this update would then write back.
+        with unit_of_work():
+            user = UserDAL.get_user_by_id(user_id)
 
-        if email:
-            existing_user_with_email = UserDAL.get_user_by_email(email)
-            if existing_user_with_email and existing_user_with_email.id != user_id:
-                msg = f"Email '{email}' already exists. Please choose a different email."
+            if user is None:
+                msg = f"User ID: {user_id} not found."
                 logger.info(msg)
-                return {'status': 'fail', 'message': msg}, 400
+                return {'status': 'fail', 'message': msg}, 404
+
+            if email:
+                existing_user_with_email = UserDAL.get_user_by_email(email)
+                if existing_user_with_email and existing_user_with_email.id != user_id:
+                    msg = f"Email '{email}' already exists. Please choose a different email."
+                    logger.info(msg)
+                    return {'status': 'fail', 'message': msg}, 400
 
-        password_hash = user.password_hash
-        if password:
-            user.set_password(password)
             password_hash = user.password_hash
+            if password:
+                user.set_password(password)
+                password_hash = user.password_hash
 
-        UserDAL.update_user(user, email=email, password_hash=password_hash)
-        UserDAL.commit_changes()
+            UserDAL.update_user(user, email=email, password_hash=password_hash)
 
         msg = f"User ID: {user_id} details updated successfully."
         logger.info(msg)
@@ -253,12 +282,12 @@ def delete_user(user_id):
         tuple: A response message and an HTTP status code.
     """
     try:
-        user = UserDAL.get_user_by_id(user_id)
-        if not user:
-            return {'status': 'fail', 'message': f'User ID: {user_id} not found.'}, 404
+        with unit_of_work():
+            user = UserDAL.get_user_by_id(user_id)
+            if not user:
+                return {'status': 'fail', 'message': f'User ID: {user_id} not found.'}, 404
 
-        UserDAL.delete_user(user)
-        UserDAL.commit_changes()
+            UserDAL.delete_user(user)
 
         return {'status': 'success', 'message': f'User ID: {user_id} deleted successfully.'}, 204
 
@@ -0,0 +1,139 @@
+"""
+Per-process buffers that coalesce frequent small writes.
+
+A buffer collects values per key in memory and a background thread of each
+worker process writes them in batches at a configurable interval. Values
+recorded for the same key between two flushes are merged, so they cost a
+single row update. Pending values are also written when the process exits.
+"""
+
+import atexit
+import os
+import threading
+from abc import ABC, abstractmethod
+from app.logging_config import logger
+
+
+class CoalescingBuffer(ABC):
+    """
+    Base class of write buffers; subclasses define `_merge` and `_write`.
+
+    Attributes:
+        description (str): What is written, for log messages.
+        thread_name (str): Name of the flush thread.
+        interval_setting (str): The setting holding the flush interval in seconds.
+        default_interval (float): The interval used when the setting is missing.
+    """
+
+    description = 'values'
+    thread_name = 'write-buffer-flush'
+    interval_setting = None
+    default_interval = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._app = None
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        atexit.register(self.flush_on_exit)
+
+    @abstractmethod
+    def _merge(self, current, value):
+        """
+        Combine a pending value with a new one for the same key.
+        """
+
+    @abstractmethod
+    def _write(self, pending):
+        """
+        Write and commit pending values; requires an application context.
+        """
+
+    def record(self, app, key, value):
+        """
+        Record a value to be written.
+
+        Args:
+            app (Flask): The Flask application, used by the flush thread.
+            key: The key the value is merged under, e.g. a user ID.
+            value: The value.
+        """
+        with self._lock:
+            current = self._pending.get(key)
+            self._pending[key] = value if current is None else self._merge(current, value)
+            self._app = app
+        self._ensure_thread()
+
+    def pending_count(self):
+        """
+        Return the number of keys with unwritten values.
+
+        Returns:
+            int: The number of pending keys.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Write every pending value.
+
+        Requires an application context. Values are put back if the write
+        fails, so they are retried on the next flush.
+
+        Returns:
+            int: The number of keys written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        try:
+            self._write(pending)
+            logger.debug(f"Wrote {len(pending)} pending {self.description}.")
+            return len(pending)
+        except Exception as e:
+            logger.error(f"Error writing {self.description}: {str(e)}")
+            with self._lock:
+                for key, value in pending.items():
+                    current = self._pending.get(key)
+                    self._pending[key] = value if current is None else self._merge(value, current)
+            raise
+
+    def flush_on_exit(self):
+        """
+        Stop the flush thread and write pending values.
+        """
+        self._stop.set()
+        if self._app is None:
+            return
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            logger.error(f"Error writing {self.description} on exit: {str(e)}")
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        interval = self._app.config.get(self.interval_setting, self.default_interval)
+        while not self._stop.wait(interval):
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception:
+                # Already logged by flush; the values are retried next time.
+                pass
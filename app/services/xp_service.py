@@ -0,0 +1,139 @@
+"""
+Service layer for experience point awards.
+
+Awards are deltas applied with an atomic
+`experience_points = experience_points + :points` update, so two games
+finishing at once cannot overwrite each other's points. Levels are derived
+on the server from the experience points with the curve
+
+    points needed for level L = XP_LEVEL_BASE * (L - 1) ** XP_LEVEL_EXPONENT
+
+capped at XP_MAX_LEVEL, and only ever go up.
+
+With XP_AWARD_FLUSH_SECONDS set, awards are summed per user in memory and
+written by a background thread at that interval, one batched update for all
+users awarded in the window.
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from flask import current_app
+from app.dal.userProfile_dal import UserProfileDAL
+from app.services.write_buffer import CoalescingBuffer
+from app.logging_config import logger
+
+
+@lru_cache(maxsize=8)
+def level_thresholds(base, exponent, max_level):
+    """
+    Return the experience points needed for every level.
+
+    Args:
+        base (float): Points needed for level 2.
+        exponent (float): Growth of the curve.
+        max_level (int): The highest level.
+
+    Returns:
+        tuple: Points needed for levels 1 to `max_level`.
+    """
+    return tuple(round(base * (level - 1) ** exponent) for level in range(1, max_level + 1))
+
+
+def _current_thresholds():
+    config = current_app.config
+    return level_thresholds(config.get('XP_LEVEL_BASE', 100), config.get('XP_LEVEL_EXPONENT', 1.5),
+                            config.get('XP_MAX_LEVEL', 100))
+
+
+def level_for_experience(experience_points):
+    """
+    Return the level reached with an amount of experience points.
+
+    Args:
+        experience_points (int): The experience points.
+
+    Returns:
+        int: The level, at least 1.
+    """
+    return max(1, bisect_right(_current_thresholds(), experience_points or 0))
+
+
+def _apply_awards(awards):
+    """
+    Add experience points to users and raise their levels, in one transaction.
+
+    Args:
+        awards (dict): Points to add keyed by user ID.
+
+    Returns:
+        dict: {'experience_points', 'level', 'previous_level'} keyed by the
+        IDs of the users that have a profile.
+    """
+    rows = UserProfileDAL.add_experience_points(awards)
+    results = {}
+    level_ups = {}
+    for user_id, experience_points, level in rows:
+        new_level = max(level or 1, level_for_experience(experience_points))
+        if new_level != level:
+            level_ups[user_id] = new_level
+        results[user_id] = {'experience_points': experience_points, 'level': new_level, 'previous_level': level}
+    UserProfileDAL.raise_levels(level_ups)
+    UserProfileDAL.commit_changes()
+    return results
+
+
+class XpAwardBuffer(CoalescingBuffer):
+    """
+    Per-process buffer of experience points not yet written.
+    """
+
+    description = 'experience points'
+    thread_name = 'xp-award-flush'
+    interval_setting = 'XP_AWARD_FLUSH_SECONDS'
+    default_interval = 1
+
+    def _merge(self, current, value):
+        return current + value
+
+    def _write(self, pending):
+        _apply_awards(pending)
+
+
+xp_awards = XpAwardBuffer()
+
+
+def award_experience(user_id, points):
+    """
+    Award experience points to a user.
+
+    Args:
+        user_id (int): The ID of the user.
+        points (int): The points to add, positive.
+
+    Returns:
+        tuple: The user's new experience points and level (or, when awards
+        are coalesced, an acknowledgement) and an HTTP status code.
+    """
+    try:
+        if current_app.config.get('XP_AWARD_FLUSH_SECONDS'):
+            xp_awards.record(current_app._get_current_object(), user_id, points)
+            return {'status': 'accepted', 'user_id': user_id, 'points': points}, 202
+
+        result = _apply_awards({user_id: points}).get(user_id)
+        if result is None:
+            return {'status': 'fail', 'message': 'User profile not found'}, 404
+
+        if result['level'] != result['previous_level']:
+            logger.info(f"User ID {user_id} reached level {result['level']}.")
+        return {
+            'status': 'success',
+            'user_id': user_id,
+            'experience_points': result['experience_points'],
+            'level': result['level'],
+            'levels_gained': result['level'] - (result['previous_level'] or 1)
+        }, 200
+
+    except Exception as e:
+        msg = f"An unexpected error occurred while awarding experience points: {str(e)}"
+        logger.error(msg)
+        return {'status': 'failed', 'message': msg}, 500
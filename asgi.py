@@ -0,0 +1,48 @@
+"""
+ASGI entry point.
+
+The application itself is synchronous; the adapter runs every request on a
+thread pool of ASGI_THREADS threads per worker, so slow AI requests wait on
+a thread instead of occupying a whole worker process. Serve with the
+bundled Gunicorn configuration:
+
+    WORKER_CLASS=asgi.UvicornWorker APP_MODULE=asgi:app gunicorn
+"""
+
+import os
+import signal
+import sys
+try:
+    from a2wsgi import WSGIMiddleware
+    from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+except ImportError as e:
+    raise ImportError(f"The ASGI mode needs uvicorn and a2wsgi (pip install -r requirements.txt): {e}") from e
+from wsgi import app as flask_app
+
+
+app = WSGIMiddleware(flask_app, workers=int(os.getenv('ASGI_THREADS', 10)))
+
+
+def _exit_worker(signum, frame):
+    sys.exit(0)
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    Uvicorn worker for the WSGI application.
+
+    Turns off the lifespan protocol, which WSGI apps do not speak, and keeps
+    the graceful shutdown of `gunicorn.conf.py` working. Uvicorn's own proxy
+    header handling is off; the app's PROXY_FIX_X_FOR setting decides which
+    forwarded addresses are trusted in both modes.
+    """
+
+    CONFIG_KWARGS = {'loop': 'auto', 'http': 'auto', 'lifespan': 'off', 'proxy_headers': False}
+
+    def init_signals(self):
+        super().init_signals()
+        # Uvicorn re-raises the stop signal once it has drained its
+        # connections. Exit normally instead of being killed by it, so that
+        # Gunicorn still runs the worker_exit hook.
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, _exit_worker)
@@ -0,0 +1,97 @@
+"""
+Authentication overhead benchmark.
+
+Compares the per-request cost of the previous stacked decorators
+(`@jwt_required()` followed by an admin check that verifies the token
+again) with the single-pass `auth_required` policy layer. Both variants
+guard an empty view so only authentication is measured.
+
+    python benchmarks/auth_overhead.py --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+from functools import wraps
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def legacy_admin_required():
+    from flask import jsonify
+    from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = get_jwt()
+            if claims['role'] and claims['role'] == 'Admin':
+                return fn(*args, **kwargs)
+            return jsonify(msg='Permission denied. Admins only!'), 403
+        return decorator
+    return wrapper
+
+
+def build_app():
+    from flask import Flask
+    from flask_jwt_extended import JWTManager, jwt_required, create_access_token
+    from app.middleware.auth import auth_required, ADMIN
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-that-is-long-enough'
+    JWTManager(app)
+
+    @app.route('/stacked')
+    @jwt_required()
+    @legacy_admin_required()
+    def stacked():
+        return ''
+
+    @app.route('/single-pass')
+    @auth_required(ADMIN)
+    def single_pass():
+        return ''
+
+    @app.route('/unauthenticated')
+    def unauthenticated():
+        return ''
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'user_id': '1', 'role': 'Admin'})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def measure(client, path, headers, requests):
+    for _ in range(min(requests, 200)):
+        client.get(path, headers=headers)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    app, headers = build_app()
+    client = app.test_client()
+
+    baseline = measure(client, '/unauthenticated', headers, args.requests)
+    stacked = measure(client, '/stacked', headers, args.requests)
+    single_pass = measure(client, '/single-pass', headers, args.requests)
+
+    print(f"requests per variant: {args.requests}")
+    print(f"no auth (baseline):     {baseline * 1e6:8.1f} us/request")
+    print(f"stacked decorators:     {stacked * 1e6:8.1f} us/request  "
+          f"(auth overhead {(stacked - baseline) * 1e6:.1f} us)")
+    print(f"single-pass policy:     {single_pass * 1e6:8.1f} us/request  "
+          f"(auth overhead {(single_pass - baseline) * 1e6:.1f} us)")
+
+
+if __name__ == '__main__':
+    main()
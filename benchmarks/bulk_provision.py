@@ -0,0 +1,91 @@
+"""
+Bulk user provisioning benchmark.
+
+Generates a CSV of users, posts it to POST /users/bulk against an
+application backed by a temporary SQLite database, waits for the
+provisioning job to finish and reports the wall time and the users
+created per second:
+
+    python benchmarks/bulk_provision.py --users 10000 --pool-size 4 --rounds 8
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def build_app(args, folder):
+    # The provisioning job runs in its own process, which reads its settings
+    # from the environment.
+    os.environ.update({
+        'SECRET_KEY': 'benchmark-secret-key-that-is-long-enough',
+        'DATABASE_URL': f"sqlite:///{os.path.join(folder, 'benchmark.db')}",
+        'RUNTIME_DIR': os.path.join(folder, 'var'),
+        'BULK_PROVISION_POOL_SIZE': str(args.pool_size),
+        'BULK_PROVISION_LOG_ROUNDS': str(args.rounds),
+        'BULK_PROVISION_BATCH_SIZE': str(args.batch_size),
+    })
+    from app import create_app, db
+    from app.config import Config
+
+    class BenchmarkConfig(Config):
+        MAX_CONTENT_LENGTH = 64 * 1024 * 1024
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        from app.models.role import Role
+        from app.services.reference_data_service import reference_data
+        db.session.add_all([Role(name='Admin'), Role(name='Customer')])
+        db.session.commit()
+        reference_data.load()
+    return app
+
+
+def admin_token(app):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        return create_access_token(identity='0', additional_claims={'user_id': '0', 'role': 'Admin'})
+
+
+def make_csv(users):
+    lines = ['username,email,password']
+    lines.extend(f'user{i},user{i}@example.com,password-{i}' for i in range(users))
+    return '\n'.join(lines).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--pool-size', type=int, default=os.cpu_count() or 1, help='0 hashes inline')
+    parser.add_argument('--rounds', type=int, default=8, help='bcrypt cost factor of provisioned users')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        app = build_app(args, folder)
+        token = admin_token(app)
+        headers = {'Authorization': f'Bearer {token}'}
+        payload = make_csv(args.users)
+        client = app.test_client()
+
+        started = time.perf_counter()
+        response = client.post('/users/bulk', data={'file': (io.BytesIO(payload), 'users.csv')}, headers=headers)
+        location = response.headers['Location']
+        job = client.get(location, headers=headers).get_json()
+        while job['status'] in ('queued', 'running'):
+            time.sleep(0.2)
+            job = client.get(location, headers=headers).get_json()
+        elapsed = time.perf_counter() - started
+
+    print(f"users={args.users} pool_size={args.pool_size} rounds={args.rounds} batch_size={args.batch_size}")
+    print(f"status: {job['status']}  created: {job['created']}  failed: {job['failed']}")
+    print(f"elapsed: {elapsed:.2f} s  throughput: {args.users / elapsed:.0f} users/s")
+
+
+if __name__ == '__main__':
+    main()
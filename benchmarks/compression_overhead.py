@@ -0,0 +1,76 @@
+"""
+Response compression benchmark.
+
+Serves a JSON list shaped like `GET /questions` and measures, per encoding
+and level, the response size and the time per request including the
+compression:
+
+    python benchmarks/compression_overhead.py --items 500 --requests 500
+
+Brotli is only measured when the `brotli` package is installed.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def build_client(items, **config):
+    from flask import Flask, jsonify
+    from app.middleware.compression import init_compression
+
+    app = Flask(__name__)
+    app.config.update(COMPRESSION_ENABLED=True, COMPRESSION_ALGORITHMS=('br', 'gzip'), COMPRESSION_MIN_BYTES=1024,
+                      **config)
+    init_compression(app)
+    payload = [{
+        'id': index,
+        'question_text': f"Which planet is number {index % 8 + 1} from the sun?",
+        'answer': f"Planet {index % 8 + 1}",
+        'options': ['Mercury', 'Venus', 'Earth', 'Mars'],
+        'difficulty': ('EASY', 'MEDIUM', 'HARD')[index % 3],
+        'category_id': index % 12 + 1,
+        'is_ai_generated': bool(index % 2),
+        'created_at': f"2026-01-{index % 28 + 1:02d}T12:00:00",
+    } for index in range(items)]
+
+    @app.route('/questions')
+    def questions():
+        return jsonify(payload)
+
+    return app.test_client()
+
+
+def measure(client, encoding, requests):
+    headers = {'Accept-Encoding': encoding}
+    size = len(client.get('/questions', headers=headers).data)
+    for _ in range(min(requests, 50)):
+        client.get('/questions', headers=headers)
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get('/questions', headers=headers)
+    return size, (time.perf_counter() - started) / requests * 1000
+
+
+def main():
+    from app.middleware.compression import brotli
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500, help='questions in the response')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    variants = [('identity', 'identity', {})]
+    variants += [(f'gzip level {level}', 'gzip', dict(COMPRESSION_GZIP_LEVEL=level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        variants += [(f'br quality {quality}', 'br', dict(COMPRESSION_BROTLI_QUALITY=quality)) for quality in (1, 4, 9)]
+    for name, encoding, config in variants:
+        size, milliseconds = measure(build_client(args.items, **config), encoding, args.requests)
+        print(f"{name + ':':18} {size:9d} bytes {milliseconds:8.3f} ms per request")
+
+
+if __name__ == '__main__':
+    main()
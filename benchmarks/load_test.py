@@ -0,0 +1,142 @@
+"""
+HTTP load test against a running server.
+
+Registers a user, logs in, and then keeps `--concurrency` clients busy for
+`--duration` seconds with a mix of authenticated reads and a share of
+logins (bcrypt, the slowest route). Each client holds one keep-alive
+connection. Prints throughput and latency percentiles overall and per
+route:
+
+    gunicorn &
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 32 --duration 30
+
+Disable rate limiting on the server (RATE_LIMIT_ENABLED=false) or the
+logins are throttled.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+
+class Client:
+    """
+    One keep-alive HTTP connection.
+    """
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers or {})
+                response = self.connection.getresponse()
+                data = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                # A recycled worker closes its keep-alive connections.
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def register_user(url):
+    client = Client(url)
+    name = f"load{uuid.uuid4().hex[:10]}"
+    password = 'load-test-password'
+    status, data = client.request('POST', '/users', urlencode({
+        'username': name, 'email': f'{name}@example.com', 'password': password,
+    }), {'Content-Type': 'application/x-www-form-urlencoded'})
+    if status != 201:
+        raise SystemExit(f"Could not register the load test user: {status} {data[:200]!r}")
+    user_id = json.loads(data)['data']['id']
+    login = json.dumps({'username': name, 'password': password})
+    status, data = client.request('POST', '/login', login, {'Content-Type': 'application/json'})
+    if status != 200:
+        raise SystemExit(f"Could not log in: {status} {data[:200]!r}")
+    client.close()
+    return user_id, login, json.loads(data)['access_token']
+
+
+def run_client(url, deadline, routes, weights, results, lock):
+    client = Client(url)
+    local = []
+    while time.monotonic() < deadline:
+        name, method, path, body, headers = random.choices(routes, weights)[0]
+        started = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, body, headers)
+        except (http.client.HTTPException, OSError):
+            status = 0
+        local.append((name, status, time.perf_counter() - started))
+    client.close()
+    with lock:
+        results.extend(local)
+
+
+def percentile(sorted_values, share):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * share))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--login-share', type=float, default=0.05, help='share of requests that are logins')
+    args = parser.parse_args()
+
+    user_id, login, token = register_user(args.url)
+    auth = {'Authorization': f'Bearer {token}'}
+    routes = [
+        ('GET /users/<id>', 'GET', f'/users/{user_id}', None, auth),
+        ('GET /users/<id>/profile', 'GET', f'/users/{user_id}/profile', None, auth),
+        ('GET /users/<id>/scores', 'GET', f'/users/{user_id}/scores', None, auth),
+        ('GET /questions', 'GET', '/questions', None, auth),
+        ('POST /login', 'POST', '/login', login, {'Content-Type': 'application/json'}),
+    ]
+    read_weight = (1 - args.login_share) / (len(routes) - 1)
+    weights = [read_weight] * (len(routes) - 1) + [args.login_share]
+
+    results, lock = [], threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=run_client, args=(args.url, deadline, routes, weights, results, lock))
+               for _ in range(args.concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    errors = sum(1 for _, status, _ in results if not 200 <= status < 300)
+    print(f"{len(results)} requests in {elapsed:.1f} s with {args.concurrency} clients: "
+          f"{len(results) / elapsed:.1f} req/s, {errors} errors")
+    print(f"{'route':28} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in [route[0] for route in routes] + ['all']:
+        latencies = sorted(duration for route, _, duration in results if name in (route, 'all'))
+        if latencies:
+            print(f"{name:28} {len(latencies):7d} {statistics.median(latencies) * 1000:8.1f} "
+                  f"{percentile(latencies, 0.95) * 1000:8.1f} {percentile(latencies, 0.99) * 1000:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
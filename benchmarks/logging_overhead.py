@@ -0,0 +1,85 @@
+"""
+Logging overhead benchmark.
+
+Measures the time a request spends logging a number of records inside a
+request context, with the console and file handlers attached directly to
+the logger (synchronous I/O) and behind the QueueHandler used by the
+application. The difference to the run without handlers is the logging
+cost paid by the request thread:
+
+    python benchmarks/logging_overhead.py --requests 2000 --records 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def measure(app, logger, requests, records):
+    started = time.perf_counter()
+    for request_number in range(requests):
+        with app.test_request_context(f'/benchmark/{request_number}'):
+            for record_number in range(records):
+                logger.debug(f"Benchmark record {record_number} of request {request_number}")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--records', type=int, default=8, help='log records per request')
+    args = parser.parse_args()
+
+    from flask import Flask
+    from app import logging_config
+    from app.logging_config import (CompressingRotatingFileHandler, RequestContextFilter, logFormatter, logger,
+                                    queueHandler, queueListener)
+
+    app = Flask(__name__)
+    logger.setLevel(logging.DEBUG)
+    logger.removeHandler(queueHandler)
+    queueListener.stop()
+
+    with tempfile.TemporaryDirectory() as folder, open(os.devnull, 'w') as devnull:
+        console = logging.StreamHandler(devnull)
+        file = CompressingRotatingFileHandler(os.path.join(folder, 'benchmark.log'), max_bytes=10 * 1024 * 1024,
+                                              rotate_seconds=0, backup_count=2)
+        context = RequestContextFilter()
+        for handler in (console, file):
+            handler.setFormatter(logFormatter)
+
+        logger.addHandler(logging.NullHandler())
+        baseline = measure(app, logger, args.requests, args.records)
+        logger.handlers.clear()
+
+        logger.addFilter(context)
+        logger.addHandler(console)
+        logger.addHandler(file)
+        synchronous = measure(app, logger, args.requests, args.records)
+        logger.removeHandler(console)
+        logger.removeHandler(file)
+        logger.removeFilter(context)
+
+        listener = logging_config.QueueListener(logging_config.logQueue, console, file, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(queueHandler)
+        queued = measure(app, logger, args.requests, args.records)
+        started = time.perf_counter()
+        listener.stop()
+        drained = (time.perf_counter() - started) * 1e3
+        logger.removeHandler(queueHandler)
+        file.close()
+
+    print(f"{args.records} records per request, {args.requests} requests")
+    print(f"no handlers:          {baseline:8.1f} us per request")
+    print(f"synchronous handlers: {synchronous:8.1f} us per request")
+    print(f"queue handler:        {queued:8.1f} us per request (listener drained the rest in {drained:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Login throughput benchmark.
+
+Measures successful logins per second with concurrent clients against an
+application backed by a temporary SQLite database. Run it once with the
+bcrypt pool disabled and once enabled to compare:
+
+    python benchmarks/login_throughput.py --pool-size 0
+    python benchmarks/login_throughput.py --pool-size 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def build_app(args, db_path):
+    from app import create_app, db
+    from app.config import Config
+
+    class BenchmarkConfig(Config):
+        SECRET_KEY = 'benchmark-secret-key-that-is-long-enough'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        BCRYPT_LOG_ROUNDS = args.rounds
+        BCRYPT_POOL_SIZE = args.pool_size
+        BCRYPT_POOL_QUEUE_SIZE = args.clients
+        BCRYPT_POOL_TIMEOUT = 60
+        RATE_LIMIT_ENABLED = False
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        from app.models.role import Role
+        db.session.add(Role(name='Customer'))
+        db.session.commit()
+
+    response = app.test_client().post('/users', data={
+        'username': 'benchmark',
+        'email': 'benchmark@example.com',
+        'password': 'benchmark-password',
+    })
+    assert response.status_code == 201, response.get_json()
+    return app
+
+
+def run(app, clients, logins_per_client):
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client_loop():
+        client = app.test_client()
+        barrier.wait()
+        for _ in range(logins_per_client):
+            started = time.perf_counter()
+            response = client.post('/login', json={'username': 'benchmark', 'password': 'benchmark-password'})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    failures.append(response.status_code)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=10, help='logins per client')
+    parser.add_argument('--pool-size', type=int, default=os.cpu_count() or 1, help='0 runs bcrypt inline')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        app = build_app(args, os.path.join(folder, 'benchmark.db'))
+        elapsed, latencies, failures = run(app, args.clients, args.logins)
+
+        from app.services.last_seen_service import last_seen
+        from app.services.password_service import shutdown_password_pool
+        last_seen.flush_on_exit()
+        shutdown_password_pool()
+
+    latencies.sort()
+    print(f"clients={args.clients} pool_size={args.pool_size} rounds={args.rounds}")
+    print(f"successful logins: {len(latencies)}  failed: {len(failures)}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} logins/s")
+    if latencies:
+        print(f"latency p50: {statistics.median(latencies) * 1000:.1f} ms  "
+              f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Profiling overhead benchmark.
+
+Measures the per-request cost of the profiling hooks on an empty view:
+without the hooks (PROFILING_ENABLED=false), with the hooks installed but
+no request picked, and with every request profiled by the stack sampler
+and by cProfile, including writing the capture:
+
+    python benchmarks/profiling_overhead.py --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def build_client(folder, **config):
+    from flask import Flask
+    from flask_jwt_extended import JWTManager
+    from app.middleware.profiling import init_profiling
+
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='benchmark-secret-key-that-is-long-enough', PROFILE_DIR=folder,
+                      PROFILE_MAX_FILES=50, PROFILE_SAMPLE_INTERVAL_MS=5, **config)
+    JWTManager(app)
+    init_profiling(app)
+
+    @app.route('/empty')
+    def empty():
+        return ''
+
+    return app.test_client()
+
+
+def measure(client, requests):
+    for _ in range(min(requests, 200)):
+        client.get('/empty')
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get('/empty')
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        variants = (
+            ('no hooks', dict(PROFILING_ENABLED=False)),
+            ('hooks, not sampled', dict(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=0.0)),
+            ('every request, sampler', dict(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=1.0, PROFILE_MODE='sample')),
+            ('every request, cProfile', dict(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=1.0, PROFILE_MODE='cprofile')),
+        )
+        for name, config in variants:
+            print(f"{name + ':':26} {measure(build_client(folder, **config), args.requests):8.1f} us per request")
+
+
+if __name__ == '__main__':
+    main()
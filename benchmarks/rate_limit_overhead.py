@@ -0,0 +1,60 @@
+"""
+Rate limiter overhead benchmark.
+
+Measures the cost of one token-bucket check with the shared memory-mapped
+table and with the per-process fallback, optionally with several processes
+hammering the shared table at once:
+
+    python benchmarks/rate_limit_overhead.py --checks 100000 --processes 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.middleware.rate_limit import MemoryBuckets, SharedBuckets, parse_limit
+
+
+def measure(buckets, checks, identities):
+    capacity, rate = parse_limit('1000000/second')
+    keys = [f"login:ip:10.0.{i // 256}.{i % 256}" for i in range(identities)]
+    started = time.perf_counter()
+    for i in range(checks):
+        buckets.acquire(keys[i % identities], capacity, rate)
+    return (time.perf_counter() - started) / checks * 1e6
+
+
+def worker(path, checks, identities, results):
+    results.put(measure(SharedBuckets(path, 4096), checks, identities))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=100000)
+    parser.add_argument('--identities', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'rate-limit.bin')
+        print(f"memory buckets:  {measure(MemoryBuckets(), args.checks, args.identities):.2f} us/check")
+        print(f"shared buckets:  {measure(SharedBuckets(path, 4096), args.checks, args.identities):.2f} us/check")
+
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(path, args.checks, args.identities, results))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        timings = [results.get() for _ in processes]
+        print(f"shared buckets, {args.processes} processes: {max(timings):.2f} us/check (slowest process)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Startup time benchmark.
+
+Measures, in fresh interpreters, the time to import the application
+package, the time `create_app` takes against an existing database, and the
+time a forked worker of the loaded application needs to answer its first
+request:
+
+    python benchmarks/startup_time.py --runs 5 --forks 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHILD = r'''
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+started = time.perf_counter()
+from app import create_app
+from app.config import Config
+imported = time.perf_counter()
+
+
+class BenchmarkConfig(Config):
+    SECRET_KEY = 'benchmark-secret-key-that-is-long-enough'
+    SQLALCHEMY_DATABASE_URI = f'sqlite:///{sys.argv[2]}'
+    RATE_LIMIT_ENABLED = False
+
+
+app = create_app(BenchmarkConfig)
+created = time.perf_counter()
+
+forks = []
+for _ in range(int(sys.argv[3])):
+    fork_started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        status = app.test_client().get('/categories').status_code
+        os._exit(0 if status < 500 else 1)
+    os.waitpid(pid, 0)
+    forks.append(time.perf_counter() - fork_started)
+
+print(json.dumps({'import': imported - started, 'create_app': created - imported, 'forks': forks}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to start')
+    parser.add_argument('--forks', type=int, default=20, help='workers forked per interpreter')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, 'benchmark.db')
+        env = dict(os.environ, METRICS_DIR=os.path.join(folder, 'metrics'),
+                   SQL_STATS_DIR=os.path.join(folder, 'query-stats'), LOG_FILE=os.path.join(folder, 'benchmark.log'))
+        # The first run creates the schema; it is not measured.
+        command = [sys.executable, '-c', CHILD, ROOT, db_path]
+        subprocess.run(command + ['0'], env=env, check=True, capture_output=True)
+
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(command + [str(args.forks)], env=env, check=True, capture_output=True, text=True)
+            results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    forks = [duration for result in results for duration in result['forks']]
+    print(f"{args.runs} runs, {args.forks} forks per run (medians)")
+    print(f"import app:            {statistics.median(r['import'] for r in results) * 1000:8.1f} ms")
+    print(f"create_app:            {statistics.median(r['create_app'] for r in results) * 1000:8.1f} ms")
+    if forks:
+        print(f"fork to first request: {statistics.median(forks) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
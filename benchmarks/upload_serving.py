@@ -0,0 +1,68 @@
+"""
+Upload serving benchmark.
+
+Measures requests per second served by a single worker for a
+content-addressed profile picture: full downloads, revalidations answered
+with 304, and range requests.
+
+    python benchmarks/upload_serving.py --requests 5000 --size 200000
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def build_app(folder):
+    from app import create_app
+    from app.config import Config
+
+    class BenchmarkConfig(Config):
+        SECRET_KEY = 'benchmark-secret-key-that-is-long-enough'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(folder, "benchmark.db")}'
+        UPLOAD_FOLDER = folder
+        SQL_INSTRUMENTATION_ENABLED = False
+
+    return create_app(BenchmarkConfig)
+
+
+def measure(client, path, requests, headers, expected_status):
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        assert response.status_code == expected_status, response.status_code
+        response.close()
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=200000, help='file size in bytes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        content = os.urandom(args.size)
+        filename = f"{hashlib.sha256(content).hexdigest()}.jpg"
+        with open(os.path.join(folder, filename), 'wb') as file:
+            file.write(content)
+
+        client = build_app(folder).test_client()
+        path = f'/uploads/{filename}'
+        cases = [
+            ('full download (200)', {}, 200),
+            ('revalidation (304)', {'If-None-Match': f'"{filename}"'}, 304),
+            ('range 0-1023 (206)', {'Range': 'bytes=0-1023'}, 206),
+        ]
+        print(f"file size: {args.size} bytes, {args.requests} requests per case")
+        for label, headers, status in cases:
+            print(f"{label:<22} {measure(client, path, args.requests, headers, status):8.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
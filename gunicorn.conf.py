@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration for production.
+
+The application is loaded once in the master process (`preload_app`) and
+the workers are forked from it. Workers are recycled after MAX_REQUESTS
+requests, with jitter so that they do not restart together. On shutdown or
+recycling a worker finishes its requests within GRACEFUL_TIMEOUT and then
+flushes its buffered writes; the master then folds the worker's metrics
+into the aggregate file. All settings can be overridden with the
+environment variables below or on the command line.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = os.getenv('APP_MODULE', 'wsgi:app')
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('WORKER_CLASS', 'gthread')
+threads = int(os.getenv('WORKER_THREADS', 4))
+preload_app = True
+max_requests = int(os.getenv('MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', 500))
+timeout = int(os.getenv('WORKER_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('KEEPALIVE_SECONDS', 5))
+accesslog = os.getenv('ACCESS_LOG')
+pidfile = os.getenv('PID_FILE')
+
+
+def _flask_app():
+    from wsgi import app
+    return app
+
+
+def on_starting(server):
+    from app.config import Config
+    from app.middleware.rate_limit import reset_rate_limits
+    from app.services.metrics_service import reset_metrics
+
+    # Samples of earlier runs would otherwise be added to the new ones.
+    reset_metrics(Config.METRICS_DIR)
+    reset_rate_limits(_flask_app().config)
+
+
+def post_fork(server, worker):
+    from app.lifecycle import after_fork
+
+    after_fork(_flask_app())
+
+
+def worker_exit(server, worker):
+    from app.lifecycle import shutdown_app
+
+    shutdown_app(_flask_app())
+
+
+def child_exit(server, worker):
+    from app.services.metrics_service import fold_exited_metrics
+
+    # Runs in the master, also for workers that were killed; an exception
+    # here would stop the master.
+    config = _flask_app().config
+    if not config.get('METRICS_ENABLED', True):
+        return
+    try:
+        fold_exited_metrics(config['METRICS_DIR'])
+    except Exception as e:
+        server.log.warning(f"Could not fold the metrics of worker {worker.pid}: {str(e)}")
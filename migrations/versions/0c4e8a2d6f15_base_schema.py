@@ -0,0 +1,157 @@
+"""base schema
+
+Revision ID: 0c4e8a2d6f15
+Revises: 
+Create Date: 2026-10-19 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0c4e8a2d6f15'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing_tables():
+    # Databases created by `db.create_all()` before the migrations existed already have these tables.
+    return set(['roles', 'users', 'user_profiles', 'claims', 'categories', 'questions', 'scores',
+                'achievements', 'game_sessions']) - set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    missing = _missing_tables()
+
+    if 'roles' in missing:
+        op.create_table(
+            'roles',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'),
+        )
+
+    if 'users' in missing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('username', sa.String(length=50), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('role_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('last_login', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['role_id'], ['roles.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'user_profiles' in missing:
+        op.create_table(
+            'user_profiles',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('profile_picture', sa.String(length=255), nullable=True),
+            sa.Column('level', sa.Integer(), nullable=True),
+            sa.Column('experience_points', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'claims' in missing:
+        op.create_table(
+            'claims',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('type', sa.String(length=100), nullable=False),
+            sa.Column('value', sa.String(length=100), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'categories' in missing:
+        op.create_table(
+            'categories',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'),
+        )
+
+    if 'questions' in missing:
+        op.create_table(
+            'questions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=False),
+            sa.Column('difficulty', sa.Enum('EASY', 'MEDIUM', 'HARD', name='difficultylevel'), nullable=False),
+            sa.Column('question_text', sa.Text(), nullable=False),
+            sa.Column('answer', sa.String(length=255), nullable=False),
+            sa.Column('incorrect_answers', sa.JSON(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('times_asked', sa.Integer(), nullable=True),
+            sa.Column('success_rate', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'scores' in missing:
+        op.create_table(
+            'scores',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('score', sa.Integer(), nullable=False),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=True),
+            sa.Column('duration', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_scores_user_id', 'scores', ['user_id'])
+
+    if 'achievements' in missing:
+        op.create_table(
+            'achievements',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('achievement_name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('date_awarded', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_achievements_user_id', 'achievements', ['user_id'])
+
+    if 'game_sessions' in missing:
+        op.create_table(
+            'game_sessions',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('questions_asked', sa.JSON().with_variant(postgresql.ARRAY(sa.Integer()), 'postgresql'),
+                      nullable=False),
+            sa.Column('correct_answers', sa.Integer(), nullable=False),
+            sa.Column('total_questions', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.DateTime(), nullable=True),
+            sa.Column('end_time', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_game_sessions_user_id', 'game_sessions', ['user_id'])
+
+
+def downgrade():
+    op.drop_table('game_sessions')
+    op.drop_table('achievements')
+    op.drop_table('scores')
+    op.drop_table('questions')
+    sa.Enum(name='difficultylevel').drop(op.get_bind(), checkfirst=True)
+    op.drop_table('categories')
+    op.drop_table('claims')
+    op.drop_table('user_profiles')
+    op.drop_table('users')
+    op.drop_table('roles')
@@ -0,0 +1,95 @@
+"""partition scores by month
+
+Revision ID: 3f1c2a7d9b10
+Revises: 0c4e8a2d6f15
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9b10'
+down_revision = '0c4e8a2d6f15'
+branch_labels = None
+depends_on = None
+
+
+def _add_months(start, months):
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite keeps a plain scores table; periods are rotated into per-month tables by `flask scores rotate`.
+        return
+
+    op.execute("ALTER TABLE scores RENAME TO scores_unpartitioned")
+    op.execute("ALTER INDEX IF EXISTS ix_scores_user_id RENAME TO ix_scores_unpartitioned_user_id")
+    op.execute("ALTER TABLE scores_unpartitioned RENAME CONSTRAINT scores_pkey TO scores_unpartitioned_pkey")
+    op.execute("ALTER SEQUENCE scores_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE scores (
+            id INTEGER NOT NULL DEFAULT nextval('scores_id_seq'::regclass),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            score INTEGER NOT NULL,
+            date TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            category_id INTEGER REFERENCES categories (id),
+            duration INTEGER,
+            PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER SEQUENCE scores_id_seq OWNED BY scores.id")
+    op.execute("CREATE INDEX ix_scores_user_id ON scores (user_id)")
+    op.execute("CREATE TABLE scores_default PARTITION OF scores DEFAULT")
+
+    oldest = bind.execute(sa.text("SELECT min(date) FROM scores_unpartitioned")).scalar() or datetime.utcnow()
+    start = datetime(oldest.year, oldest.month, 1)
+    now = datetime.utcnow()
+    last = _add_months(datetime(now.year, now.month, 1), 2)
+    while start <= last:
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE scores_{start.year:04d}_{start.month:02d} PARTITION OF scores "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.execute("""
+        INSERT INTO scores (id, user_id, score, date, category_id, duration)
+        SELECT id, user_id, score, COALESCE(date, now() AT TIME ZONE 'utc'), category_id, duration
+        FROM scores_unpartitioned
+    """)
+    op.execute("DROP TABLE scores_unpartitioned")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE scores RENAME TO scores_partitioned")
+    op.execute("ALTER INDEX ix_scores_user_id RENAME TO ix_scores_partitioned_user_id")
+    op.execute("ALTER SEQUENCE scores_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE scores (
+            id INTEGER NOT NULL DEFAULT nextval('scores_id_seq'::regclass) PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            score INTEGER NOT NULL,
+            date TIMESTAMP WITHOUT TIME ZONE,
+            category_id INTEGER REFERENCES categories (id),
+            duration INTEGER
+        )
+    """)
+    op.execute("ALTER SEQUENCE scores_id_seq OWNED BY scores.id")
+    op.execute("CREATE INDEX ix_scores_user_id ON scores (user_id)")
+    op.execute("""
+        INSERT INTO scores (id, user_id, score, date, category_id, duration)
+        SELECT id, user_id, score, date, category_id, duration FROM scores_partitioned
+    """)
+    op.execute("DROP TABLE scores_partitioned CASCADE")
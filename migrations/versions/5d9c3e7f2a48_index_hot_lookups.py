@@ -0,0 +1,29 @@
+"""index hot lookups
+
+Revision ID: 5d9c3e7f2a48
+Revises: 8b2e4f6a1c35
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9c3e7f2a48'
+down_revision = '8b2e4f6a1c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_claims_user_id', 'claims', ['user_id'], if_not_exists=True)
+    op.create_index('ix_questions_category_id', 'questions', ['category_id'], if_not_exists=True)
+    op.create_index('ix_questions_question_text', 'questions', ['question_text'], if_not_exists=True)
+    op.create_index('ix_scores_category_id_score', 'scores', ['category_id', 'score'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_scores_category_id_score', table_name='scores', if_exists=True)
+    op.drop_index('ix_questions_question_text', table_name='questions', if_exists=True)
+    op.drop_index('ix_questions_category_id', table_name='questions', if_exists=True)
+    op.drop_index('ix_claims_user_id', table_name='claims', if_exists=True)
@@ -0,0 +1,63 @@
+"""score distributions, reference data versions and revoked tokens
+
+Revision ID: 7e1a9c3b5d24
+Revises: 5d9c3e7f2a48
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e1a9c3b5d24'
+down_revision = '5d9c3e7f2a48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by `db.create_all()` may already have these tables.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'score_distributions' not in existing:
+        op.create_table(
+            'score_distributions',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=False),
+            sa.Column('metric', sa.String(length=20), nullable=False),
+            sa.Column('counts', sa.JSON(), nullable=False),
+            sa.Column('total_count', sa.BigInteger(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('category_id', 'metric', name='uq_score_distributions_category_metric'),
+        )
+
+    if 'reference_data_versions' not in existing:
+        op.create_table(
+            'reference_data_versions',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+    if 'revoked_tokens' not in existing:
+        op.create_table(
+            'revoked_tokens',
+            sa.Column('jti', sa.String(length=36), nullable=False),
+            sa.Column('token_type', sa.String(length=10), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('revoked_at', sa.DateTime(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('jti'),
+        )
+        op.create_index('ix_revoked_tokens_user_id', 'revoked_tokens', ['user_id'])
+        op.create_index('ix_revoked_tokens_revoked_at', 'revoked_tokens', ['revoked_at'])
+        op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'])
+
+
+def downgrade():
+    op.drop_table('revoked_tokens')
+    op.drop_table('reference_data_versions')
+    op.drop_table('score_distributions')
@@ -0,0 +1,27 @@
+"""index user list filters
+
+Revision ID: 8b2e4f6a1c35
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4f6a1c35'
+down_revision = '3f1c2a7d9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_role_id', 'users', ['role_id'], if_not_exists=True)
+    op.create_index('ix_users_created_at', 'users', ['created_at'], if_not_exists=True)
+    op.create_index('ix_user_profiles_user_id', 'user_profiles', ['user_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_user_profiles_user_id', table_name='user_profiles', if_exists=True)
+    op.drop_index('ix_users_created_at', table_name='users', if_exists=True)
+    op.drop_index('ix_users_role_id', table_name='users', if_exists=True)
@@ -0,0 +1,113 @@
+"""
+Shared fixtures: one application backed by a temporary SQLite database.
+
+The settings are read when `app.config` is imported, so the environment is
+prepared before the application is.
+"""
+
+import itertools
+import os
+import tempfile
+
+import pytest
+
+
+_RUN_DIR = tempfile.mkdtemp(prefix='app-tests-')
+
+os.environ.update({
+    'SECRET_KEY': 'test-secret-key-' + 'x' * 32,
+    'JWT_SECRET_KEY': 'test-jwt-secret-key-' + 'y' * 32,
+    'DATABASE_URL': 'sqlite:///' + os.path.join(_RUN_DIR, 'app.db'),
+    'RUNTIME_DIR': os.path.join(_RUN_DIR, 'var'),
+    'LOG_FILE': os.path.join(_RUN_DIR, 'app.log'),
+    'SCORE_ARCHIVE_FOLDER': os.path.join(_RUN_DIR, 'archive'),
+    'RATE_LIMIT_ENABLED': 'false',
+    'BCRYPT_LOG_ROUNDS': '4',
+    'BCRYPT_POOL_SIZE': '0',
+})
+
+
+def _compile_arrays_for_sqlite():
+    # Models use PostgreSQL arrays; SQLite stores them as JSON.
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.types import ARRAY
+
+    @compiles(ARRAY, 'sqlite')
+    def _array_as_json(type_, compiler, **kw):
+        return 'JSON'
+
+
+_compile_arrays_for_sqlite()
+
+from app import create_app, db  # noqa: E402
+from app.models.claim import Claim  # noqa: E402
+from app.models.role import Role  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.last_seen_service import last_seen  # noqa: E402
+from app.services.token_service import revocation_list  # noqa: E402
+from app.services.xp_service import xp_awards  # noqa: E402
+
+PASSWORD = 'test-password'
+
+# A manual connectivity check that calls GitHub when imported; it has no tests.
+collect_ignore = ['test_requests.py']
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(_RUN_DIR, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    with app.app_context():
+        if Role.query.first() is None:
+            db.session.add_all([Role(name='Admin'), Role(name='Customer')])
+            db.session.commit()
+
+    yield app
+
+    # Write what the buffers still hold before pytest closes the log streams.
+    for buffer in (last_seen, xp_awards):
+        buffer.flush_on_exit()
+    revocation_list.stop()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture
+def make_user(app, client):
+    """
+    Return a function that signs up a new user and logs them in.
+
+    The function takes `admin=False` and returns the user ID and the login
+    response with the access and refresh tokens.
+    """
+    def make(admin=False):
+        name = f"user{next(_user_numbers)}"
+        response = client.post('/users', data={'username': name, 'email': f'{name}@example.com',
+                                               'password': PASSWORD})
+        assert response.status_code == 201, response.get_json()
+        user_id = response.get_json()['data']['id']
+
+        if admin:
+            with app.app_context():
+                user = db.session.get(User, user_id)
+                user.role_id = Role.query.filter_by(name='Admin').one().id
+                for claim in Claim.query.filter_by(user_id=user_id, type='role'):
+                    claim.value = 'Admin'
+                db.session.commit()
+
+        response = client.post('/login', json={'username': name, 'password': PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        return user_id, response.get_json()
+
+    return make
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,86 @@
+"""
+Keyset pagination of the user list.
+"""
+
+import pytest
+
+from conftest import bearer
+from app.models.user import User
+
+
+@pytest.fixture
+def admin_headers(make_user):
+    _, admin = make_user(admin=True)
+    for _ in range(4):
+        make_user()
+    return bearer(admin['access_token'])
+
+
+def _all_user_ids(app):
+    with app.app_context():
+        return [user.id for user in User.query.order_by(User.id)]
+
+
+@pytest.mark.parametrize('limit', ['0', '-1', 'ten'])
+def test_invalid_limit_is_rejected(client, admin_headers, limit):
+    response = client.get('/users', query_string={'limit': limit}, headers=admin_headers)
+
+    assert response.status_code == 400
+
+
+def test_invalid_cursor_is_rejected(client, admin_headers):
+    response = client.get('/users', query_string={'cursor': 'not-a-cursor'}, headers=admin_headers)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_pages_cover_every_user_once(app, client, admin_headers, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = {'limit': limit}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/users', query_string=query, headers=admin_headers)
+        assert response.status_code == 200
+        page = [user['id'] for user in response.get_json()]
+        assert 0 < len(page) <= limit
+        seen.extend(page)
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            assert 'Link' not in response.headers
+            break
+        assert len(page) == limit
+        assert 'rel="next"' in response.headers['Link']
+
+    expected = _all_user_ids(app)
+    assert seen == expected
+    assert pages == -(-len(expected) // limit)
+
+
+def test_exact_last_page_has_no_next_cursor(app, client, admin_headers):
+    total = len(_all_user_ids(app))
+
+    response = client.get('/users', query_string={'limit': total}, headers=admin_headers)
+
+    assert len(response.get_json()) == total
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_limit_is_capped(app, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_SIZE_MAX', 2)
+
+    response = client.get('/users', query_string={'limit': 1000}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+    assert 'X-Next-Cursor' in response.headers
+
+
+def test_default_limit_applies_when_absent(app, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_SIZE_DEFAULT', 3)
+
+    response = client.get('/users', headers=admin_headers)
+
+    assert len(response.get_json()) == 3
@@ -0,0 +1,63 @@
+"""
+Refresh token rotation and token revocation.
+"""
+
+import time
+
+from flask_jwt_extended import decode_token
+
+from conftest import bearer
+from app import db
+from app.dal.revoked_token_dal import RevokedTokenDAL
+from app.services.token_service import _revoke
+
+
+def _refresh(client, refresh_token):
+    return client.post('/token/refresh', headers=bearer(refresh_token))
+
+
+def test_refresh_token_works_once(client, make_user):
+    user_id, login = make_user()
+
+    first = _refresh(client, login['refresh_token'])
+    assert first.status_code == 200, first.get_json()
+    tokens = first.get_json()
+    assert tokens['refresh_token'] != login['refresh_token']
+
+    assert _refresh(client, login['refresh_token']).status_code == 401
+    assert _refresh(client, tokens['refresh_token']).status_code == 200
+    assert client.get(f'/users/{user_id}', headers=bearer(tokens['access_token'])).status_code == 200
+
+
+def test_access_token_cannot_refresh(client, make_user):
+    _, login = make_user()
+
+    assert _refresh(client, login['access_token']).status_code == 422
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, make_user):
+    user_id, login = make_user()
+    tokens = _refresh(client, login['refresh_token']).get_json()
+
+    response = client.post('/logout', headers=bearer(tokens['access_token']),
+                           json={'refresh_token': tokens['refresh_token']})
+
+    assert response.status_code == 200, response.get_json()
+    assert client.get(f'/users/{user_id}', headers=bearer(tokens['access_token'])).status_code == 401
+    assert _refresh(client, tokens['refresh_token']).status_code == 401
+    # The access token of the first login is unaffected.
+    assert client.get(f'/users/{user_id}', headers=bearer(login['access_token'])).status_code == 200
+
+
+def test_revocation_by_another_process_is_seen(app, client, make_user):
+    user_id, login = make_user()
+    with app.app_context():
+        # Written straight to the table, as another worker would.
+        _revoke(decode_token(login['access_token']))
+        db.session.commit()
+        assert RevokedTokenDAL.is_revoked(decode_token(login['access_token'])['jti'])
+
+    deadline = time.monotonic() + 10
+    while client.get(f'/users/{user_id}', headers=bearer(login['access_token'])).status_code != 401:
+        assert time.monotonic() < deadline, 'the revoked token is still accepted'
+        time.sleep(0.1)
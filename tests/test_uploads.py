@@ -0,0 +1,126 @@
+"""
+Profile picture uploads: size and type checks and content-addressed storage.
+"""
+
+import hashlib
+import io
+import os
+import time
+
+from PIL import Image
+
+from app.models.userProfile import UserProfile
+
+
+def _png(color='red', size=(8, 8)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+_signups = iter(range(1, 1000))
+
+
+def _sign_up(client, picture, filename='picture.png'):
+    name = f"uploader{next(_signups)}"
+    return client.post('/users', content_type='multipart/form-data', data={
+        'username': name,
+        'email': f'{name}@example.com',
+        'password': 'test-password',
+        'profile_picture': (io.BytesIO(picture), filename),
+    })
+
+
+def _wait_for(path, timeout=10):
+    # Thumbnails are rendered by a background thread.
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        assert time.monotonic() < deadline, f"{path} was not written"
+        time.sleep(0.05)
+
+
+def _stored_picture(app, user_id):
+    with app.app_context():
+        return UserProfile.query.filter_by(user_id=user_id).one().profile_picture
+
+
+def test_picture_is_stored_under_its_digest(app, client):
+    picture = _png('blue')
+
+    response = _sign_up(client, picture)
+
+    assert response.status_code == 201, response.get_json()
+    stored = _stored_picture(app, response.get_json()['data']['id'])
+    assert stored == hashlib.sha256(picture).hexdigest() + '.png'
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], stored), 'rb') as f:
+        assert f.read() == picture
+
+    served = client.get(f'/uploads/{stored}')
+    assert served.status_code == 200
+    assert served.data == picture
+    served.close()
+
+
+def test_identical_pictures_are_stored_once(app, client):
+    picture = _png('green')
+
+    first = _sign_up(client, picture)
+    second = _sign_up(client, picture, filename='copy.png')
+
+    assert first.status_code == second.status_code == 201
+    stored = _stored_picture(app, first.get_json()['data']['id'])
+    assert _stored_picture(app, second.get_json()['data']['id']) == stored
+    digest = stored.rsplit('.', 1)[0]
+    originals = [name for name in os.listdir(app.config['UPLOAD_FOLDER']) if name.startswith(digest + '.')]
+    assert originals == [stored]
+
+
+def test_thumbnails_are_generated(app, client):
+    response = _sign_up(client, _png('yellow', size=(400, 300)))
+    assert response.status_code == 201
+    stored = _stored_picture(app, response.get_json()['data']['id'])
+
+    digest = stored.rsplit('.', 1)[0]
+    for size in app.config['PROFILE_THUMBNAIL_SIZES']:
+        path = os.path.join(app.config['UPLOAD_FOLDER'], f'{digest}_{size}.webp')
+        _wait_for(path)
+        with Image.open(path) as thumbnail:
+            assert max(thumbnail.size) <= size
+
+
+def test_oversized_picture_is_rejected(app, client, monkeypatch):
+    picture = _png('white', size=(64, 64))
+    monkeypatch.setitem(app.config, 'PROFILE_PICTURE_MAX_BYTES', len(picture) - 1)
+    before = sorted(os.listdir(app.config['UPLOAD_FOLDER']))
+
+    response = _sign_up(client, picture)
+
+    assert response.status_code == 413
+    assert sorted(os.listdir(app.config['UPLOAD_FOLDER'])) == before
+
+
+def test_non_image_is_rejected(app, client):
+    before = sorted(os.listdir(app.config['UPLOAD_FOLDER']))
+
+    response = _sign_up(client, b'#!/bin/sh\necho not a picture\n')
+
+    assert response.status_code == 415
+    assert sorted(os.listdir(app.config['UPLOAD_FOLDER'])) == before
+
+
+def test_failed_signup_leaves_no_file(app, client):
+    picture = _png('purple')
+    first = _sign_up(client, _png('black'))
+    assert first.status_code == 201
+    username = first.get_json()['data']['username']
+
+    response = client.post('/users', content_type='multipart/form-data', data={
+        'username': username,
+        'email': 'other@example.com',
+        'password': 'test-password',
+        'profile_picture': (io.BytesIO(picture), 'picture.png'),
+    })
+
+    assert response.status_code == 409
+    digest = hashlib.sha256(picture).hexdigest()
+    assert not any(name.startswith(digest) for name in os.listdir(app.config['UPLOAD_FOLDER']))
@@ -0,0 +1,122 @@
+"""
+CoalescingBuffer: values are merged per key and kept when a write fails.
+"""
+
+import pytest
+
+from app.services.write_buffer import CoalescingBuffer
+
+
+class RecordingBuffer(CoalescingBuffer):
+    """
+    Sums values per key and keeps every batch it was asked to write.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.failures = 0
+
+    def _merge(self, current, value):
+        return current + value
+
+    def _write(self, pending):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database unavailable')
+        self.batches.append(dict(pending))
+
+
+class LatestBuffer(RecordingBuffer):
+    """
+    Keeps the newest value per key, like the last seen buffer.
+    """
+
+    def _merge(self, current, value):
+        return max(current, value)
+
+
+@pytest.fixture
+def buffer(app):
+    buffer = RecordingBuffer()
+    yield buffer
+    buffer.failures = 0
+    buffer.flush_on_exit()
+
+
+def test_values_for_one_key_are_merged(app, buffer):
+    for value in (1, 2, 3):
+        buffer.record(app, 'a', value)
+    buffer.record(app, 'b', 10)
+
+    assert buffer.pending_count() == 2
+    assert buffer.flush() == 2
+    assert buffer.batches == [{'a': 6, 'b': 10}]
+    assert buffer.pending_count() == 0
+    assert buffer.flush() == 0
+
+
+def test_failed_write_is_retried(app, buffer):
+    buffer.record(app, 'a', 1)
+    buffer.failures = 1
+
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+
+    assert buffer.pending_count() == 1
+    assert buffer.flush() == 1
+    assert buffer.batches == [{'a': 1}]
+
+
+def test_values_recorded_during_failed_write_are_merged(app, buffer):
+    buffer.record(app, 'a', 1)
+    buffer.record(app, 'b', 2)
+    write = buffer._write
+
+    def fail_after_new_values(pending):
+        buffer.record(app, 'a', 5)
+        buffer.record(app, 'c', 7)
+        raise RuntimeError('database unavailable')
+
+    buffer._write = fail_after_new_values
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    buffer._write = write
+
+    assert buffer.flush() == 3
+    assert buffer.batches == [{'a': 6, 'b': 2, 'c': 7}]
+
+
+def test_newer_value_wins_after_failed_write(app):
+    buffer = LatestBuffer()
+    buffer.record(app, 'a', 1)
+
+    def fail_after_newer_value(pending):
+        buffer.record(app, 'a', 2)
+        raise RuntimeError('database unavailable')
+
+    buffer._write = fail_after_newer_value
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    del buffer._write
+
+    buffer.flush_on_exit()
+    assert buffer.batches == [{'a': 2}]
+
+
+def test_flush_on_exit_writes_pending_values(app, buffer):
+    buffer.record(app, 'a', 4)
+
+    buffer.flush_on_exit()
+
+    assert buffer.batches == [{'a': 4}]
+    assert buffer._stop.is_set()
+
+
+def test_flush_on_exit_keeps_values_when_write_fails(app, buffer):
+    buffer.record(app, 'a', 4)
+    buffer.failures = 1
+
+    buffer.flush_on_exit()
+
+    assert buffer.pending_count() == 1
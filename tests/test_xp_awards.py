@@ -0,0 +1,105 @@
+"""
+Experience point awards: concurrent awards add up and levels only go up.
+"""
+
+import threading
+
+from conftest import bearer
+from app import db
+from app.models.userProfile import UserProfile
+from app.services.xp_service import XpAwardBuffer, award_experience, level_for_experience
+
+
+def _profile(app, user_id):
+    with app.app_context():
+        profile = UserProfile.query.filter_by(user_id=user_id).one()
+        return profile.experience_points, profile.level
+
+
+def test_concurrent_awards_do_not_lose_points(app, make_user):
+    user_id, _ = make_user()
+    threads, awards_per_thread = 8, 10
+    errors = []
+
+    def award():
+        for _ in range(awards_per_thread):
+            with app.app_context():
+                _, status = award_experience(user_id, 3)
+                if status != 200:
+                    errors.append(status)
+
+    workers = [threading.Thread(target=award) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    experience_points, level = _profile(app, user_id)
+    assert experience_points == threads * awards_per_thread * 3
+    with app.app_context():
+        assert level == level_for_experience(experience_points)
+
+
+def test_coalesced_awards_are_summed(app, make_user, monkeypatch):
+    # Keep the flush thread idle so that the explicit flush writes everything.
+    monkeypatch.setitem(app.config, 'XP_AWARD_FLUSH_SECONDS', 60)
+    user_id, _ = make_user()
+    buffer = XpAwardBuffer()
+    workers = [threading.Thread(target=lambda: [buffer.record(app, user_id, 1) for _ in range(50)])
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with app.app_context():
+        assert buffer.flush() == 1
+    buffer.flush_on_exit()
+
+    assert _profile(app, user_id)[0] == 200
+
+
+def test_award_raises_level(app, client, make_user):
+    _, admin = make_user(admin=True)
+    user_id, _ = make_user()
+
+    response = client.post(f'/users/{user_id}/xp', json={'points': 1000}, headers=bearer(admin['access_token']))
+
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body['experience_points'] == 1000
+    with app.app_context():
+        assert body['level'] == level_for_experience(1000) > 1
+    assert body['levels_gained'] == body['level'] - 1
+
+
+def test_level_never_goes_down(app, make_user):
+    user_id, _ = make_user()
+    with app.app_context():
+        profile = UserProfile.query.filter_by(user_id=user_id).one()
+        profile.level = 50
+        db.session.commit()
+
+        body, status = award_experience(user_id, 10)
+
+    assert status == 200
+    assert body['level'] == 50
+    assert body['levels_gained'] == 0
+    assert _profile(app, user_id) == (10, 50)
+
+
+def test_profile_update_cannot_set_level(app, client, make_user):
+    user_id, login = make_user()
+
+    response = client.patch(f'/users/{user_id}/profile', data={'level': '50'},
+                            headers=bearer(login['access_token']))
+
+    assert response.status_code == 400
+    assert _profile(app, user_id)[1] == 1
+
+
+def test_award_to_missing_profile(app):
+    with app.app_context():
+        body, status = award_experience(999999, 5)
+    assert status == 404
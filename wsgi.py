@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers.
+
+Serve with the bundled Gunicorn configuration:
+
+    gunicorn wsgi:app
+"""
+
+from app import create_app
+
+
+app = create_app()